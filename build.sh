@@ -2,7 +2,18 @@
 # exit on error
 set -o errexit
 
+# Besides the web process (gunicorn handyman_project.wsgi), the app needs:
+#   - a background worker, `python manage.py runworker`, for queued jobs
+#     (image variants, profile deletion); more than one can run at once
+#   - `python manage.py rebuild_rating_aggregates --ranks` once a day
+
 pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+python manage.py createcachetable
+python manage.py rebuild_rating_aggregates
+python manage.py backfill_locations
+python manage.py geocode_craftsmen
+python manage.py build_image_variants
+python manage.py build_related_services
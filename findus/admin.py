@@ -8,5 +8,18 @@ admin.site.register(CraftsmanProfile)
 admin.site.register(UserProfile)
 admin.site.register(CustomerProfile)
 admin.site.register(Service)
+admin.site.register(Location)
+admin.site.register(LocationAlias)
 
 
+@admin.register(Boost)
+class BoostAdmin(admin.ModelAdmin):
+    list_display = ['service', 'tier', 'category', 'location', 'impressions', 'impression_budget', 'starts_at', 'ends_at']
+    list_filter = ['tier', 'category']
+    raw_id_fields = ['service']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'name']
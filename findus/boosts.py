@@ -0,0 +1,174 @@
+import atexit
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import DatabaseError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Boost, LocationAlias, search_slug
+
+
+logger = logging.getLogger(__name__)
+
+# Weights when several boosts compete for a slot: the "2x / 5x / 10x more
+# views" of the craftsman_ad_boost page.
+TIER_WEIGHTS = {'standard': 2, 'professional': 5, 'premium': 10}
+SLOTS = 1                   # boosted services shown above a results page
+SNAPSHOT_SECONDS = 60       # how long a process uses its copy of the live boosts
+FLUSH_IMPRESSIONS = 100     # write impressions once this many are waiting...
+FLUSH_SECONDS = 30          # ...or the oldest has waited this long
+# How far ahead of an even spend a boost may run, as a share of its budget,
+# so a boost that has just started doesn't trickle out one impression at a time.
+PACING_SLACK = 0.02
+
+
+def paced_allowance(boost, now):
+    """The impressions `boost` may have served by `now` to spend its budget evenly."""
+    run = (boost.ends_at - boost.starts_at).total_seconds()
+    share = min(max((now - boost.starts_at).total_seconds() / run, 0), 1) if run > 0 else 1
+    return min(boost.impression_budget, math.floor(boost.impression_budget * (share + PACING_SLACK)))
+
+
+class _Snapshot:
+    """
+    The boosts live in the next SNAPSHOT_SECONDS with their services, indexed
+    by (category, location id) with '' and None for "any", and every alias
+    of their target locations, so placing a boost needs no query.
+    """
+
+    def __init__(self, now):
+        self.loaded_at = time.monotonic()
+        boosts = Boost.objects.filter(
+            starts_at__lt=now + timedelta(seconds=SNAPSHOT_SECONDS),
+            ends_at__gt=now,
+            impressions__lt=F('impression_budget'),
+            service__service_status='Active',
+            service__craftsman__is_active=True,
+        ).select_related('service__craftsman__user_profile__user')
+
+        self.slots = defaultdict(list)
+        for boost in boosts:
+            self.slots[boost.category, boost.location_id].append(boost)
+
+        # A state is targeted by searches for the state or any of its cities.
+        targets = {location_id for _, location_id in self.slots} - {None}
+        self.places = defaultdict(set)
+        if targets:
+            aliases = LocationAlias.objects.filter(
+                Q(location__in=targets) | Q(location__parent__in=targets)
+            ).values_list('alias', 'location_id', 'location__parent_id')
+            for alias, location_id, parent_id in aliases:
+                self.places[alias].update({location_id, parent_id} & targets)
+
+    def candidates(self, category, location):
+        locations = {None, *self.places.get(search_slug(location), ())}
+        return [
+            boost
+            for category_key in {'', category}
+            for location_id in locations
+            for boost in self.slots.get((category_key, location_id), ())
+        ]
+
+
+class BoostPlacer:
+    """
+    Picks the boosted services shown above customer_dashboard results.
+
+    Everything per request happens in memory: the live boosts are reloaded
+    every SNAPSHOT_SECONDS, and impressions are counted in this process and
+    written in one batch every FLUSH_IMPRESSIONS impressions or FLUSH_SECONDS.
+    Workers don't see each other's impressions until their next snapshot,
+    so a boost can run ahead of its pacing, and past its budget, by at most
+    about a snapshot's worth of its traffic per worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._served = Counter()    # since the snapshot was loaded
+        self._pending = Counter()   # not written yet
+        self._flushed_at = time.monotonic()
+
+    def expire(self):
+        """Reload the live boosts on the next placement."""
+        self._snapshot = None
+
+    def _current(self, now):
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.loaded_at >= SNAPSHOT_SECONDS:
+            snapshot = _Snapshot(now)
+            with self._lock:
+                # Impressions still waiting to be written aren't in the snapshot.
+                self._served = Counter(self._pending)
+                self._snapshot = snapshot
+        return snapshot
+
+    def place(self, category='', location='', exclude=(), now=None):
+        """
+        Up to SLOTS services to boost on a results page for `category` and
+        `location` (either may be blank), leaving out the services in
+        `exclude`. Each one returned counts as an impression.
+        """
+        now = now or timezone.now()
+        candidates = self._current(now).candidates(category, location)
+        if not candidates:
+            return []
+
+        chosen = []
+        excluded = set(exclude)
+        with self._lock:
+            for _ in range(SLOTS):
+                eligible = [
+                    boost for boost in candidates
+                    if boost.service_id not in excluded
+                    and boost.starts_at <= now < boost.ends_at
+                    and boost.impressions + self._served[boost.pk] < paced_allowance(boost, now)
+                ]
+                if not eligible:
+                    break
+                boost = random.choices(eligible, [TIER_WEIGHTS[boost.tier] for boost in eligible])[0]
+                chosen.append(boost.service)
+                excluded.add(boost.service_id)
+                self._served[boost.pk] += 1
+                self._pending[boost.pk] += 1
+            due = (
+                sum(self._pending.values()) >= FLUSH_IMPRESSIONS
+                or time.monotonic() - self._flushed_at >= FLUSH_SECONDS
+            )
+        if due:
+            self.flush()
+        return chosen
+
+    def flush(self):
+        """Write the impressions counted so far, one UPDATE per distinct count."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        by_count = defaultdict(list)
+        for pk, count in pending.items():
+            by_count[count].append(pk)
+        try:
+            # Straight to the primary, past ReplicaRouter: an impression isn't
+            # a write of the visitor's, and mustn't pin them to the primary.
+            with transaction.atomic(using='default'):
+                for count, pks in by_count.items():
+                    Boost.objects.using('default').filter(pk__in=pks).update(
+                        impressions=F('impressions') + count
+                    )
+        except DatabaseError:
+            logger.exception("Couldn't write %d boost impressions; keeping them for the next flush",
+                             sum(pending.values()))
+            with self._lock:
+                self._pending.update(pending)
+
+
+placements = BoostPlacer()
+atexit.register(placements.flush)
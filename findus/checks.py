@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(deploy=True)
+def check_session_cache(app_configs, **kwargs):
+    """
+    Cache-backed sessions need a cache every worker shares: with a
+    per-process one, a logout handled by one worker leaves the session
+    signed in on the others.
+    """
+    if settings.SESSION_ENGINE not in ('django.contrib.sessions.backends.cache',
+                                       'django.contrib.sessions.backends.cached_db'):
+        return []
+    backend = settings.CACHES[settings.SESSION_CACHE_ALIAS]['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        f"SESSION_ENGINE {settings.SESSION_ENGINE!r} keeps sessions in a {backend.rsplit('.', 1)[-1]}, "
+        "which isn't shared between processes.",
+        hint="Set REDIS_URL, or use the 'db' session engine.",
+        id='findus.W001',
+    )]
@@ -0,0 +1,85 @@
+import hashlib
+from datetime import datetime
+
+from django.db.models import OuterRef, Subquery
+from django.middleware.csrf import get_token
+from django.template.loader import get_template
+from django.views.decorators.http import condition
+
+from .models import CraftsmanProfile, RelatedService, Review, Service
+
+
+def _latest(queryset, field='updated_at'):
+    """Subquery for the newest `field` in `queryset` (NULL when it's empty)."""
+    return Subquery(queryset.order_by(f'-{field}').values(field)[:1])
+
+
+def service_validators(service_id):
+    """
+    Everything service_detail shows, as one row: the service and its
+    craftsman, the newest review, and for the related list the newest
+    service in the category, the newest neighbour and when the neighbours
+    were built. Rating aggregates and image variants are written with
+    queryset updates, so they're read directly.
+    """
+    neighbours = RelatedService.objects.filter(service=OuterRef('pk'))
+    return Service.objects.filter(pk=service_id).annotate(
+        latest_review=_latest(Review.objects.filter(service=OuterRef('pk'))),
+        latest_related=_latest(Service.objects.filter(
+            category=OuterRef('category'), service_status='Active',
+        )),
+        latest_neighbour=_latest(neighbours, 'related__updated_at'),
+        neighbours_built=_latest(neighbours, 'built_at'),
+    ).values_list(
+        'updated_at', 'craftsman__updated_at', 'latest_review', 'latest_related',
+        'latest_neighbour', 'neighbours_built',
+        'review_count', 'avg_rating', 'image_variants', 'craftsman__photo_variants',
+    ).first()
+
+
+def craftsman_validators(craftsman_id):
+    """The same for craftsman_public_profile: the profile, its services and their reviews."""
+    return CraftsmanProfile.objects.filter(pk=craftsman_id).annotate(
+        latest_service=_latest(Service.objects.filter(craftsman=OuterRef('pk'))),
+        latest_review=_latest(Review.objects.filter(service__craftsman=OuterRef('pk'))),
+    ).values_list(
+        'updated_at', 'latest_service', 'latest_review',
+        'review_count', 'avg_rating', 'photo_variants',
+    ).first()
+
+
+def conditional_page(template_name, validators):
+    """
+    Answer If-None-Match / If-Modified-Since with a 304 before the view runs.
+
+    `validators(**view_kwargs)` returns a row whose datetimes give
+    Last-Modified and whose values (with the user, their CSRF secret and
+    the template source) give the ETag, or None to let the view handle the request as usual.
+    The row is fetched once per request.
+    """
+    def _row(request, **kwargs):
+        if not hasattr(request, '_conditional_row'):
+            request._conditional_row = validators(**kwargs)
+        return request._conditional_row
+
+    def etag(request, *args, **kwargs):
+        row = _row(request, **kwargs)
+        if row is None:
+            return None
+        # Pages differ per user (review form, nav) and carry their CSRF token,
+        # which login rotates; a template change has to reach clients that
+        # still hold the old page.
+        get_token(request)
+        source = get_template(template_name).template.source
+        version = repr((
+            row, request.user.pk, request.META['CSRF_COOKIE'], hashlib.md5(source.encode()).hexdigest(),
+        ))
+        return hashlib.md5(version.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        row = _row(request, **kwargs)
+        if row is None:
+            return None
+        return max((value for value in row if isinstance(value, datetime)), default=None)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
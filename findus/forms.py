@@ -203,14 +203,7 @@ class ServiceForm(forms.ModelForm):
         ('project', 'Multi-day Project'),
     ]
     
-    SERVICE_FEATURES = [
-        ('emergency', '24/7 Emergency Service'),
-        ('warranty', 'Service Warranty Included'),
-        ('licensed', 'Fully Licensed'),
-        ('insured', 'Insured & Bonded'),
-        ('free_estimate', 'Free Estimate'),
-        ('senior_discount', 'Senior Discount'),
-    ]
+    SERVICE_FEATURES = Service.FEATURE_CHOICES
     
     availability = forms.ChoiceField(
         choices=AVAILABILITY_CHOICES,
@@ -0,0 +1,205 @@
+import csv
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.db import models
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+from .models import CraftsmanProfile, Location, location_slug
+
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+# Grid buckets are GRID_SIZE degrees on a side (~11 km at the equator).
+# A radius query only looks at craftsmen in the cells its bounding box
+# touches; past MAX_GRID_CELLS cells the lat/lng range filter alone is cheaper.
+GRID_SIZE = 0.1
+GRID_COLUMNS = int(360 / GRID_SIZE)
+MAX_GRID_CELLS = 400
+
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 500
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """
+    Read the bundled gazetteer into lookup tables keyed by normalized names:
+    postal code prefixes, (city, state) pairs, city names and state names.
+    """
+    gazetteer = {'postal': {}, 'city': {}, 'city_name': {}, 'state': {}}
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            point = (float(row['latitude']), float(row['longitude']))
+            name, state = location_slug(row['name']), location_slug(row['state'])
+            if row['kind'] == 'postal':
+                gazetteer['postal'][row['name']] = point
+            elif row['kind'] == 'city':
+                gazetteer['city'][(name, state)] = point
+                gazetteer['city_name'].setdefault(name, point)
+            elif row['kind'] == 'state':
+                gazetteer['state'][name] = point
+    return gazetteer
+
+
+def geocode(city='', state='', postal_code=''):
+    """
+    Offline geocoding against the gazetteer, most specific match first:
+    city within state, postal code prefix, city name alone, then state.
+    Returns (latitude, longitude) or None.
+    """
+    gazetteer = load_gazetteer()
+    city, state = location_slug(city), location_slug(state)
+
+    if (city, state) in gazetteer['city']:
+        return gazetteer['city'][(city, state)]
+
+    digits = re.sub(r'\D', '', postal_code or '')
+    for length in range(len(digits), 2, -1):
+        if digits[:length] in gazetteer['postal']:
+            return gazetteer['postal'][digits[:length]]
+
+    if city in gazetteer['city_name']:
+        return gazetteer['city_name'][city]
+    return gazetteer['state'].get(state)
+
+
+def geocode_craftsman(craftsman):
+    """Geocode a profile, preferring the canonical names of its resolved Location."""
+    city, state = craftsman.city, craftsman.state
+    location = craftsman.location
+    if location is not None:
+        if location.kind == 'city':
+            city = location.name
+            state = location.parent.name if location.parent_id else state
+        else:
+            state = location.name
+    return geocode(city, state, craftsman.postal_code)
+
+
+def resolve_point(text):
+    """
+    Turn the dashboard's `near` parameter into coordinates. Accepts
+    "lat,lng" or any place name the Location aliases or gazetteer know.
+    """
+    text = (text or '').strip()
+    match = re.fullmatch(r'(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)', text)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+        return None
+
+    location = Location.objects.select_related('parent').resolve_search(text)
+    if location is not None:
+        if location.kind == 'city' and location.parent_id:
+            return geocode(location.name, location.parent.name)
+        return geocode(state=location.name)
+    return geocode(city=text)
+
+
+def grid_cell(latitude, longitude):
+    row = int(math.floor((latitude + 90) / GRID_SIZE))
+    column = int(math.floor((longitude + 180) / GRID_SIZE)) % GRID_COLUMNS
+    return row * GRID_COLUMNS + column
+
+
+def bounding_box(latitude, longitude, radius_km):
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return (
+        max(latitude - lat_delta, -90), min(latitude + lat_delta, 90),
+        longitude - lng_delta, longitude + lng_delta,
+    )
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Grid cells touched by the radius' bounding box, or None if there are too many."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    first_row = int(math.floor((min_lat + 90) / GRID_SIZE))
+    last_row = int(math.floor((max_lat + 90) / GRID_SIZE))
+    first_column = int(math.floor((min_lng + 180) / GRID_SIZE))
+    last_column = int(math.floor((max_lng + 180) / GRID_SIZE))
+    if (last_row - first_row + 1) * (last_column - first_column + 1) > MAX_GRID_CELLS:
+        return None
+    return [
+        row * GRID_COLUMNS + column % GRID_COLUMNS
+        for row in range(first_row, last_row + 1)
+        for column in range(first_column, last_column + 1)
+    ]
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def haversine_expression(latitude, longitude, lat_field, lng_field):
+    """Great-circle distance in km from a fixed point to the given coordinate fields."""
+    lat1 = math.radians(latitude)
+    lat2 = Radians(lat_field)
+    half_dlat = (lat2 - models.Value(lat1)) / 2
+    half_dlng = (Radians(lng_field) - models.Value(math.radians(longitude))) / 2
+    a = Power(Sin(half_dlat), 2) + math.cos(lat1) * Cos(lat2) * Power(Sin(half_dlng), 2)
+    return models.ExpressionWrapper(
+        2 * EARTH_RADIUS_KM * ASin(Sqrt(a)),
+        output_field=models.FloatField(),
+    )
+
+
+def craftsmen_within(latitude, longitude, radius_km):
+    """
+    Candidate craftsmen for a radius query, pruned by grid cell and bounding
+    box so the exact distance is only computed for nearby rows.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    craftsmen = CraftsmanProfile.objects.filter(
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    )
+    cells = covering_cells(latitude, longitude, radius_km)
+    if cells is not None:
+        craftsmen = craftsmen.filter(geo_cell__in=cells)
+    return craftsmen
+
+
+def filter_services_near(services, latitude, longitude, radius_km):
+    """Services whose craftsman is within radius_km, annotated with distance_km."""
+    return services.filter(
+        craftsman_id__in=craftsmen_within(latitude, longitude, radius_km).values('id')
+    ).annotate(
+        distance_km=haversine_expression(
+            latitude, longitude, 'craftsman__latitude', 'craftsman__longitude'
+        )
+    ).filter(distance_km__lte=radius_km)
+
+
+def backfill_coordinates(only_missing=True, batch_size=500):
+    """Geocode craftsman profiles in primary-key batches. Returns the number geocoded."""
+    craftsmen = CraftsmanProfile.objects.select_related('location__parent').order_by('pk')
+    if only_missing:
+        craftsmen = craftsmen.filter(latitude__isnull=True)
+
+    geocoded = 0
+    last_pk = 0
+    while True:
+        batch = list(craftsmen.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return geocoded
+        last_pk = batch[-1].pk
+
+        located = []
+        for craftsman in batch:
+            point = geocode_craftsman(craftsman)
+            if point is not None:
+                craftsman.latitude, craftsman.longitude = point
+                craftsman.geo_cell = grid_cell(*point)
+                located.append(craftsman)
+        CraftsmanProfile.objects.bulk_update(located, ['latitude', 'longitude', 'geo_cell'])
+        geocoded += len(located)
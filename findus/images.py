@@ -0,0 +1,137 @@
+import io
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import CraftsmanProfile, Service
+
+
+logger = logging.getLogger(__name__)
+
+# Target widths in px. Images are never upscaled, so a variant can come out
+# narrower than its nominal width.
+VARIANT_WIDTHS = {'avatar': 160, 'card': 640, 'detail': 1200}
+VARIANT_DIR = 'variants'
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# model: (image field, variants field, variant names)
+IMAGE_FIELDS = {
+    Service: ('image', 'image_variants', ['card', 'detail']),
+    CraftsmanProfile: ('profile_photo', 'photo_variants', ['avatar', 'card']),
+}
+
+
+def _encode(image, format_name):
+    pil_format, options = FORMATS[format_name]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buffer = io.BytesIO()
+    # Nothing from the original's info (EXIF, GPS, ICC) is passed on.
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(field_file, names):
+    """
+    Write resized WebP and JPEG copies of `field_file` for each variant name
+    and return the record stored on the model:
+
+        {'source': <original name>,
+         'card': {'width': 640, 'height': 480, 'webp': <name>, 'jpeg': <name>}, ...}
+    """
+    storage = field_file.storage
+    with field_file.open('rb') as f:
+        with Image.open(f) as original:
+            # Bake the EXIF orientation into the pixels before it is dropped.
+            image = ImageOps.exif_transpose(original)
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    stem = posixpath.splitext(field_file.name)[0]
+    variants = {'source': field_file.name}
+    for name in names:
+        width = min(VARIANT_WIDTHS[name], image.width)
+        height = max(round(image.height * width / image.width), 1)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+
+        variant = {'width': width, 'height': height}
+        for format_name in FORMATS:
+            path = posixpath.join(VARIANT_DIR, f'{stem}-{name}.{format_name}')
+            if storage.exists(path):
+                storage.delete(path)
+            variant[format_name] = storage.save(path, ContentFile(_encode(resized, format_name)))
+        variants[name] = variant
+    return variants
+
+
+def delete_variants(variants, storage, keep=()):
+    for name, variant in variants.items():
+        if name == 'source':
+            continue
+        for format_name in FORMATS:
+            path = variant.get(format_name)
+            if path and path not in keep and storage.exists(path):
+                storage.delete(path)
+
+
+def variants_out_of_date(instance):
+    field, variants_field, _ = IMAGE_FIELDS[type(instance)]
+    field_file = getattr(instance, field)
+    current = getattr(instance, variants_field) or {}
+    return current.get('source') != (field_file.name if field_file else None)
+
+
+def refresh_variants(instance, force=False):
+    """
+    Bring the stored variants of a Service or CraftsmanProfile in line with
+    its current image. Returns True if they changed.
+    """
+    field, variants_field, names = IMAGE_FIELDS[type(instance)]
+    field_file = getattr(instance, field)
+    current = getattr(instance, variants_field) or {}
+
+    if not force and not variants_out_of_date(instance):
+        return False
+    if not field_file:
+        variants = {}
+    else:
+        try:
+            variants = build_variants(field_file, names)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            # Missing or unreadable file: templates fall back to the original.
+            logger.warning("Could not build image variants for %s: %s", field_file.name, e)
+            variants = {}
+
+    if variants == current:
+        return False
+    kept = {
+        variant[format_name]
+        for name, variant in variants.items() if name != 'source'
+        for format_name in FORMATS
+    }
+    delete_variants(current, field_file.storage, keep=kept)
+    setattr(instance, variants_field, variants)
+    type(instance).objects.filter(pk=instance.pk).update(**{variants_field: variants})
+    return True
+
+
+def backfill_variants(force=False, batch_size=100):
+    """Process every stored image, in primary-key batches. Returns the number of records updated."""
+    updated = 0
+    for model, (field, _, _) in IMAGE_FIELDS.items():
+        records = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).order_by('pk')
+        last_pk = 0
+        while True:
+            batch = list(records.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            updated += sum(refresh_variants(record, force=force) for record in batch)
+    return updated
@@ -0,0 +1,135 @@
+import functools
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+from importlib import import_module
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = timedelta(seconds=30)   # doubled after every failed attempt
+STALE_AFTER = timedelta(minutes=15)   # a running job older than this lost its worker
+
+REGISTRY = {}
+
+
+def job(func=None, *, max_attempts=3):
+    """
+    Register a function as a job. `func.delay(*args, **kwargs)` queues a
+    call for the worker; arguments must be JSON serializable, so pass ids
+    rather than model instances.
+    """
+    if func is None:
+        return functools.partial(job, max_attempts=max_attempts)
+
+    name = f'{func.__module__}.{func.__qualname__}'
+    REGISTRY[name] = func
+    func.job_name = name
+    func.max_attempts = max_attempts
+    func.delay = functools.partial(enqueue, func)
+    return func
+
+
+def enqueue(func, *args, run_at=None, **kwargs):
+    """Queue `func` (a registered job) to run as soon as a worker is free, or at run_at."""
+    return Job.objects.create(
+        name=func.job_name,
+        args=list(args),
+        kwargs=kwargs,
+        max_attempts=func.max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def resolve(name):
+    if name not in REGISTRY:
+        # Importing the module registers its jobs.
+        try:
+            import_module(name.rsplit('.', 1)[0])
+        except ImportError:
+            pass
+    if name not in REGISTRY:
+        raise LookupError(f"No job registered as {name!r}")
+    return REGISTRY[name]
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def requeue_stale():
+    """
+    Put back jobs whose worker died mid-run; they count the attempt they
+    lost, so a job that keeps killing its worker is marked failed once it
+    has used up its attempts. Returns the number put back.
+    """
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=timezone.now() - STALE_AFTER)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_at=None, locked_by='',
+        last_error="The worker running it stopped before it finished.",
+    )
+    if failed:
+        logger.error("%s stale job(s) out of attempts, marked failed", failed)
+    return stale.update(status=Job.QUEUED, locked_at=None, locked_by='')
+
+
+def claim(limit, worker=None):
+    """
+    Claim up to `limit` due jobs for this worker. Each claim is a conditional
+    UPDATE, so workers on other threads, processes or hosts never run the
+    same job twice; no row locking support is needed from the database.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now,
+    ).order_by('run_at', 'pk').values_list('pk', flat=True)[:limit]
+
+    claimed = []
+    for pk in candidates:
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_at=now, locked_by=worker or worker_id(),
+            attempts=F('attempts') + 1,
+        ):
+            claimed.append(pk)
+    return claimed
+
+
+def run(pk):
+    """Run a claimed job, then delete it, schedule a retry or mark it failed."""
+    job = Job.objects.get(pk=pk)
+    try:
+        resolve(job.name)(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception("Job %s failed (attempt %s/%s)", job, job.attempts, job.max_attempts)
+        job.last_error = traceback.format_exc()
+        job.locked_at, job.locked_by = None, ''
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+        else:
+            job.status = Job.FAILED
+        job.save(update_fields=['status', 'run_at', 'last_error', 'locked_at', 'locked_by'])
+        return False
+    else:
+        job.delete()
+        return True
+
+
+def run_pending(limit=None):
+    """Run every due job in this thread, oldest first. Returns the number that succeeded."""
+    succeeded = 0
+    ran = 0
+    while limit is None or ran < limit:
+        claimed = claim(1)
+        if not claimed:
+            break
+        ran += 1
+        succeeded += run(claimed[0])
+    return succeeded
@@ -0,0 +1,159 @@
+import hashlib
+import random
+import time
+
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+from .models import Service
+from .pagination import KeysetPage, KeysetPaginator
+from .search import filter_services, listing_queryset, price_field_for, sort_services
+
+
+# Off unless it's Redis; see CACHES in settings.
+cache = ConnectionProxy(caches, 'results')
+
+# Query parameters that decide which services customer_dashboard lists and
+# in what order. Anything else in the querystring doesn't split the cache.
+LISTING_PARAMS = [
+    'q', 'category', 'price_type', 'location', 'near', 'distance', 'availability',
+    'job_size', 'min_price', 'max_price', 'include_travel_fee', 'features',
+    'features_match', 'materials_included', 'sort', 'cursor',
+]
+MULTI_VALUE_PARAMS = {'features'}
+# Not location or near: a capitalised two-letter code is a state, in
+# lower case it's free text (see models.search_slug).
+CASE_INSENSITIVE_PARAMS = {'q'}
+
+RESULT_CACHE_TIMEOUT = 300
+ALL_CATEGORIES = '*'
+HITS_KEY = 'findus:listing:hits'
+MISSES_KEY = 'findus:listing:misses'
+# Share of lookups that update the hit/miss counters, each counting for
+# 1 / STATS_SAMPLE: a counter write on every request would cost more than
+# the hit saves when the cache is the database.
+STATS_SAMPLE = 0.01
+
+
+def normalize_params(params):
+    """The listing parameters in `params` (a QueryDict) as a canonical, hashable tuple."""
+    normalized = []
+    for name in LISTING_PARAMS:
+        values = params.getlist(name) if name in MULTI_VALUE_PARAMS else [params.get(name, '')]
+        values = {' '.join(value.split()) for value in values} - {''}
+        if name in CASE_INSENSITIVE_PARAMS:
+            values = {value.lower() for value in values}
+        if values:
+            normalized.append((name, tuple(sorted(values))))
+    return tuple(normalized)
+
+
+def _version_key(category):
+    return f'findus:listing:version:{category}'
+
+
+def slice_version(category):
+    # Seeded from the clock so a counter that was evicted never comes back
+    # at a value some stale entry was stored under.
+    return cache.get_or_set(_version_key(category), time.time_ns, None)
+
+
+def invalidate_listings(categories=None):
+    """
+    Drop cached pages for the given categories (all of them with None).
+    Pages without a category filter are keyed on their own counter, which
+    every invalidation bumps.
+    """
+    if categories is None:
+        categories = [value for value, _ in Service.CATEGORY_CHOICES]
+    for category in {*categories, ALL_CATEGORIES}:
+        try:
+            cache.incr(_version_key(category))
+        except ValueError:
+            cache.set(_version_key(category), time.time_ns(), None)
+
+
+def _count(key):
+    if random.random() >= STATS_SAMPLE:
+        return
+    weight = round(1 / STATS_SAMPLE)
+    try:
+        cache.incr(key, weight)
+    except ValueError:
+        cache.add(key, weight, None)
+
+
+def cache_stats():
+    """Estimated hits and misses of the result cache, from the sampled counters."""
+    hits, misses = cache.get(HITS_KEY, 0), cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 3) if lookups else None,
+    }
+
+
+def _cache_keys(params, per_page):
+    """The keys of the page for `params`, and of the total it shares with the other pages."""
+    version = slice_version(params.get('category') or ALL_CATEGORIES)
+    normalized = normalize_params(params)
+    listing = tuple(param for param in normalized if param[0] != 'cursor')
+    page_digest = hashlib.md5(repr((normalized, per_page)).encode()).hexdigest()
+    count_digest = hashlib.md5(repr(listing).encode()).hexdigest()
+    return f'findus:listing:{version}:{page_digest}', f'findus:listing:{version}:count:{count_digest}'
+
+
+def dashboard_page(params, per_page):
+    """
+    The customer_dashboard page for `params`. The ordered service ids and
+    the page cursors are cached per normalized parameter set, and the total
+    once for all the pages of a listing, so a repeat request costs one
+    id IN (...) fetch instead of the full query, and a new page no COUNT(*).
+    """
+    key, count_key = _cache_keys(params, per_page)
+    entry = cache.get(key)
+    if entry is not None:
+        _count(HITS_KEY)
+        return _restore_page(entry, per_page)
+
+    _count(MISSES_KEY)
+    services = filter_services(listing_queryset(), params)
+    services = sort_services(services, params.get('sort', ''), price_field_for(params))
+    # The count is cached here, under the same version as the pages.
+    count = cache.get(count_key)
+    paginator = KeysetPaginator(services, per_page, cache_count=False, count=count)
+    page = paginator.get_page(params.get('cursor'))
+    if count is None:
+        cache.set(count_key, paginator.count, RESULT_CACHE_TIMEOUT)
+    cache.set(key, {
+        'ids': [service.pk for service in page],
+        'distances': [getattr(service, 'distance_km', None) for service in page],
+        'count': paginator.count,
+        'position': page.position,
+        'has_previous': page.has_previous(),
+        'has_next': page.has_next(),
+        'next_token': page.next_token,
+        'previous_token': page.previous_token,
+    }, RESULT_CACHE_TIMEOUT)
+    return page
+
+
+def _restore_page(entry, per_page):
+    services = listing_queryset().filter(pk__in=entry['ids'])
+    by_id = {service.pk: service for service in services}
+
+    rows = []
+    for pk, distance_km in zip(entry['ids'], entry['distances']):
+        if pk in by_id:
+            if distance_km is not None:
+                by_id[pk].distance_km = distance_km
+            rows.append(by_id[pk])
+
+    paginator = KeysetPaginator(services, per_page, cache_count=False)
+    paginator.count = entry['count']
+    page = KeysetPage(paginator, rows, entry['position'],
+                      has_previous=entry['has_previous'], has_next=entry['has_next'])
+    page.next_token = entry['next_token']
+    page.previous_token = entry['previous_token']
+    return page
@@ -0,0 +1,80 @@
+from django.db import transaction
+
+from .models import CraftsmanProfile, Location, LocationAlias, location_slug
+
+
+# Canonical state names with the aliases people actually type or that
+# reverse geocoders return ("Lagos State", "LA", "Abuja" ...). The canonical
+# name itself and its "<name> State" form are always aliases.
+STATES = {
+    'Abia': ['AB'],
+    'Adamawa': ['AD'],
+    'Akwa Ibom': ['AK', 'Akwa-Ibom'],
+    'Anambra': ['AN'],
+    'Bauchi': ['BA'],
+    'Bayelsa': ['BY'],
+    'Benue': ['BE'],
+    'Borno': ['BO'],
+    'Cross River': ['CR'],
+    'Delta': ['DE'],
+    'Ebonyi': ['EB'],
+    'Edo': ['ED'],
+    'Ekiti': ['EK'],
+    'Enugu': ['EN'],
+    'Federal Capital Territory': ['FC', 'FCT', 'Abuja', 'FCT Abuja', 'Abuja FCT'],
+    'Gombe': ['GO'],
+    'Imo': ['IM'],
+    'Jigawa': ['JI'],
+    'Kaduna': ['KD'],
+    'Kano': ['KN'],
+    'Katsina': ['KT'],
+    'Kebbi': ['KE'],
+    'Kogi': ['KO'],
+    'Kwara': ['KW'],
+    'Lagos': ['LA', 'Lasgidi', 'Eko'],
+    'Nasarawa': ['NA', 'Nassarawa'],
+    'Niger': ['NI'],
+    'Ogun': ['OG'],
+    'Ondo': ['ON'],
+    'Osun': ['OS'],
+    'Oyo': ['OY'],
+    'Plateau': ['PL'],
+    'Rivers': ['RI'],
+    'Sokoto': ['SO'],
+    'Taraba': ['TA'],
+    'Yobe': ['YO'],
+    'Zamfara': ['ZA'],
+}
+
+
+def seed_states():
+    """Create every canonical state and its aliases. Safe to run repeatedly."""
+    with transaction.atomic():
+        for name, aliases in STATES.items():
+            slug = location_slug(name)
+            state, _ = Location.objects.get_or_create(
+                kind='state', parent=None, slug=slug, defaults={'name': name}
+            )
+            for alias in [name] + aliases:
+                LocationAlias.objects.get_or_create(
+                    alias=location_slug(alias), defaults={'location': state}
+                )
+
+
+def backfill_craftsman_locations(only_missing=True):
+    """
+    Resolve CraftsmanProfile.city/state into Location rows. Distinct
+    (city, state) pairs are resolved once each and applied with one UPDATE
+    per pair. Returns the number of profiles updated.
+    """
+    craftsmen = CraftsmanProfile.objects.all()
+    if only_missing:
+        craftsmen = craftsmen.filter(location__isnull=True)
+
+    updated = 0
+    pairs = list(craftsmen.values_list('city', 'state').distinct().order_by())
+    for city, state in pairs:
+        with transaction.atomic():
+            location = Location.objects.for_address(city, state)
+            updated += craftsmen.filter(city=city, state=state).update(location=location)
+    return updated
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from findus.listing_cache import invalidate_listings
+from findus.locations import backfill_craftsman_locations, seed_states
+
+
+class Command(BaseCommand):
+    help = "Seed canonical states and link craftsman profiles to normalized locations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help="Re-resolve every profile, not only those without a location.",
+        )
+
+    def handle(self, *args, **options):
+        seed_states()
+        updated = backfill_craftsman_locations(only_missing=not options['all'])
+        invalidate_listings()
+        self.stdout.write(self.style.SUCCESS(f"Linked {updated} craftsman profile(s) to locations."))
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from findus.models import Service, feature_masks
+
+
+def json_filter(features, match_all):
+    """The features filter as a scan over the JSON list, for comparison."""
+    if connection.vendor == 'sqlite':
+        placeholders = ', '.join(['%s'] * len(features))
+        matched = (
+            f'SELECT COUNT(DISTINCT value) FROM json_each("findus_service"."features") '
+            f'WHERE value IN ({placeholders})'
+        )
+        threshold = len(set(features)) if match_all else 1
+        return Q(pk__in=RawSQL(
+            f'SELECT id FROM findus_service WHERE ({matched}) >= %s',
+            [*features, threshold],
+        ))
+    if match_all:
+        return Q(features__has_keys=features)
+    return Q(features__has_any_keys=features)
+
+
+class Command(BaseCommand):
+    help = "Time the dashboard features filter on the feature_mask index against the JSON list"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50, help="Runs per query (default 50).")
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        if repeat < 1:
+            raise CommandError("--repeat must be at least 1.")
+
+        values = [value for value, _ in Service.FEATURE_CHOICES]
+        cases = [([value], False) for value in values]
+        cases += [(values, False), (values[:2], True), (values[:3], True)]
+
+        self.stdout.write(f"{Service.objects.count()} services, {repeat} runs per query")
+        self.stdout.write(f"{'filter':<48} {'rows':>6} {'json ms':>9} {'mask ms':>9} {'speedup':>8}")
+        for features, match_all in cases:
+            mask_query = Service.objects.filter(
+                feature_mask__in=feature_masks(features, match_all)
+            ).order_by('-created_at').values_list('pk', flat=True)
+            json_query = Service.objects.filter(
+                json_filter(features, match_all)
+            ).order_by('-created_at').values_list('pk', flat=True)
+
+            json_rows, json_ms = self.time(json_query, repeat)
+            mask_rows, mask_ms = self.time(mask_query, repeat)
+            if set(json_rows) != set(mask_rows):
+                raise CommandError(f"Results differ for {features}: is feature_mask backfilled?")
+
+            label = ('all of ' if match_all else 'any of ') + ', '.join(features)
+            self.stdout.write(
+                f"{label[:48]:<48} {len(mask_rows):>6} {json_ms:>9.3f} {mask_ms:>9.3f} "
+                f"{json_ms / mask_ms if mask_ms else 0:>7.1f}x"
+            )
+
+    def time(self, queryset, repeat):
+        rows = list(queryset)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(queryset.all())
+        return rows, (time.perf_counter() - start) * 1000 / repeat
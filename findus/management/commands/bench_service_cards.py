@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+
+from findus.search import listing_queryset
+from findus.templatetags.service_cards import CARD_TEMPLATES, load_card_template
+
+
+LOOP = "{% load service_cards %}{% for service in services %}{% service_card service layout %}{% endfor %}"
+
+
+class Command(BaseCommand):
+    help = "Time rendering a page of service cards from scratch against the card fragment cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=9, help="Cards per page (default 9, the dashboard's).")
+        parser.add_argument('--repeat', type=int, default=200, help="Renders per layout (default 200).")
+
+    def handle(self, *args, **options):
+        if options['cards'] < 1 or options['repeat'] < 1:
+            raise CommandError("--cards and --repeat must be at least 1.")
+
+        services = list(listing_queryset().order_by('-created_at')[:options['cards']])
+        if not services:
+            raise CommandError("No services to render.")
+        loop = engines['django'].from_string(LOOP)
+
+        self.stdout.write(f"{len(services)} cards, {options['repeat']} renders per layout")
+        self.stdout.write(f"{'layout':<10} {'render ms':>10} {'cached ms':>10} {'speedup':>8}")
+        for layout in CARD_TEMPLATES:
+            card_template, _ = load_card_template(layout)
+
+            def render_each():
+                return ''.join(
+                    card_template.render({'service': service, 'distance_km': None})
+                    for service in services
+                )
+
+            def render_cached():
+                return loop.render({'services': services, 'layout': layout})
+
+            if render_cached() != render_each():
+                raise CommandError(f"Cached {layout} cards differ from a fresh render.")
+            render_ms = self.time(render_each, options['repeat'])
+            cached_ms = self.time(render_cached, options['repeat'])
+            self.stdout.write(
+                f"{layout:<10} {render_ms:>10.3f} {cached_ms:>10.3f} "
+                f"{render_ms / cached_ms if cached_ms else 0:>7.1f}x"
+            )
+
+    def time(self, render, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            render()
+        return (time.perf_counter() - start) * 1000 / repeat
@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from findus.models import CustomerProfile, SavedService, Service
+from handyman_project.sqlite3.base import PRAGMAS
+
+
+# SQLite's own defaults plus the 5 s busy timeout of Python's sqlite3, which
+# is what django.db.backends.sqlite3 runs with.
+CONFIGS = {
+    'default': ({'busy_timeout': 5000, 'journal_mode': 'DELETE', 'synchronous': 'FULL'}, 'DEFERRED'),
+    # WAL is set once per database (migration 0027), not per connection.
+    'tuned': ({**PRAGMAS, 'journal_mode': 'WAL'}, 'IMMEDIATE'),
+}
+
+# A listing page, as customer_dashboard queries it.
+READ_SQL = (
+    f'SELECT s.*, c.business_name FROM {Service._meta.db_table} s '
+    f'JOIN findus_craftsmanprofile c ON c.id = s.craftsman_id '
+    f"WHERE s.service_status = 'Active' AND s.category = ? ORDER BY s.created_at DESC LIMIT 10"
+)
+# save_service/unsave_service: look, then write, in one transaction.
+TABLE = SavedService._meta.db_table
+EXISTS_SQL = f'SELECT 1 FROM {TABLE} WHERE customer_id = ? AND service_id = ?'
+INSERT_SQL = f"INSERT INTO {TABLE} (customer_id, service_id, created_at) VALUES (?, ?, datetime('now'))"
+DELETE_SQL = f'DELETE FROM {TABLE} WHERE customer_id = ? AND service_id = ?'
+
+
+def run_worker(path, pragmas, begin, seconds, write_share, customers, services, categories, seed):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path, timeout=0, isolation_level=None)
+    for name, value in pragmas.items():
+        if name != 'journal_mode':      # set once on the copy; it's persistent
+            conn.execute(f'PRAGMA {name} = {value}')
+
+    reads = writes = locked = 0
+    write_ms = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if rng.random() >= write_share:
+            conn.execute(READ_SQL, [rng.choice(categories)]).fetchall()
+            reads += 1
+            continue
+        pair = [rng.choice(customers), rng.choice(services)]
+        start = time.perf_counter()
+        try:
+            conn.execute(f'BEGIN {begin}')
+            exists = conn.execute(EXISTS_SQL, pair).fetchone()
+            conn.execute(DELETE_SQL if exists else INSERT_SQL, pair)
+            conn.execute('COMMIT')
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            locked += 1
+        else:
+            writes += 1
+            write_ms.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    return reads, writes, locked, write_ms
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a copy of the database with concurrent listing reads and "
+        "save/unsave writes, with SQLite's default settings and with the "
+        "tuned backend's, and compare throughput and lock errors"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help="Concurrent processes (default 8).")
+        parser.add_argument('--seconds', type=float, default=5, help="Duration per configuration (default 5).")
+        parser.add_argument('--write-share', type=float, default=0.2,
+                            help="Fraction of operations that write (default 0.2).")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed (default 0).")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['seconds'] <= 0 or not 0 <= options['write_share'] <= 1:
+            raise CommandError("Needs --workers >= 1, --seconds > 0 and --write-share between 0 and 1.")
+        connection = connections['default']
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            raise CommandError("Only an on-disk SQLite database can be benchmarked.")
+
+        customers = list(CustomerProfile.objects.values_list('pk', flat=True))
+        services = list(Service.objects.values_list('pk', flat=True))
+        categories = list(Service.objects.values_list('category', flat=True).distinct())
+        if not (customers and services):
+            raise CommandError("Needs customers and services; run seed_findus first.")
+
+        self.stdout.write(
+            f"{options['workers']} workers, {options['seconds']:g} s each, "
+            f"{options['write_share']:.0%} writes, {len(services)} services"
+        )
+        self.stdout.write(f"{'config':<8} {'reads/s':>9} {'writes/s':>9} {'locked':>7} {'write p95 ms':>13}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, (pragmas, begin) in CONFIGS.items():
+                # A fresh copy per run, so one run's journal mode and rows
+                # don't carry over into the next.
+                path = os.path.join(tmp, f'{label}.sqlite3')
+                target = sqlite3.connect(path)
+                connection.ensure_connection()
+                connection.connection.backup(target)
+                target.execute(f"PRAGMA journal_mode = {pragmas['journal_mode']}")
+                target.close()
+
+                args = [
+                    (path, pragmas, begin, options['seconds'], options['write_share'],
+                     customers, services, categories, options['seed'] + worker)
+                    for worker in range(options['workers'])
+                ]
+                with multiprocessing.Pool(options['workers']) as pool:
+                    results = pool.starmap(run_worker, args)
+
+                reads = sum(result[0] for result in results)
+                writes = sum(result[1] for result in results)
+                locked = sum(result[2] for result in results)
+                write_ms = sorted(ms for result in results for ms in result[3])
+                p95 = write_ms[int(len(write_ms) * 0.95)] if write_ms else 0
+                self.stdout.write(
+                    f"{label:<8} {reads / options['seconds']:>9.0f} {writes / options['seconds']:>9.0f} "
+                    f"{locked:>7} {p95:>13.2f}"
+                )
@@ -0,0 +1,176 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from findus.models import CraftsmanProfile, CustomerProfile, Service
+from findus.querycount import QueryRecorder
+
+
+# customer_dashboard filters, one representative value each.
+DASHBOARD_FILTERS = {
+    'search': {'q': 'repair'},
+    'category': {'category': 'plumbing'},
+    'price_type': {'price_type': 'hourly'},
+    'location': {'location': 'Lagos'},
+    'near': {'near': 'Ikeja', 'distance': 25},
+    'availability': {'availability': 'immediate'},
+    'job_size': {'job_size': 'medium'},
+    'price_range': {'min_price': 20, 'max_price': 200},
+    'travel_fee': {'min_price': 20, 'include_travel_fee': 'on'},
+    'features': {'features': ['licensed', 'insured'], 'features_match': 'all'},
+    'materials': {'materials_included': 'on'},
+}
+DASHBOARD_SORTS = ['', 'price_low_high', 'price_high_low', 'rating', 'distance']
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the customer-facing views through the test client and report "
+        "latency percentiles, query counts and peak memory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per URL (default 20).")
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help="Clear the caches before every request. Don't use this against a shared production cache.",
+        )
+        parser.add_argument('--json', metavar='PATH', help="Also write the results as JSON ('-' for stdout).")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        customer = CustomerProfile.objects.annotate(
+            saved=Count('saved_services')
+        ).select_related('user_profile__user').order_by('-saved').first()
+        craftsman = CraftsmanProfile.objects.annotate(
+            services=Count('service')
+        ).order_by('-services').first()
+        service = Service.objects.filter(service_status='Active').order_by('-review_count').first()
+        if not (customer and craftsman and service):
+            raise CommandError("Needs at least one customer, craftsman and service; run seed_findus first.")
+
+        client = Client()
+        client.force_login(customer.user_profile.user)
+        cases = self.cases(service, craftsman)
+        if settings.DEBUG:
+            self.stderr.write("DEBUG is on: timings include its query logging and template debugging.")
+
+        # With --json - stdout carries only the JSON.
+        table = options['json'] != '-'
+        results = []
+        if table:
+            self.stdout.write(
+                f"{'view':<58} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak KiB':>9}"
+            )
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for label, url, revalidate in cases:
+                result = self.bench(client, label, url, revalidate, options)
+                results.append(result)
+                if table:
+                    self.stdout.write(
+                        f"{label[:58]:<58} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                        f"{result['p99_ms']:>8.2f} {result['queries']:>8} {result['peak_kib']:>9.0f}"
+                    )
+
+        if options['json']:
+            report = {
+                'repeat': options['repeat'],
+                'cold': options['cold'],
+                'services': Service.objects.count(),
+                'results': results,
+            }
+            if options['json'] == '-':
+                self.stdout.write(json.dumps(report, indent=2))
+            else:
+                with open(options['json'], 'w') as f:
+                    json.dump(report, f, indent=2)
+
+    def cases(self, service, craftsman):
+        dashboard = reverse('customer_dashboard')
+        filter_sets = [('no filters', {})]
+        filter_sets += [(name, params) for name, params in DASHBOARD_FILTERS.items()]
+        filter_sets.append(('all filters', {
+            key: value for params in DASHBOARD_FILTERS.values() for key, value in params.items()
+        }))
+
+        cases = []
+        for name, params in filter_sets:
+            for sort in DASHBOARD_SORTS:
+                if sort == 'distance' and 'near' not in params:
+                    continue
+                query = urlencode({**params, 'sort': sort} if sort else params, doseq=True)
+                cases.append((f"dashboard {name}{f' sort={sort}' if sort else ''}",
+                              f'{dashboard}?{query}' if query else dashboard, False))
+
+        detail = reverse('service_detail', args=[service.pk])
+        cases += [
+            ('service_detail', detail, False),
+            ('service_detail revalidated (ETag)', detail, True),
+            ('craftsman_public_profile', reverse('craftsman_public_profile', args=[craftsman.pk]), False),
+            ('saved_services', reverse('saved_services'), False),
+        ]
+        return cases
+
+    def bench(self, client, label, url, revalidate, options):
+        headers = {'HTTP_IF_NONE_MATCH': client.get(url).get('ETag', '')} if revalidate else {}
+
+        # Untimed warm-up: imports, template compilation, connection setup.
+        response = client.get(url, **headers)
+        if response.status_code >= 400:
+            raise CommandError(f"{label}: {url} returned {response.status_code}")
+
+        timings = []
+        queries = []
+        for _ in range(options['repeat']):
+            if options['cold']:
+                clear_caches()
+            with QueryRecorder() as recorder:
+                start = time.perf_counter()
+                client.get(url, **headers)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(recorder.count)
+
+        # Memory is measured on a separate request: tracing slows everything down.
+        if options['cold']:
+            clear_caches()
+        tracemalloc.start()
+        try:
+            client.get(url, **headers)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'view': label,
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'queries': max(queries),
+            'peak_kib': round(peak / 1024, 1),
+        }
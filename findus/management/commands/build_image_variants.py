@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from findus.images import backfill_variants
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG variants of service images and craftsman photos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Rebuild every variant, not only those missing or out of date.",
+        )
+
+    def handle(self, *args, **options):
+        updated = backfill_variants(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f"Updated image variants on {updated} record(s)."))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from findus.related import NEIGHBOURS, build_related_services
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute each service's related services from text similarity, "
+        "co-saves and category. Only lists that may have changed since the "
+        "last run are rebuilt, unless --full is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Rebuild every list, e.g. nightly: word weights drift as services are added.",
+        )
+        parser.add_argument(
+            '--neighbours',
+            type=int,
+            default=NEIGHBOURS,
+            help=f"Related services stored per service (default {NEIGHBOURS}).",
+        )
+
+    def handle(self, *args, **options):
+        if options['neighbours'] < 1:
+            raise CommandError("--neighbours must be at least 1.")
+        start = time.perf_counter()
+        rebuilt = build_related_services(full=options['full'], k=options['neighbours'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt related services for {rebuilt} service(s) in {time.perf_counter() - start:.1f}s."
+        ))
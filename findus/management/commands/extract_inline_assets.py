@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import re
+import textwrap
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+BLOCK_RE = re.compile(
+    r'(?P<indent>^[ \t]*)?<(?P<tag>style|script)(?P<attrs>[^>]*)>(?P<body>.*?)</(?P=tag)>',
+    re.DOTALL | re.MULTILINE,
+)
+# Blocks using template tags or variables have to stay in the template.
+TEMPLATE_SYNTAX_RE = re.compile(r'{[%{#]')
+JS_TYPES = ('', 'text/javascript', 'module')
+
+# What a page's second and later blocks are named after: the first class or
+# id a stylesheet styles, or the first element a script looks up.
+SUBJECT_RE = {
+    'style': re.compile(r'^[.#]([\w-]+)', re.MULTILINE),
+    'script': re.compile(r'getElementById\(\s*[\'"]([\w-]+)[\'"]'),
+}
+
+OUTPUT_DIR = 'findus'
+EXTENSIONS = {'style': 'css', 'script': 'js'}
+
+
+def _gzip_size(text):
+    return len(gzip.compress(text.encode(), 9))
+
+
+class Command(BaseCommand):
+    help = (
+        "Move inline <style>/<script> blocks out of the findus templates into "
+        "static bundles and report the bytes each page stops re-sending"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report; don't write bundles or touch templates.",
+        )
+
+    def handle(self, *args, **options):
+        template_dir = Path(apps.get_app_config('findus').path) / 'templates'
+        static_dir = Path(settings.STATICFILES_DIRS[0])
+        templates = {path: path.read_text() for path in sorted(template_dir.glob('*.html'))}
+
+        # First pass: find the blocks, so identical ones on several pages can
+        # share one bundle.
+        users = {}
+        for path, html in templates.items():
+            for match in BLOCK_RE.finditer(html):
+                content = self.extractable(match)
+                if content is not None:
+                    users.setdefault(self.digest(match, content), set()).add(path)
+
+        names = {}
+        bundles = {}
+        self.stdout.write(f"{'template':<32} {'before':>8} {'after':>8} {'saved':>8} {'gzip saved':>11}")
+        for path, html in templates.items():
+            stems = set()
+
+            def replace(match):
+                content = self.extractable(match)
+                if content is None:
+                    return match.group(0)
+                tag = match.group('tag')
+                key = self.digest(match, content)
+                if key not in names:
+                    if len(users[key]) > 1:
+                        stem = f'shared-{key[1][:8]}'
+                    elif (tag, path.stem) not in stems:
+                        stem = path.stem
+                    else:
+                        stem = f'{path.stem}-{self.subject(tag, content, key)}'
+                        if (tag, stem) in stems:
+                            stem = f'{stem}-{key[1][:8]}'
+                    stems.add((tag, stem))
+                    names[key] = f'{OUTPUT_DIR}/{EXTENSIONS[tag]}/{stem}.{EXTENSIONS[tag]}'
+                    bundles[names[key]] = content
+                return self.reference(match, names[key])
+
+            new_html = BLOCK_RE.sub(replace, html)
+            saved = len(html.encode()) - len(new_html.encode())
+            gzip_saved = _gzip_size(html) - _gzip_size(new_html)
+            self.stdout.write(
+                f"{path.name:<32} {len(html.encode()):>8} {len(new_html.encode()):>8} "
+                f"{saved:>8} {gzip_saved:>11}"
+            )
+            templates[path] = new_html
+
+        total = sum(len(content.encode()) for content in bundles.values())
+        self.stdout.write(f"{len(bundles)} bundle(s), {total} bytes, cached by the browser after the first page.")
+        if options['dry_run']:
+            return
+
+        for name, content in bundles.items():
+            target = static_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(content)
+        for path, html in templates.items():
+            path.write_text(html)
+        self.stdout.write(self.style.SUCCESS(
+            "Templates updated. Run collectstatic to hash and compress the bundles."
+        ))
+
+    def extractable(self, match):
+        """The block's content if it can move to a static file, else None."""
+        attrs = match.group('attrs')
+        if match.group('tag') == 'script':
+            type_match = re.search(r'type=["\']([^"\']*)["\']', attrs)
+            if 'src=' in attrs or (type_match and type_match.group(1) not in JS_TYPES):
+                return None
+        body = match.group('body')
+        if TEMPLATE_SYNTAX_RE.search(body) or not body.strip():
+            return None
+        return textwrap.dedent(body.strip('\n')).strip() + '\n'
+
+    def subject(self, tag, content, key):
+        """A name for what the block is about, falling back to its digest."""
+        subject = SUBJECT_RE[tag].search(content)
+        return subject.group(1).lower() if subject else key[1][:8]
+
+    def digest(self, match, content):
+        return match.group('tag'), hashlib.md5(content.encode()).hexdigest()
+
+    def reference(self, match, name):
+        indent = match.group('indent') or ''
+        attrs = match.group('attrs')
+        if match.group('tag') == 'style':
+            attrs = re.sub(r'\s*type=["\']text/css["\']', '', attrs)
+            return f'{indent}<link rel="stylesheet" href="{{% static \'{name}\' %}}"{attrs}>'
+        return f'{indent}<script src="{{% static \'{name}\' %}}"{attrs}></script>'
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from findus.geo import backfill_coordinates
+from findus.listing_cache import invalidate_listings
+
+
+class Command(BaseCommand):
+    help = "Geocode craftsman profiles from the bundled gazetteer (no network access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help="Re-geocode every profile, not only those without coordinates.",
+        )
+
+    def handle(self, *args, **options):
+        geocoded = backfill_coordinates(only_missing=not options['all'])
+        invalidate_listings()
+        self.stdout.write(self.style.SUCCESS(f"Geocoded {geocoded} craftsman profile(s)."))
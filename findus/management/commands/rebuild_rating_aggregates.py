@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from findus.listing_cache import invalidate_listings
+from findus.ratings import refresh_rank_scores, refresh_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Recount avg_rating, review_count and the star histogram on services and craftsmen, and rescore services"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--service',
+            type=int,
+            action='append',
+            dest='service_ids',
+            help="Only rebuild this service (and its craftsman). May be repeated.",
+        )
+        parser.add_argument(
+            '--ranks',
+            action='store_true',
+            help="Only rescore services, for the recency bonus to fade; run it daily.",
+        )
+
+    def handle(self, *args, **options):
+        if options['ranks']:
+            refresh_rank_scores(options['service_ids'])
+            invalidate_listings()
+            self.stdout.write(self.style.SUCCESS("Rank scores refreshed."))
+            return
+        refresh_rating_aggregates(options['service_ids'])
+        invalidate_listings()
+        self.stdout.write(self.style.SUCCESS("Rating aggregates rebuilt."))
@@ -0,0 +1,57 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from findus.listing_cache import invalidate_listings
+from findus.routers import REPLICA
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into the read replica with SQLite's "
+        "online backup API, once or every N seconds"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every',
+            type=float,
+            metavar='SECONDS',
+            help="Keep running and refresh this often, skipping rounds in which nothing was written.",
+        )
+
+    def handle(self, *args, **options):
+        if REPLICA not in settings.DATABASES:
+            raise CommandError("No replica configured; set DJANGO_READ_REPLICA to its path.")
+        primary, replica = settings.DATABASES['default'], settings.DATABASES[REPLICA]
+        if not all(db['ENGINE'].endswith('sqlite3') for db in (primary, replica)):
+            raise CommandError("refresh_replica copies SQLite databases; use your database's own replication.")
+        if options['every'] is not None and options['every'] <= 0:
+            raise CommandError("--every must be positive.")
+
+        source = sqlite3.connect(primary['NAME'], timeout=30)
+        seen = None
+        try:
+            while True:
+                # data_version changes whenever another connection commits.
+                version = source.execute('PRAGMA data_version').fetchone()[0]
+                if version != seen:
+                    start = time.perf_counter()
+                    target = sqlite3.connect(replica['NAME'], timeout=30)
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+                    seen = version
+                    # Listings cached from the old copy are out of date.
+                    invalidate_listings()
+                    self.stdout.write(f"Replica refreshed in {(time.perf_counter() - start) * 1000:.0f} ms.")
+                if options['every'] is None:
+                    break
+                time.sleep(options['every'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            source.close()
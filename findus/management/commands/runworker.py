@@ -0,0 +1,70 @@
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from findus import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (image variants, profile deletion, ...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=2,
+            help="Jobs run at once by this process (default 2). Start more "
+                 "runworker processes to use more cores.",
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when the queue is empty (default 2).",
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Run the jobs that are due now, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1:
+            raise CommandError("--threads must be at least 1.")
+
+        jobs.requeue_stale()
+        if options['once']:
+            succeeded = jobs.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Ran {succeeded} job(s)."))
+            return
+
+        stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stopping.set())
+
+        worker = jobs.worker_id()
+        running = set()
+        self.stdout.write(f"Worker {worker} started with {options['threads']} thread(s).")
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            while not stopping.is_set():
+                running = {future for future in running if not future.done()}
+                free = options['threads'] - len(running)
+                claimed = jobs.claim(free, worker) if free else []
+                for pk in claimed:
+                    running.add(pool.submit(self.run_job, pk))
+                if not claimed:
+                    jobs.requeue_stale()
+                    stopping.wait(options['poll'])
+            self.stdout.write("Stopping; waiting for running jobs to finish.")
+        connection.close()
+
+    def run_job(self, pk):
+        try:
+            jobs.run(pk)
+        finally:
+            # Each pool thread has its own connection; don't leave it open
+            # between jobs.
+            connection.close()
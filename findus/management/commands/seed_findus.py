@@ -0,0 +1,193 @@
+import csv
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from findus.geo import GAZETTEER_PATH, backfill_coordinates
+from findus.listing_cache import invalidate_listings
+from findus.locations import backfill_craftsman_locations, seed_states
+from findus.models import (
+    CraftsmanProfile, CustomerProfile, Review, SavedService, Service, UserProfile,
+)
+from findus.ratings import refresh_rating_aggregates
+
+
+CRAFTSMAN_SHARE = 0.2
+RATING_WEIGHTS = [5, 7, 12, 30, 46]   # 1 to 5 stars; most reviews are good ones
+FEATURE_ODDS = {
+    'emergency': 0.25, 'warranty': 0.4, 'licensed': 0.5,
+    'insured': 0.35, 'free_estimate': 0.45, 'senior_discount': 0.1,
+}
+DURATIONS = ['1 hour', '2 hours', 'Half day', '1 day', '2-3 days', '1 week']
+MAX_AGE_DAYS = 365
+
+
+def zipf_weights(n, exponent=1.1):
+    """Popularity weights: the k-th item is picked about 1/k^exponent as often as the first."""
+    return [1 / (rank ** exponent) for rank in range(1, n + 1)]
+
+
+def batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create synthetic users, craftsmen, services, reviews and saved "
+        "services with realistic skew, for load testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000,
+                            help=f"Users to create; {CRAFTSMAN_SHARE:.0%} become craftsmen (default 1000).")
+        parser.add_argument('--services', type=int, default=3000, help="Services (default 3000).")
+        parser.add_argument('--reviews', type=int, default=20000, help="Reviews to attempt (default 20000).")
+        parser.add_argument('--saved', type=int, default=5000, help="Saved services to attempt (default 5000).")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for repeatable data (default 0).")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows per INSERT (default 500).")
+        parser.add_argument('--prefix', default='seed', help="Username prefix (default 'seed').")
+
+    def handle(self, *args, **options):
+        craftsmen_count = max(int(options['users'] * CRAFTSMAN_SHARE), 1)
+        customers_count = options['users'] - craftsmen_count
+        if customers_count < 1 or options['batch_size'] < 1:
+            raise CommandError("--users must be at least 2 and --batch-size at least 1.")
+        if User.objects.filter(username__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(f"Users named {options['prefix']}-* already exist; pass another --prefix.")
+
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        with open(GAZETTEER_PATH, newline='', encoding='utf-8') as f:
+            self.cities = [(row['name'], row['state']) for row in csv.DictReader(f) if row['kind'] == 'city']
+
+        with transaction.atomic():
+            craftsmen = self.create_craftsmen(options['prefix'], craftsmen_count)
+            customers = self.create_customers(options['prefix'], customers_count)
+            services = self.create_services(craftsmen, options['services'])
+            reviews = self.create_pairs(Review, services, customers, options['reviews'], self.review)
+            saved = self.create_pairs(SavedService, services, customers, options['saved'], SavedService)
+
+        # bulk_create skips the signals that keep these up to date.
+        refresh_rating_aggregates()
+        seed_states()
+        backfill_craftsman_locations()
+        backfill_coordinates()
+        invalidate_listings()
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(craftsmen)} craftsmen, {len(customers)} customers, {len(services)} services, "
+            f"{reviews} reviews and {saved} saved services."
+        ))
+
+    def bulk_create(self, model, objs):
+        created = []
+        for batch in batched(objs, self.batch_size):
+            created += model.objects.bulk_create(batch)
+        return created
+
+    def create_profiles(self, prefix, kind, count):
+        # One unusable password hash for everyone: hashing per user would
+        # dominate the run. Benchmarks log in with force_login().
+        password = make_password(None)
+        users = self.bulk_create(User, [
+            User(username=f'{prefix}-{kind}{n}', password=password,
+                 first_name=kind.title(), last_name=str(n), email=f'{prefix}-{kind}{n}@example.com')
+            for n in range(count)
+        ])
+        return self.bulk_create(UserProfile, [UserProfile(user=user, user_type=kind) for user in users])
+
+    def create_craftsmen(self, prefix, count):
+        categories = [value for value, _ in CraftsmanProfile.SERVICE_CATEGORIES]
+        self.random.shuffle(categories)
+        city_weights = zipf_weights(len(self.cities), 0.9)
+        profiles = []
+        for user_profile in self.create_profiles(prefix, 'craftsman', count):
+            city, state = self.random.choices(self.cities, city_weights)[0]
+            category = self.random.choices(categories, zipf_weights(len(categories)))[0]
+            profiles.append(CraftsmanProfile(
+                user_profile=user_profile,
+                business_name=f'{user_profile.user.last_name} {category.replace("_", " ").title()} Works',
+                service_category=category,
+                services_offered=category.replace('_', ' '),
+                service_area=city,
+                years_of_experience=self.random.choice(['0-1', '1-3', '3-5', '5+']),
+                description='Synthetic craftsman profile.',
+                is_verified=self.random.random() < 0.6,
+                address=f'{self.random.randint(1, 200)} Market Road',
+                city=city,
+                state=state,
+                country='Nigeria',
+                postal_code=str(self.random.randint(100001, 999999)),
+                phone=f'080{self.random.randint(10000000, 99999999)}',
+            ))
+        return self.bulk_create(CraftsmanProfile, profiles)
+
+    def create_customers(self, prefix, count):
+        profiles = []
+        for user_profile in self.create_profiles(prefix, 'customer', count):
+            city, state = self.random.choice(self.cities)
+            profiles.append(CustomerProfile(user_profile=user_profile, city=city, state=state, country='Nigeria'))
+        return self.bulk_create(CustomerProfile, profiles)
+
+    def create_services(self, craftsmen, count):
+        # A few busy craftsmen own most of the listings.
+        owners = self.random.choices(craftsmen, zipf_weights(len(craftsmen), 0.8), k=count)
+        categories = [value for value, _ in Service.CATEGORY_CHOICES]
+        services = []
+        for n, craftsman in enumerate(owners):
+            category = (
+                craftsman.service_category if self.random.random() < 0.8 and craftsman.service_category in categories
+                else self.random.choice(categories)
+            )
+            hourly = self.random.random() < 0.45
+            price = Decimal(f'{self.random.lognormvariate(3.4 if hourly else 5.0, 0.6):.2f}')
+            services.append(Service(
+                craftsman=craftsman,
+                title=f'{category.replace("_", " ").title()} service {n}',
+                category=category,
+                description=f'Synthetic {category.replace("_", " ")} listing for load testing.',
+                price_type='hourly' if hourly else 'fixed',
+                hourly_rate=price if hourly else None,
+                fixed_price=None if hourly else price,
+                estimated_duration=self.random.choice(DURATIONS),
+                min_hours=str(self.random.randint(1, 4)) if hourly else '',
+                availability=self.random.choice([value for value, _ in Service.AVAILABILITY_CHOICES]),
+                job_size=self.random.choice([value for value, _ in Service.SERVICE_SCOPE_CHOICES]),
+                materials_included=self.random.random() < 0.3,
+                travel_fee=Decimal(self.random.randint(5, 40)) if self.random.random() < 0.4 else None,
+                features=[feature for feature, odds in FEATURE_ODDS.items() if self.random.random() < odds],
+                service_status='Active' if self.random.random() < 0.9 else 'Inactive',
+            ))
+        services = self.bulk_create(Service, services)
+
+        # created_at is auto_now_add, so spread it out after the insert.
+        for service in services:
+            service.created_at = self.now - timedelta(seconds=self.random.randint(0, MAX_AGE_DAYS * 86400))
+        for batch in batched(services, self.batch_size):
+            Service.objects.bulk_update(batch, ['created_at'])
+        return services
+
+    def review(self, service, customer):
+        return Review(
+            service=service, customer=customer,
+            rating=self.random.choices(range(1, 6), RATING_WEIGHTS)[0],
+            title='Synthetic review', comment='Generated by seed_findus.',
+        )
+
+    def create_pairs(self, model, services, customers, attempts, build):
+        """Up to `attempts` unique (service, customer) rows; popular services and active customers dominate."""
+        popular = services[:]
+        self.random.shuffle(popular)
+        picked_services = self.random.choices(popular, zipf_weights(len(popular)), k=attempts)
+        picked_customers = self.random.choices(customers, zipf_weights(len(customers), 0.7), k=attempts)
+        pairs = dict.fromkeys(zip(picked_services, picked_customers))
+        return len(self.bulk_create(model, [
+            build(service=service, customer=customer) for service, customer in pairs
+        ]))
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.27 on 2026-10-18 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0013_rating_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['-created_at'], name='service_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', '-created_at'], name='service_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', 'price_type', '-created_at'], name='service_cat_ptype_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', 'availability', '-created_at'], name='service_cat_avail_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', 'job_size', '-created_at'], name='service_cat_size_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['price_type', '-created_at'], name='service_ptype_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['availability', '-created_at'], name='service_avail_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['job_size', '-created_at'], name='service_size_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('materials_included', True)), fields=['-created_at'], name='service_materials_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('service_status', 'Active')), fields=['craftsman', '-created_at'], name='service_active_craftsman_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('service_status', 'Active')), fields=['category', '-created_at'], name='service_active_cat_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.27 on 2026-10-18 17:12
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_prices(apps, schema_editor):
+    Service = apps.get_model('findus', 'Service')
+    effective_price = Coalesce(
+        models.Case(
+            models.When(price_type='hourly', then=models.F('hourly_rate')),
+            models.When(price_type='fixed', then=models.F('fixed_price')),
+        ),
+        models.Value(0),
+        output_field=models.DecimalField(max_digits=8, decimal_places=2),
+    )
+    Service.objects.update(effective_price=effective_price)
+    Service.objects.update(
+        all_in_price=models.ExpressionWrapper(
+            models.F('effective_price') + Coalesce(models.F('travel_fee'), models.Value(0)),
+            output_field=models.DecimalField(max_digits=9, decimal_places=2),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0014_service_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='all_in_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=9),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=8),
+        ),
+        migrations.RunPython(backfill_prices, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', 'effective_price'], name='service_cat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['effective_price'], name='service_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', 'all_in_price'], name='service_cat_allin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['all_in_price'], name='service_allin_idx'),
+        ),
+    ]
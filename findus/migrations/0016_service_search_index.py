@@ -0,0 +1,115 @@
+# Generated by Django 4.2.27 on 2026-10-18 17:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+FTS_ROW = """
+    SELECT s.id, s.title, s.description, c.business_name, c.services_offered
+    FROM findus_service s
+    JOIN findus_craftsmanprofile c ON c.id = s.craftsman_id
+"""
+
+CREATE_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE findus_service_fts USING fts5(
+        title, description, business_name, services_offered,
+        tokenize = 'porter unicode61'
+    )
+    """,
+    # Column weights for bm25(): title, description, business_name, services_offered
+    """
+    INSERT INTO findus_service_fts(findus_service_fts, rank)
+    VALUES ('rank', 'bm25(10.0, 2.0, 5.0, 3.0)')
+    """,
+    f"""
+    INSERT INTO findus_service_fts(rowid, title, description, business_name, services_offered)
+    {FTS_ROW}
+    """,
+    # Triggers. SQLite drops them when it rebuilds findus_service, so later
+    # migrations that alter that table reinstall them (see 0020).
+    f"""
+    CREATE TRIGGER findus_service_fts_insert AFTER INSERT ON findus_service
+    BEGIN
+        INSERT INTO findus_service_fts(rowid, title, description, business_name, services_offered)
+        {FTS_ROW} WHERE s.id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER findus_service_fts_update AFTER UPDATE OF title, description, craftsman_id ON findus_service
+    WHEN old.title IS NOT new.title
+        OR old.description IS NOT new.description
+        OR old.craftsman_id IS NOT new.craftsman_id
+    BEGIN
+        DELETE FROM findus_service_fts WHERE rowid = old.id;
+        INSERT INTO findus_service_fts(rowid, title, description, business_name, services_offered)
+        {FTS_ROW} WHERE s.id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER findus_service_fts_delete AFTER DELETE ON findus_service
+    BEGIN
+        DELETE FROM findus_service_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER findus_craftsman_fts_update
+    AFTER UPDATE OF business_name, services_offered ON findus_craftsmanprofile
+    WHEN old.business_name IS NOT new.business_name
+        OR old.services_offered IS NOT new.services_offered
+    BEGIN
+        UPDATE findus_service_fts
+        SET business_name = new.business_name, services_offered = new.services_offered
+        WHERE rowid IN (SELECT id FROM findus_service WHERE craftsman_id = new.id);
+    END
+    """,
+]
+
+DROP_SEARCH_INDEX = [
+    "DROP TRIGGER IF EXISTS findus_craftsman_fts_update",
+    "DROP TRIGGER IF EXISTS findus_service_fts_delete",
+    "DROP TRIGGER IF EXISTS findus_service_fts_update",
+    "DROP TRIGGER IF EXISTS findus_service_fts_insert",
+    "DROP TABLE IF EXISTS findus_service_fts",
+]
+
+
+def run_on_sqlite(statements):
+    # FTS5 is SQLite only; other backends fall back to icontains search
+    # (see findus.search.search_services).
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0015_service_effective_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceSearchIndex',
+            fields=[
+                ('service', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='findus.service')),
+                ('title', models.TextField()),
+                ('description', models.TextField()),
+                ('business_name', models.TextField()),
+                ('services_offered', models.TextField()),
+                ('match', models.TextField(db_column='findus_service_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'findus_service_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(
+            run_on_sqlite(CREATE_SEARCH_INDEX),
+            run_on_sqlite(DROP_SEARCH_INDEX),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.27 on 2026-10-18 17:15
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Removing the column again rebuilds findus_craftsmanprofile; see 0020 for
+# why the search index triggers have to come down first.
+search_index = import_module('findus.migrations.0016_service_search_index')
+SEARCH_TRIGGERS = search_index.CREATE_SEARCH_INDEX[3:]
+DROP_SEARCH_TRIGGERS = search_index.DROP_SEARCH_INDEX[:4]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0016_service_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('state', 'State'), ('city', 'City')], max_length=10)),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='findus.location')),
+            ],
+            options={
+                'unique_together': {('kind', 'parent', 'slug')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LocationAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.SlugField(max_length=100, unique=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='findus.location')),
+            ],
+        ),
+        migrations.RunPython(
+            search_index.run_on_sqlite(DROP_SEARCH_TRIGGERS),
+            search_index.run_on_sqlite(SEARCH_TRIGGERS),
+        ),
+        migrations.AddField(
+            model_name='craftsmanprofile',
+            name='location',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='craftsmen', to='findus.location'),
+        ),
+        migrations.RunPython(
+            search_index.run_on_sqlite(SEARCH_TRIGGERS),
+            search_index.run_on_sqlite(DROP_SEARCH_TRIGGERS),
+        ),
+    ]
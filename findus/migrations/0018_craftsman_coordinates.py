@@ -0,0 +1,32 @@
+# Generated by Django 4.2.27 on 2026-10-18 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0017_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='craftsmanprofile',
+            name='geo_cell',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='craftsmanprofile',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='craftsmanprofile',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='craftsmanprofile',
+            index=models.Index(fields=['geo_cell', 'latitude', 'longitude'], name='craftsman_geo_cell_idx'),
+        ),
+    ]
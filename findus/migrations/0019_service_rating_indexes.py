@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0018_craftsman_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['-avg_rating'], name='service_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', '-avg_rating'], name='service_cat_rating_idx'),
+        ),
+    ]
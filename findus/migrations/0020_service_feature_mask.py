@@ -0,0 +1,56 @@
+# Generated by Django 4.2.27 on 2026-10-18 17:22
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+# Adding a NOT NULL column makes SQLite rebuild findus_service, which drops
+# its triggers and trips over the craftsman trigger that reads the table,
+# so the search index triggers are taken down and put back around it.
+search_index = import_module('findus.migrations.0016_service_search_index')
+SEARCH_TRIGGERS = search_index.CREATE_SEARCH_INDEX[3:]
+DROP_SEARCH_TRIGGERS = search_index.DROP_SEARCH_INDEX[:4]
+
+
+# Service.FEATURE_CHOICES values as of this migration, in bit order.
+FEATURES = ['emergency', 'warranty', 'licensed', 'insured', 'free_estimate', 'senior_discount']
+
+
+def backfill_feature_masks(apps, schema_editor):
+    Service = apps.get_model('findus', 'Service')
+    bits = {value: 1 << i for i, value in enumerate(FEATURES)}
+    services = []
+    for service in Service.objects.only('id', 'features').iterator():
+        service.feature_mask = sum(bits.get(value, 0) for value in set(service.features or ()))
+        if service.feature_mask:
+            services.append(service)
+    Service.objects.bulk_update(services, ['feature_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0019_service_rating_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_index.run_on_sqlite(DROP_SEARCH_TRIGGERS),
+            search_index.run_on_sqlite(SEARCH_TRIGGERS),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='feature_mask',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_feature_masks, migrations.RunPython.noop),
+        migrations.RunPython(
+            search_index.run_on_sqlite(SEARCH_TRIGGERS),
+            search_index.run_on_sqlite(DROP_SEARCH_TRIGGERS),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['feature_mask', '-created_at'], name='service_features_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.27 on 2026-10-18 17:27
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+# Both tables are rebuilt on SQLite; see 0020 for why the search index
+# triggers have to come down first.
+search_index = import_module('findus.migrations.0016_service_search_index')
+SEARCH_TRIGGERS = search_index.CREATE_SEARCH_INDEX[3:]
+DROP_SEARCH_TRIGGERS = search_index.DROP_SEARCH_INDEX[:4]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0020_service_feature_mask'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_index.run_on_sqlite(DROP_SEARCH_TRIGGERS),
+            search_index.run_on_sqlite(SEARCH_TRIGGERS),
+        ),
+        migrations.AddField(
+            model_name='craftsmanprofile',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(
+            search_index.run_on_sqlite(SEARCH_TRIGGERS),
+            search_index.run_on_sqlite(DROP_SEARCH_TRIGGERS),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.27 on 2026-10-18 18:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0022_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedService',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('built_at', models.DateTimeField()),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_of', to='findus.service')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='findus.service')),
+            ],
+            options={
+                'ordering': ['service', 'rank'],
+                'unique_together': {('service', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.27 on 2026-10-18 18:05
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+# Adding the column rebuilds findus_service; see 0020_service_feature_mask.
+# rank_score is filled in by rebuild_rating_aggregates, which build.sh runs
+# after migrate.
+search_index = import_module('findus.migrations.0016_service_search_index')
+SEARCH_TRIGGERS = search_index.CREATE_SEARCH_INDEX[3:]
+DROP_SEARCH_TRIGGERS = search_index.DROP_SEARCH_INDEX[:4]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0023_related_service'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='service',
+            name='service_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='service',
+            name='service_cat_rating_idx',
+        ),
+        migrations.RunPython(
+            search_index.run_on_sqlite(DROP_SEARCH_TRIGGERS),
+            search_index.run_on_sqlite(SEARCH_TRIGGERS),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rank_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            search_index.run_on_sqlite(SEARCH_TRIGGERS),
+            search_index.run_on_sqlite(DROP_SEARCH_TRIGGERS),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['-rank_score'], name='service_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', '-rank_score'], name='service_cat_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.27 on 2026-10-18 18:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0024_service_rank_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Boost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tier', models.CharField(choices=[('standard', 'Standard'), ('professional', 'Professional'), ('premium', 'Premium')], default='standard', max_length=20)),
+                ('category', models.CharField(blank=True, choices=[('plumbing', 'Plumber'), ('electrical', 'Electrician'), ('ac_technician', 'AC Technician'), ('carpentry', 'Carpenter'), ('tiling', 'Tiler'), ('painting', 'Painter'), ('furniture_maker', 'Furniture Maker'), ('fumigation', 'Fumigator'), ('dstv_technician', 'DSTV Technician'), ('gas_appliance', 'Gas Appliance Technician'), ('pop_worker', 'POP Worker'), ('cleaning', 'Cleaner'), ('aluminium_worker', 'Aluminium Worker'), ('welding', 'Welder'), ('roofing', 'Roof Technician'), ('solar_power', 'Solar Power Technician'), ('masonry', 'Mason'), ('glass_partitioning', 'Glass/Partitioning Worker'), ('bricklayer', 'Bricklayer / Plasterer'), ('foreman', 'Foreman'), ('landscaping', 'Landscaping'), ('appliance_repair', 'Appliance Repair'), ('hvac', 'HVAC Services'), ('security_installation', 'CCTV / Security System Technician'), ('generator_technician', 'Generator Technician'), ('interior_design', 'Interior Designer'), ('flooring', 'Flooring / Epoxy Work'), ('metal_fabrication', 'Metal Fabrication'), ('waterproofing', 'Waterproofing Specialist'), ('pest_control', 'Pest Control'), ('scaffolding', 'Scaffolding Worker'), ('site_supervisor', 'Site Supervisor'), ('other', 'Other')], max_length=50)),
+                ('impression_budget', models.PositiveIntegerField()),
+                ('impressions', models.PositiveIntegerField(default=0, editable=False)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='boosts', to='findus.location')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='boosts', to='findus.service')),
+            ],
+            options={
+                'ordering': ['-starts_at'],
+                'indexes': [models.Index(fields=['ends_at'], name='boost_ends_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.27 on 2026-10-18 18:22
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+# Adding the column rebuilds findus_craftsmanprofile; see 0020 for why the
+# search index triggers have to come down first.
+search_index = import_module('findus.migrations.0016_service_search_index')
+SEARCH_TRIGGERS = search_index.CREATE_SEARCH_INDEX[3:]
+DROP_SEARCH_TRIGGERS = search_index.DROP_SEARCH_INDEX[:4]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findus', '0025_boost'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_index.run_on_sqlite(DROP_SEARCH_TRIGGERS),
+            search_index.run_on_sqlite(SEARCH_TRIGGERS),
+        ),
+        migrations.AddField(
+            model_name='craftsmanprofile',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(
+            search_index.run_on_sqlite(SEARCH_TRIGGERS),
+            search_index.run_on_sqlite(DROP_SEARCH_TRIGGERS),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from importlib import import_module
+
+from django.db import migrations
+
+
+# WAL lets readers carry on while a writer commits. The journal mode is
+# stored in the database file, so it's set once here rather than by the
+# backend on every connection (see handyman_project/sqlite3/base.py).
+# It can't change inside a transaction, hence atomic = False.
+search_index = import_module('findus.migrations.0016_service_search_index')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('findus', '0026_craftsman_is_active'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_index.run_on_sqlite(['PRAGMA journal_mode = WAL']),
+            search_index.run_on_sqlite(['PRAGMA journal_mode = DELETE']),
+        ),
+    ]
@@ -1,5 +1,140 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import Exact
 from django.contrib.auth.models import User
+from django.utils.text import slugify
+
+
+class RatingSummary(models.Model):
+    """
+    Denormalized review statistics, kept in sync by the Review signal
+    handlers in findus.signals and rebuilt by `manage.py rebuild_rating_aggregates`.
+    """
+    avg_rating = models.FloatField(default=0.0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def rating_histogram(self):
+        """
+        Review count and share per star rating, 5 stars first, read from
+        the stored counts: drawing the chart never touches the reviews.
+        """
+        histogram = []
+        for rating in (5, 4, 3, 2, 1):
+            count = getattr(self, f'rating_{rating}_count')
+            histogram.append({
+                'rating': rating,
+                'count': count,
+                'percent': 100 * count / self.review_count if self.review_count else 0,
+            })
+        return histogram
+
+
+def location_slug(text):
+    """Normalize free-text place names: "Lagos State", " lagos " -> "lagos"."""
+    slug = slugify(text or '')
+    if slug.endswith('-state') and slug != '-state':
+        slug = slug[:-len('-state')]
+    return slug
+
+
+def search_slug(text):
+    """
+    location_slug() for a place typed into a search. Two-letter state codes
+    only count in capitals ("LA", "ON"): in lower case "on", "go" or "ta"
+    are words or fragments of a name, not Ondo, Gombe or Taraba.
+    """
+    slug = location_slug(text)
+    if len(slug) <= 2 and not (text or '').strip().isupper():
+        return ''
+    return slug
+
+
+class LocationQuerySet(models.QuerySet):
+
+    def resolve(self, text):
+        """Look up a state or city by any of its aliases, or return None."""
+        return self._by_alias(location_slug(text))
+
+    def resolve_search(self, text):
+        """resolve() for search input, which takes state codes in capitals only."""
+        return self._by_alias(search_slug(text))
+
+    def _by_alias(self, slug):
+        if not slug:
+            return None
+        return self.filter(aliases__alias=slug).first()
+
+    def for_address(self, city, state):
+        """
+        Return the most specific Location for a free-text city/state pair,
+        creating the state and city (with their names as aliases) if needed.
+        """
+        state_location = self.resolve(state)
+        if state_location is None and location_slug(state):
+            state_location = self._create_with_alias('state', state.strip(), None)
+        if state_location is not None and state_location.kind == 'city':
+            state_location = state_location.parent
+
+        slug = location_slug(city)
+        if not slug:
+            return state_location
+        city_location = self.filter(kind='city', parent=state_location, slug=slug).first()
+        if city_location is None:
+            city_location = self._create_with_alias('city', city.strip(), state_location)
+        return city_location
+
+    def _create_with_alias(self, kind, name, parent):
+        location = self.create(kind=kind, name=name, slug=location_slug(name), parent=parent)
+        # Aliases are globally unique; a city never takes over a state's name.
+        LocationAlias.objects.get_or_create(alias=location.slug, defaults={'location': location})
+        return location
+
+
+class Location(models.Model):
+    KIND_CHOICES = (
+        ('state', 'State'),
+        ('city', 'City'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100)
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, related_name='children'
+    )
+
+    objects = LocationQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ['kind', 'parent', 'slug']
+
+    def __str__(self):
+        if self.parent_id:
+            return f"{self.name}, {self.parent.name}"
+        return self.name
+
+    def with_children(self):
+        """This location and every city inside it, as a queryset for __in lookups."""
+        return Location.objects.filter(models.Q(pk=self.pk) | models.Q(parent=self.pk))
+
+
+class LocationAlias(models.Model):
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.SlugField(max_length=100, unique=True)
+
+    def __str__(self):
+        return f"{self.alias} -> {self.location}"
+
 
 class UserProfile(models.Model):
     USER_TYPE_CHOICES = (
@@ -16,7 +151,7 @@ class UserProfile(models.Model):
 
 
 
-class CraftsmanProfile(models.Model):
+class CraftsmanProfile(RatingSummary):
 
     SERVICE_CATEGORIES = [
     ('plumbing', 'Plumber'),
@@ -70,10 +205,14 @@ class CraftsmanProfile(models.Model):
         ('5+', '5+ years'),
     ])
     profile_photo = models.ImageField(upload_to='craftsman_profiles/', null=True, blank=True)
+    # Resized copies of profile_photo, written by findus.images.
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     license_number = models.CharField(max_length=100, blank=True, null=True)
     description = models.TextField()
     is_verified = models.BooleanField(default=False)
-    rating = models.FloatField(default=0.0)
+    # Cleared when the craftsman deletes their profile: hidden everywhere at
+    # once, while delete_craftsman_profile removes it in the worker.
+    is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -86,11 +225,60 @@ class CraftsmanProfile(models.Model):
     phone = models.CharField(
         max_length=20
     )
+    # Canonical city (or state) resolved from city/state; used by the dashboard
+    # location filter instead of matching the free text.
+    location = models.ForeignKey(
+        Location, on_delete=models.SET_NULL, null=True, blank=True, related_name='craftsmen'
+    )
+    # Geocoded offline from the bundled gazetteer (see findus.geo); geo_cell
+    # is the grid bucket used to prune radius searches.
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geo_cell = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['geo_cell', 'latitude', 'longitude'], name='craftsman_geo_cell_idx'),
+        ]
     
 
     def __str__(self):
         return f"{self.user_profile.user.get_full_name()} - {self.business_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._address_snapshot = tuple(
+            instance.__dict__.get(field) for field in ('city', 'state', 'postal_code')
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        address = (self.city, self.state, self.postal_code)
+        if self.location_id is None or address != getattr(self, '_address_snapshot', address):
+            self.location = Location.objects.for_address(self.city, self.state)
+            self.set_coordinates()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {
+                    'location', 'latitude', 'longitude', 'geo_cell'
+                }
+        elif self.latitude is not None and self.longitude is not None:
+            from .geo import grid_cell
+            self.geo_cell = grid_cell(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+        self._address_snapshot = address
+
+    def set_coordinates(self):
+        from .geo import geocode_craftsman, grid_cell
+
+        point = geocode_craftsman(self)
+        if point is None:
+            self.latitude = self.longitude = self.geo_cell = None
+        else:
+            self.latitude, self.longitude = point
+            self.geo_cell = grid_cell(*point)
+
     def has_complete_profile(self):
         
         required_fields = [
@@ -124,7 +312,68 @@ class CustomerProfile(models.Model):
     
 
 
-class Service(models.Model):
+class ServiceQuerySet(models.QuerySet):
+    """
+    Keeps the stored effective_price/all_in_price and feature_mask columns
+    in step with their source fields for writes that bypass Service.save().
+    """
+
+    def update(self, **kwargs):
+        if PRICE_SOURCE_FIELDS & kwargs.keys() and 'effective_price' not in kwargs:
+            kwargs.update(Service.price_expressions(kwargs))
+        if 'features' in kwargs and 'feature_mask' not in kwargs:
+            kwargs['feature_mask'] = feature_mask(kwargs['features'])
+        return super().update(**kwargs)
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.set_prices()
+            obj.feature_mask = feature_mask(obj.features)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    bulk_create.alters_data = True
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        # Prices follow through update(); the mask has to be computed here.
+        objs = list(objs)
+        if 'features' in fields:
+            fields = [*fields, 'feature_mask']
+            for obj in objs:
+                obj.feature_mask = feature_mask(obj.features)
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    bulk_update.alters_data = True
+
+
+PRICE_SOURCE_FIELDS = {'price_type', 'hourly_rate', 'fixed_price', 'travel_fee'}
+
+
+def feature_mask(features):
+    """Bitmask for a list of Service.FEATURE_CHOICES values; unknown values are ignored."""
+    bits = {value: 1 << i for i, (value, _) in enumerate(Service.FEATURE_CHOICES)}
+    mask = 0
+    for value in features or ():
+        mask |= bits.get(value, 0)
+    return mask
+
+
+def feature_masks(features, match_all=False):
+    """
+    Every feature_mask value matching `features`: those sharing any of their
+    bits, or with match_all those containing all of them. With only a handful
+    of features this is a short list, so either filter is one indexed IN.
+    """
+    wanted = feature_mask(features)
+    masks = range(1 << len(Service.FEATURE_CHOICES))
+    if match_all:
+        return [mask for mask in masks if mask & wanted == wanted]
+    return [mask for mask in masks if mask & wanted]
+
+
+class Service(RatingSummary):
     CATEGORY_CHOICES = [
         ('plumbing', 'Plumber'),
     ('electrical', 'Electrician'),
@@ -179,6 +428,16 @@ class Service(models.Model):
         ('large', 'Large Job (Full day+)'),
         ('project', 'Multi-day Project'),
     ]
+
+    # Each feature's position is its bit in feature_mask: only ever append.
+    FEATURE_CHOICES = [
+        ('emergency', '24/7 Emergency Service'),
+        ('warranty', 'Service Warranty Included'),
+        ('licensed', 'Fully Licensed'),
+        ('insured', 'Insured & Bonded'),
+        ('free_estimate', 'Free Estimate'),
+        ('senior_discount', 'Senior Discount'),
+    ]
     
     craftsman = models.ForeignKey('CraftsmanProfile', on_delete=models.CASCADE)
     title = models.CharField(max_length=100)
@@ -190,6 +449,8 @@ class Service(models.Model):
     estimated_duration = models.CharField(max_length=100)
     min_hours = models.CharField(max_length=100, blank=True)
     image = models.ImageField(upload_to='service_images/', null=True, blank=True)
+    # Resized copies of image, written by findus.images.
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     availability = models.CharField(
         max_length=20,
         choices=AVAILABILITY_CHOICES,
@@ -208,13 +469,156 @@ class Service(models.Model):
         blank=True
     )
     features = models.JSONField(default=list, blank=True)
+    # Bitmask of `features`, kept in sync on every write; see feature_mask().
+    feature_mask = models.PositiveIntegerField(default=0, editable=False)
     service_status = models.CharField(max_length=100)
+    # Derived from the pricing fields on every write; see set_prices().
+    effective_price = models.DecimalField(max_digits=8, decimal_places=2, default=0, editable=False)
+    all_in_price = models.DecimalField(max_digits=9, decimal_places=2, default=0, editable=False)
+    # "Best rated" ordering key, kept up to date by findus.ratings.rank_score().
+    rank_score = models.FloatField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ServiceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # customer_dashboard: every exact-match filter leads an index that
+            # also serves the default -created_at ordering.
+            models.Index(fields=['-created_at'], name='service_created_idx'),
+            models.Index(fields=['category', '-created_at'], name='service_cat_created_idx'),
+            models.Index(fields=['category', 'price_type', '-created_at'], name='service_cat_ptype_idx'),
+            models.Index(fields=['category', 'availability', '-created_at'], name='service_cat_avail_idx'),
+            models.Index(fields=['category', 'job_size', '-created_at'], name='service_cat_size_idx'),
+            models.Index(fields=['price_type', '-created_at'], name='service_ptype_created_idx'),
+            models.Index(fields=['availability', '-created_at'], name='service_avail_created_idx'),
+            models.Index(fields=['job_size', '-created_at'], name='service_size_created_idx'),
+            models.Index(fields=['-rank_score'], name='service_rank_idx'),
+            models.Index(fields=['category', '-rank_score'], name='service_cat_rank_idx'),
+            models.Index(fields=['category', 'effective_price'], name='service_cat_price_idx'),
+            models.Index(fields=['effective_price'], name='service_price_idx'),
+            models.Index(fields=['category', 'all_in_price'], name='service_cat_allin_idx'),
+            models.Index(fields=['all_in_price'], name='service_allin_idx'),
+            models.Index(fields=['feature_mask', '-created_at'], name='service_features_idx'),
+            models.Index(
+                fields=['-created_at'],
+                name='service_materials_idx',
+                condition=models.Q(materials_included=True),
+            ),
+            # Active listings: craftsman_public_profile and related services.
+            models.Index(
+                fields=['craftsman', '-created_at'],
+                name='service_active_craftsman_idx',
+                condition=models.Q(service_status='Active'),
+            ),
+            models.Index(
+                fields=['category', '-created_at'],
+                name='service_active_cat_idx',
+                condition=models.Q(service_status='Active'),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.get_category_display()}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The dashboard cache slice a category change moves the service out of.
+        instance._category_snapshot = instance.__dict__.get('category')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.set_prices()
+        self.feature_mask = feature_mask(self.features)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if PRICE_SOURCE_FIELDS & update_fields:
+                update_fields |= {'effective_price', 'all_in_price'}
+            if 'features' in update_fields:
+                update_fields.add('feature_mask')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+    def set_prices(self):
+        if self.price_type == 'hourly':
+            price = self.hourly_rate
+        elif self.price_type == 'fixed':
+            price = self.fixed_price
+        else:
+            price = None
+        self.effective_price = Decimal(price or 0)
+        self.all_in_price = self.effective_price + Decimal(self.travel_fee or 0)
+
+    @classmethod
+    def price_expressions(cls, values=None):
+        """
+        SQL expressions for effective_price and all_in_price. Any pricing field
+        present in `values` is used in place of its current column value, so
+        the result can sit in the same UPDATE that changes those fields.
+        """
+        values = values or {}
+
+        def source(name):
+            if name not in values:
+                return models.F(name)
+            value = values[name]
+            if hasattr(value, 'resolve_expression'):
+                return value
+            return models.Value(value, output_field=cls._meta.get_field(name))
+
+        price_type = source('price_type')
+        effective_price = models.Case(
+            models.When(Exact(price_type, 'hourly'), then=source('hourly_rate')),
+            models.When(Exact(price_type, 'fixed'), then=source('fixed_price')),
+            default=models.Value(0),
+            output_field=models.DecimalField(max_digits=8, decimal_places=2),
+        )
+        effective_price = Coalesce(
+            effective_price, models.Value(0),
+            output_field=models.DecimalField(max_digits=8, decimal_places=2),
+        )
+        travel_fee = Coalesce(
+            source('travel_fee'), models.Value(0),
+            output_field=models.DecimalField(max_digits=6, decimal_places=2),
+        )
+        return {
+            'effective_price': effective_price,
+            'all_in_price': models.ExpressionWrapper(
+                effective_price + travel_fee,
+                output_field=models.DecimalField(max_digits=9, decimal_places=2),
+            ),
+        }
+
+
+class ServiceSearchIndex(models.Model):
+    """
+    SQLite FTS5 index over service and craftsman text, one row per Service
+    (rowid = service id). Created and kept in sync by triggers installed in
+    migration 0016; filter on `match` and order by `rank` (BM25).
+    """
+    service = models.OneToOneField(
+        Service,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='search_index',
+    )
+    title = models.TextField()
+    description = models.TextField()
+    business_name = models.TextField()
+    services_offered = models.TextField()
+    # FTS5 hidden columns: comparing the table-named column runs a full-text
+    # MATCH, and rank is the configured bm25() score (lower is better).
+    match = models.TextField(db_column='findus_service_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'findus_service_fts'
+
 
 class Review(models.Model):
     RATING_CHOICES = [
@@ -237,6 +641,17 @@ class Review(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['service', 'customer']  
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the rating aggregates currently account for, so an
+        # edit can be applied as a delta instead of a full recount.
+        instance._rating_snapshot = (
+            instance.__dict__.get('service_id'),
+            instance.__dict__.get('rating'),
+        )
+        return instance
     
     def __str__(self):
         return f"{self.customer.user_profile.user.get_full_name()} - {self.service.title} - {self.rating} stars"
@@ -251,4 +666,100 @@ class SavedService(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.customer.user_profile.user.get_full_name()} saved {self.service.title}"
\ No newline at end of file
+        return f"{self.customer.user_profile.user.get_full_name()} saved {self.service.title}"
+
+
+
+class RelatedService(models.Model):
+    """
+    One of a service's precomputed "related services", best first. Built
+    by `manage.py build_related_services` from text similarity, co-saves
+    and category (see findus/related.py).
+    """
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='neighbours')
+    related = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='neighbour_of')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    built_at = models.DateTimeField()
+
+    class Meta:
+        # Also the index service_detail reads a service's list through.
+        unique_together = ['service', 'rank']
+        ordering = ['service', 'rank']
+
+    def __str__(self):
+        return f"{self.service_id} -> {self.related_id} (#{self.rank}, {self.score:.3f})"
+
+
+class Boost(models.Model):
+    """
+    A paid placement: `service` is shown above customer_dashboard results
+    matching its targeting, until `impression_budget` impressions have been
+    served or `ends_at`, paced evenly in between (see findus/boosts.py).
+    """
+    TIER_CHOICES = (
+        ('standard', 'Standard'),
+        ('professional', 'Professional'),
+        ('premium', 'Premium'),
+    )
+
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='boosts')
+    tier = models.CharField(max_length=20, choices=TIER_CHOICES, default='standard')
+    # Targeting; blank matches every category, NULL every location. A state
+    # also matches searches for any of its cities.
+    category = models.CharField(max_length=50, choices=Service.CATEGORY_CHOICES, blank=True)
+    location = models.ForeignKey(
+        Location, on_delete=models.PROTECT, null=True, blank=True, related_name='boosts'
+    )
+    impression_budget = models.PositiveIntegerField()
+    # Written in batches by findus.boosts, so it lags the live count.
+    impressions = models.PositiveIntegerField(default=0, editable=False)
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-starts_at']
+        indexes = [
+            models.Index(fields=['ends_at'], name='boost_ends_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.service} ({self.get_tier_display()}, {self.impressions}/{self.impression_budget})"
+
+
+class Job(models.Model):
+    """
+    A queued call to a function registered with findus.jobs.job, run by
+    `manage.py runworker`. Finished jobs are deleted; failed ones are kept
+    with their last error.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField()
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The worker's poll: due jobs in run order.
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status}, attempt {self.attempts}/{self.max_attempts})"
@@ -0,0 +1,198 @@
+import datetime
+import decimal
+import hashlib
+from functools import reduce
+from operator import or_
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+TOKEN_SALT = 'findus.pagination'
+COUNT_CACHE_TIMEOUT = 60
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over an ordered queryset.
+
+    Pages are fetched with a WHERE on the sort key of the last row seen
+    instead of an OFFSET, so every page costs the same as the first one and
+    can be served straight from an index on the sort key. The primary key
+    is appended as a tiebreaker, so sort keys don't need to be unique, but
+    they must not be NULL. Cursors are signed, opaque tokens.
+
+    `count` is cached for COUNT_CACHE_TIMEOUT seconds per distinct query, so
+    the "N results" header doesn't cost a COUNT(*) on every request. Pass
+    cache_count=False when the caller caches the count itself, or `count`
+    when it already has it from another query.
+    """
+
+    def __init__(self, queryset, per_page, cache_count=True, count=None):
+        self.per_page = per_page
+        self.cache_count = cache_count
+        if count is not None:
+            self.count = count
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        self.keys = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in ordering if isinstance(name, str)
+        ]
+        if not any(name in ('pk', 'id') for name, _ in self.keys):
+            # Ascending, whatever the sort direction: SQLite indexes end in an
+            # implicit ascending rowid, so (key, pk) is still a pure index walk.
+            self.keys.append(('pk', False))
+        self.queryset = queryset.order_by(*self._order_by(reverse=False))
+
+    @cached_property
+    def count(self):
+        if not self.cache_count:
+            return self.queryset.count()
+        sql, params = self.queryset.query.sql_with_params()
+        digest = hashlib.md5(repr((sql, params)).encode()).hexdigest()
+        cache_key = f'findus:count:{digest}'
+        count = cache.get(cache_key)
+        if count is None:
+            count = self.queryset.count()
+            cache.set(cache_key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def get_page(self, token=None):
+        """Return the page for `token`, or the first page if it's missing or invalid."""
+        cursor = self._decode(token)
+        if cursor is None:
+            rows = list(self.queryset[:self.per_page + 1])
+            return KeysetPage(self, rows[:self.per_page], 0,
+                              has_previous=False, has_next=len(rows) > self.per_page)
+
+        values, position, backwards = cursor
+        queryset = self.queryset.filter(self._seek(values, backwards))
+        if backwards:
+            queryset = queryset.order_by(*self._order_by(reverse=True))
+        rows = list(queryset[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backwards:
+            rows.reverse()
+            position = max(position - len(rows), 0)
+            return KeysetPage(self, rows, position, has_previous=more, has_next=True)
+        return KeysetPage(self, rows, position, has_previous=True, has_next=more)
+
+    def token_after(self, obj, position):
+        return self._encode(obj, position, backwards=False)
+
+    def token_before(self, obj, position):
+        return self._encode(obj, position, backwards=True)
+
+    def _order_by(self, reverse):
+        return [('-' if desc != reverse else '') + name for name, desc in self.keys]
+
+    def _seek(self, values, backwards):
+        """
+        Rows strictly after `values` in the page order (before, if backwards),
+        written as k1 <= v1 AND (k1 < v1 OR (k1 = v1 AND k2 < v2) ...) so the
+        leading key can be used for an index range scan.
+        """
+        def op(desc, inclusive=False):
+            forward_less = desc != backwards
+            return ('lte' if inclusive else 'lt') if forward_less else ('gte' if inclusive else 'gt')
+
+        clauses = []
+        for i, (name, desc) in enumerate(self.keys):
+            clause = Q(**{f'{name}__{op(desc)}': values[i]})
+            for j, (prev_name, _) in enumerate(self.keys[:i]):
+                clause &= Q(**{prev_name: values[j]})
+            clauses.append(clause)
+
+        first_name, first_desc = self.keys[0]
+        return Q(**{f'{first_name}__{op(first_desc, inclusive=True)}': values[0]}) & reduce(or_, clauses)
+
+    def _output_field(self, name):
+        if name in self.queryset.query.annotations:
+            return self.queryset.query.annotations[name].output_field
+        if name == 'pk':
+            return self.queryset.model._meta.pk
+        return self.queryset.model._meta.get_field(name)
+
+    def _encode(self, obj, position, backwards):
+        values = []
+        for name, _ in self.keys:
+            value = getattr(obj, name)
+            if isinstance(value, (datetime.datetime, datetime.date)):
+                value = value.isoformat()
+            elif isinstance(value, decimal.Decimal):
+                value = str(value)
+            values.append(value)
+        return signing.dumps([values, position, backwards], salt=TOKEN_SALT, compress=True)
+
+    def _decode(self, token):
+        if not token:
+            return None
+        try:
+            values, position, backwards = signing.loads(token, salt=TOKEN_SALT)
+            if len(values) != len(self.keys):
+                return None
+            values = [
+                self._output_field(name).to_python(value)
+                for (name, _), value in zip(self.keys, values)
+            ]
+        except (signing.BadSignature, ValueError, TypeError):
+            return None
+        return values, int(position), bool(backwards)
+
+
+class KeysetPage:
+    """
+    One page of a KeysetPaginator. Mirrors the parts of Django's Page that
+    the templates use; cursors replace page numbers for navigation.
+    """
+
+    def __init__(self, paginator, object_list, position, has_previous, has_next):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.position = position
+        self._has_previous = has_previous and bool(object_list or position)
+        self._has_next = has_next and bool(object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    @property
+    def number(self):
+        return self.position // self.paginator.per_page + 1
+
+    def start_index(self):
+        return self.position + 1 if self.object_list else 0
+
+    def end_index(self):
+        return self.position + len(self.object_list)
+
+    @cached_property
+    def next_token(self):
+        if not self.has_next():
+            return ''
+        return self.paginator.token_after(self.object_list[-1], self.end_index())
+
+    @cached_property
+    def previous_token(self):
+        if not self.has_previous():
+            return ''
+        return self.paginator.token_before(self.object_list[0], self.position)
@@ -0,0 +1,54 @@
+import json
+
+from django.core import signing
+
+
+LOCATION_COOKIE = 'findus_location'
+LOCATION_SALT = 'findus.preferences.location'
+LOCATION_MAX_AGE = 365 * 24 * 60 * 60
+# Where the location lived before it moved to the cookie.
+LEGACY_SESSION_KEYS = ('user_state', 'user_city')
+
+
+def get_location(request):
+    """
+    The visitor's (state, city), or ('', '') when none is set.
+
+    The location is kept in a signed cookie rather than the session, so
+    changing it never writes the session table. Values left in the session
+    by older versions are still read until the next change moves them.
+    """
+    try:
+        state, city = json.loads(request.get_signed_cookie(
+            LOCATION_COOKIE, salt=LOCATION_SALT, max_age=LOCATION_MAX_AGE,
+        ))
+    except (KeyError, signing.BadSignature, ValueError, TypeError):
+        session = getattr(request, 'session', {})
+        state, city = (session.get(key) or '' for key in LEGACY_SESSION_KEYS)
+    return state, city
+
+
+def set_location(request, response, state, city=''):
+    """
+    Remember (state, city) on `response`; an empty state forgets it.
+
+    Nothing is sent when the value hasn't changed, so repeated saves and
+    reloads of the same URL cost neither a Set-Cookie nor a session write.
+    """
+    state, city = state or '', (city or '') if state else ''
+    session = getattr(request, 'session', None)
+    if session is not None and any(key in session for key in LEGACY_SESSION_KEYS):
+        # One last session write to move the old value out.
+        for key in LEGACY_SESSION_KEYS:
+            session.pop(key, None)
+    elif get_location(request) == (state, city):
+        return response
+
+    if state:
+        response.set_signed_cookie(
+            LOCATION_COOKIE, json.dumps([state, city]), salt=LOCATION_SALT,
+            max_age=LOCATION_MAX_AGE, httponly=True, samesite='Lax',
+        )
+    else:
+        response.delete_cookie(LOCATION_COOKIE, samesite='Lax')
+    return response
@@ -0,0 +1,131 @@
+import logging
+import os
+import sys
+import time
+from collections import Counter, namedtuple
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import TokenType
+
+
+logger = logging.getLogger(__name__)
+
+RecordedQuery = namedtuple('RecordedQuery', 'alias sql params ms stack')
+
+
+def _query_stack():
+    """
+    Where the current query came from, outermost first: this project's
+    frames, and for queries issued while rendering, the template tags and
+    variables being rendered.
+    """
+    base_dir = str(settings.BASE_DIR) + os.sep
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        node = frame.f_locals.get('self') if code.co_name == 'render_annotated' else None
+        if getattr(node, 'origin', None) and getattr(node, 'token', None):
+            token = node.token
+            text = f'{{% {token.contents} %}}' if token.token_type == TokenType.BLOCK else f'{{{{ {token.contents} }}}}'
+            frames.append(f'{node.origin.template_name}:{token.lineno}: {text}')
+        elif (code.co_filename.startswith(base_dir) and 'site-packages' not in code.co_filename
+              and code.co_filename != __file__):
+            frames.append(f'{code.co_filename}:{frame.f_lineno} in {code.co_name}')
+        frame = frame.f_back
+    return frames[::-1]
+
+
+class QueryRecorder:
+    """
+    Record every query run while the block is active, on every database
+    connection of this thread:
+
+        with QueryRecorder(capture_stacks=True) as recorder:
+            client.get(url)
+        print(recorder.report())
+
+    Stacks are only captured on request; walking them on every query is
+    too slow for production traffic.
+    """
+
+    def __init__(self, capture_stacks=False):
+        self.capture_stacks = capture_stacks
+        self.queries = []
+
+    def __enter__(self):
+        self._wrappers = ExitStack()
+        for alias in connections:
+            self._wrappers.enter_context(connections[alias].execute_wrapper(self._record(alias)))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrappers.close()
+
+    def _record(self, alias):
+        def wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                ms = (time.perf_counter() - start) * 1000
+                stack = _query_stack() if self.capture_stacks else []
+                self.queries.append(RecordedQuery(alias, sql, params, ms, stack))
+        return wrapper
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def db_ms(self):
+        return sum(query.ms for query in self.queries)
+
+    def duplicates(self):
+        """Statements run more than once with the same parameters, with their counts."""
+        runs = Counter((query.sql, repr(query.params)) for query in self.queries)
+        return {key: n for key, n in runs.items() if n > 1}
+
+    def repeated(self):
+        """Statements run more than once with any parameters: the shape of an N+1."""
+        runs = Counter(query.sql for query in self.queries)
+        return {sql: n for sql, n in runs.items() if n > 1}
+
+    def report(self):
+        lines = [f"{self.count} queries, {self.db_ms:.1f} ms"]
+        for sql, n in self.repeated().items():
+            lines.append(f"  x{n}: {sql}")
+        for number, query in enumerate(self.queries, 1):
+            lines.append(f"{number}. [{query.alias}] {query.sql} {query.params!r} ({query.ms:.2f} ms)")
+            lines.extend(f"     {frame}" for frame in query.stack)
+        return '\n'.join(lines)
+
+
+class QueryCountMiddleware:
+    """
+    Log the query count, duplicated queries and DB time of every request
+    under its URL name. Requests that repeat a query are logged as
+    warnings. With DEBUG the numbers are also sent as a Server-Timing
+    header, which browser dev tools show next to the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        url_name = match.view_name if match else request.path
+        duplicates = sum(n - 1 for n in recorder.duplicates().values())
+        logger.log(
+            logging.WARNING if duplicates else logging.DEBUG,
+            "%s %s: %d queries (%d duplicate), %.1f ms in the database",
+            request.method, url_name, recorder.count, duplicates, recorder.db_ms,
+        )
+        if settings.DEBUG:
+            response['Server-Timing'] = f'db;dur={recorder.db_ms:.1f};desc="{recorder.count} queries"'
+        return response
@@ -0,0 +1,182 @@
+import math
+
+from django.db import transaction
+from django.db.models import (
+    Avg, Case, Count, ExpressionWrapper, F, FloatField, Max, OuterRef, Q, Subquery, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .models import CraftsmanProfile, Review, SavedService, Service
+
+
+RATING_VALUES = (1, 2, 3, 4, 5)
+SUMMARY_FIELDS = ['avg_rating', 'review_count'] + [f'rating_{r}_count' for r in RATING_VALUES]
+BATCH_SIZE = 500
+
+# rank_score: a service starts out as PRIOR_REVIEWS reviews of PRIOR_RATING
+# each, so one 5-star review doesn't outrank hundreds at 4.8; the review
+# count counts through that alone. The prior is fixed rather than the
+# site-wide mean, so a review only ever changes the score of its own service.
+PRIOR_RATING = 3.5
+PRIOR_REVIEWS = 5
+SAVES_WEIGHT = 0.05         # per e-fold of saves
+# A bonus of up to RECENCY_WEIGHT for the latest review of RECENT_RATING
+# stars or more, fading by e every RECENCY_DAYS. Only good reviews count, so
+# a bad one can never lift a service. It fades between reviews, so
+# `rebuild_rating_aggregates --ranks` should run daily.
+RECENT_RATING = 4
+RECENCY_WEIGHT = 0.25
+RECENCY_DAYS = 90
+
+
+def _delta_update(deltas):
+    """
+    Build update() kwargs that apply per-star count deltas, e.g. {4: -1, 5: 1},
+    to a RatingSummary row in a single UPDATE statement. The new average is
+    derived from the updated histogram, so no read of the row is needed.
+    """
+    count_delta = sum(deltas.values())
+    new_counts = {
+        r: F(f'rating_{r}_count') + deltas.get(r, 0) for r in RATING_VALUES
+    }
+    new_total = F('review_count') + count_delta
+    weighted_sum = sum(
+        (Value(r) * new_counts[r] for r in RATING_VALUES[1:]),
+        new_counts[RATING_VALUES[0]],
+    )
+
+    values = {f'rating_{r}_count': new_counts[r] for r in deltas if deltas[r]}
+    values['review_count'] = new_total
+    values['avg_rating'] = Case(
+        When(
+            review_count__gt=-count_delta,
+            then=ExpressionWrapper(
+                Cast(weighted_sum, FloatField()) / new_total,
+                output_field=FloatField(),
+            ),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return values
+
+
+def apply_review_delta(service_id, deltas):
+    """
+    Apply star-count deltas to a service and to the craftsman who owns it,
+    and rescore the service.
+    """
+    if not any(deltas.values()):
+        return
+
+    values = _delta_update(deltas)
+    with transaction.atomic():
+        Service.objects.filter(pk=service_id).update(**values)
+        CraftsmanProfile.objects.filter(service__pk=service_id).update(**values)
+        refresh_rank_scores([service_id])
+
+
+def rank_score(avg_rating, review_count, save_count, last_praised, now):
+    """
+    The "best rated" ordering key: a Bayesian average of the stars, plus a
+    little for saves and for a recent good review (`last_praised`, or None).
+    """
+    bayesian = (PRIOR_RATING * PRIOR_REVIEWS + avg_rating * review_count) / (PRIOR_REVIEWS + review_count)
+    recency = 0.0
+    if last_praised is not None:
+        age_days = max((now - last_praised).total_seconds(), 0) / 86400
+        recency = RECENCY_WEIGHT * math.exp(-age_days / RECENCY_DAYS)
+    return bayesian + SAVES_WEIGHT * math.log1p(save_count) + recency
+
+
+def refresh_rank_scores(service_ids=None):
+    """
+    Recompute rank_score from the stored rating summary, the number of
+    saves and the latest good review: for every service, or only
+    `service_ids`. Call it after the rating summary is up to date.
+    """
+    now = timezone.now()
+    services = Service.objects.all()
+    if service_ids is not None:
+        services = services.filter(pk__in=list(service_ids))
+    saves = SavedService.objects.filter(service=OuterRef('pk')).order_by().values('service')
+    praise = Review.objects.filter(
+        service=OuterRef('pk'), rating__gte=RECENT_RATING,
+    ).order_by().values('service')
+    rows = services.annotate(
+        save_count=Coalesce(Subquery(saves.annotate(n=Count('pk')).values('n')), 0),
+        last_praised=Subquery(praise.annotate(last=Max('created_at')).values('last')),
+    ).values_list('pk', 'avg_rating', 'review_count', 'save_count', 'last_praised')
+
+    batch = []
+    for pk, avg_rating, review_count, save_count, last_praised in rows.iterator():
+        score = rank_score(avg_rating, review_count, save_count, last_praised, now)
+        batch.append(Service(pk=pk, rank_score=score))
+        if len(batch) >= BATCH_SIZE:
+            Service.objects.bulk_update(batch, ['rank_score'])
+            batch = []
+    if batch:
+        Service.objects.bulk_update(batch, ['rank_score'])
+
+
+def _summary_aggregates():
+    aggregates = {
+        'review_count': Count('id'),
+        'avg_rating': Avg('rating'),
+    }
+    for r in RATING_VALUES:
+        aggregates[f'rating_{r}_count'] = Count('id', filter=Q(rating=r))
+    return aggregates
+
+
+def _write_summaries(model, queryset, grouped_rows, key):
+    queryset.update(**{
+        field: 0.0 if field == 'avg_rating' else 0 for field in SUMMARY_FIELDS
+    })
+
+    batch = []
+    for row in grouped_rows:
+        row['avg_rating'] = row['avg_rating'] or 0.0
+        batch.append(model(pk=row[key], **{field: row[field] for field in SUMMARY_FIELDS}))
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_update(batch, SUMMARY_FIELDS)
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, SUMMARY_FIELDS)
+
+
+def refresh_rating_aggregates(service_ids=None):
+    """
+    Recount the rating summaries from the Review table with one GROUP BY query
+    per model. With no service_ids every Service and CraftsmanProfile is rebuilt,
+    otherwise only the given services and the craftsmen who own them.
+    """
+    services = Service.objects.all()
+    craftsmen = CraftsmanProfile.objects.all()
+    reviews = Review.objects.all()
+    service_reviews = reviews
+    if service_ids is not None:
+        service_ids = list(service_ids)
+        services = services.filter(pk__in=service_ids)
+        craftsman_ids = list(services.values_list('craftsman_id', flat=True))
+        craftsmen = craftsmen.filter(pk__in=craftsman_ids)
+        reviews = reviews.filter(service__craftsman_id__in=craftsman_ids)
+        service_reviews = reviews.filter(service_id__in=service_ids)
+
+    with transaction.atomic():
+        _write_summaries(
+            Service,
+            services,
+            service_reviews.values('service_id')
+            .annotate(**_summary_aggregates()).order_by(),
+            'service_id',
+        )
+        _write_summaries(
+            CraftsmanProfile,
+            craftsmen,
+            reviews.values('service__craftsman_id')
+            .annotate(**_summary_aggregates()).order_by(),
+            'service__craftsman_id',
+        )
+        refresh_rank_scores(service_ids)
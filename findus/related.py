@@ -0,0 +1,154 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .models import RelatedService, SavedService, Service
+
+
+NEIGHBOURS = 8              # stored per service; the page shows the first 4 still listed
+TEXT_WEIGHT = 0.6           # cosine similarity of the TF-IDF vectors, 0..1
+COSAVE_WEIGHT = 0.3         # saved by the same customers, 0..1
+CATEGORY_WEIGHT = 0.1       # same category
+TITLE_REPEAT = 2            # title words count double
+# Words in more than this share of services say nothing about similarity,
+# and their postings would make every service a candidate for every other.
+MAX_DOCUMENT_FREQUENCY = 0.2
+BATCH_SIZE = 200
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset("""
+    and are all any but can for from get has have her his how its just more
+    not our out per the their them they this was will with you your
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 2 and token not in STOP_WORDS]
+
+
+class SimilarityIndex:
+    """
+    TF-IDF vectors of every active service's title and description, with
+    an inverted index, so a service's text neighbours are found through the
+    words it shares with them instead of by comparing it with every service.
+    """
+
+    def __init__(self):
+        documents = {}
+        self.categories = {}
+        for pk, category, title, description in Service.objects.filter(
+            service_status='Active',
+        ).values_list('pk', 'category', 'title', 'description').iterator():
+            documents[pk] = Counter(tokenize(title) * TITLE_REPEAT + tokenize(description))
+            self.categories[pk] = category
+
+        frequency = Counter(term for terms in documents.values() for term in terms)
+        limit = max(MAX_DOCUMENT_FREQUENCY * len(documents), 2)
+        idf = {
+            term: math.log(len(documents) / df) for term, df in frequency.items() if df <= limit
+        }
+
+        self.vectors = {}
+        self.postings = defaultdict(list)
+        for pk, terms in documents.items():
+            vector = {term: (1 + math.log(n)) * idf[term] for term, n in terms.items() if term in idf}
+            norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1
+            self.vectors[pk] = {term: weight / norm for term, weight in vector.items()}
+            for term, weight in self.vectors[pk].items():
+                self.postings[term].append((pk, weight))
+
+    def scores(self, pk, cosaves=None, saves=None):
+        """Similarity of `pk` to every service it has anything in common with."""
+        scores = defaultdict(float)
+        for term, weight in self.vectors.get(pk, {}).items():
+            for other, other_weight in self.postings[term]:
+                scores[other] += TEXT_WEIGHT * weight * other_weight
+        for other, together in (cosaves or {}).items():
+            if other in self.categories:
+                scores[other] += COSAVE_WEIGHT * together / math.sqrt(saves[pk] * saves[other])
+        scores.pop(pk, None)
+        category = self.categories.get(pk)
+        for other in scores:
+            if self.categories[other] == category:
+                scores[other] += CATEGORY_WEIGHT
+        return scores
+
+    def neighbours(self, pk, k=NEIGHBOURS, cosaves=None, saves=None):
+        """The k best (service id, score) pairs for `pk`, best first; ties go to the older service."""
+        scores = self.scores(pk, cosaves, saves)
+        return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+def cosave_counts(service_ids):
+    """
+    For each of `service_ids`, how many customers also saved each other
+    service, and how many saves every service involved has.
+    """
+    cosaves = defaultdict(dict)
+    pairs = SavedService.objects.filter(service_id__in=service_ids).annotate(
+        other=F('customer__saved_services__service_id'),
+    ).exclude(other=F('service_id')).values_list('service_id', 'other')
+    for service_id, other in pairs.iterator():
+        cosaves[service_id][other] = cosaves[service_id].get(other, 0) + 1
+    involved = set(cosaves) | {other for others in cosaves.values() for other in others}
+    saves = Counter(dict(
+        SavedService.objects.filter(service_id__in=involved).values('service_id').annotate(
+            n=Count('pk'),
+        ).values_list('service_id', 'n')
+    ))
+    return cosaves, saves
+
+
+def stale_services(index):
+    """
+    Active services whose list may be out of date since the last build:
+    new, edited or reactivated services, services saved since, and every
+    service that could now rank one of those among its neighbours.
+    Unsaves aren't tracked; --full catches up with them.
+    """
+    built = RelatedService.objects.aggregate(last=Max('built_at'))['last']
+    if built is None:
+        return set(index.categories)
+    changed = set(Service.objects.filter(
+        service_status='Active', updated_at__gt=built,
+    ).values_list('pk', flat=True))
+    changed |= set(SavedService.objects.filter(created_at__gt=built).values_list('service_id', flat=True))
+    changed &= set(index.categories)
+
+    cosaves, saves = cosave_counts(changed)
+    affected = set(changed)
+    for pk in changed:
+        affected.update(index.scores(pk, cosaves.get(pk), saves))
+    return affected
+
+
+def build_related_services(full=False, k=NEIGHBOURS):
+    """
+    Rebuild the neighbour lists of the services that need it (all of them
+    with full=True). Returns how many services were rebuilt.
+    """
+    # Before reading anything, so changes made during the build count as
+    # newer than it next time.
+    built_at = timezone.now()
+    index = SimilarityIndex()
+    targets = sorted(index.categories if full else stale_services(index))
+    # Inactive services aren't shown, and get a fresh list if they come back.
+    RelatedService.objects.exclude(service__service_status='Active').delete()
+
+    for start in range(0, len(targets), BATCH_SIZE):
+        batch = targets[start:start + BATCH_SIZE]
+        cosaves, saves = cosave_counts(batch)
+        rows = [
+            RelatedService(service_id=pk, related_id=other, rank=rank, score=score, built_at=built_at)
+            for pk in batch
+            for rank, (other, score) in enumerate(index.neighbours(pk, k, cosaves.get(pk), saves))
+        ]
+        with transaction.atomic():
+            RelatedService.objects.filter(service_id__in=batch).delete()
+            RelatedService.objects.bulk_create(rows)
+    return len(targets)
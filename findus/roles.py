@@ -0,0 +1,97 @@
+from functools import wraps
+
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
+
+from .models import CraftsmanProfile, CustomerProfile, UserProfile
+
+
+PROFILE_MODELS = {'craftsman': CraftsmanProfile, 'customer': CustomerProfile}
+PROFILE_RELATED = ['userprofile__craftsmanprofile', 'userprofile__customerprofile']
+
+
+class ProfileBackend(ModelBackend):
+    """
+    ModelBackend that loads the signed-in user of each request together
+    with their UserProfile and role profile, in the query that loads the
+    user anyway.
+    """
+
+    def get_user(self, user_id):
+        User = get_user_model()
+        try:
+            user = User._default_manager.select_related(*PROFILE_RELATED).get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def resolve_role(user):
+    """
+    (user_type, profile) for `user`, or (None, None) when the user has no
+    profile of their declared type, or it is being deleted. Free for users loaded by
+    ProfileBackend, one query for any other.
+    """
+    if not get_user_model().userprofile.is_cached(user):
+        user_profile = UserProfile.objects.select_related(
+            'craftsmanprofile', 'customerprofile',
+        ).filter(user=user).first()
+    else:
+        user_profile = getattr(user, 'userprofile', None)
+    if user_profile is None or user_profile.user_type not in PROFILE_MODELS:
+        return None, None
+    profile = getattr(user_profile, f'{user_profile.user_type}profile', None)
+    if profile is None or not getattr(profile, 'is_active', True):
+        return None, None
+    user_profile.user = user
+    return user_profile.user_type, profile
+
+
+def _role(request):
+    if not hasattr(request, '_role'):
+        request._role = resolve_role(request.user) if request.user.is_authenticated else (None, None)
+    return request._role
+
+
+def _profile_for(request, role):
+    def profile():
+        current, profile = _role(request)
+        return profile if current == role else None
+    return profile
+
+
+class RoleMiddleware:
+    """
+    Set request.craftsman and request.customer to the signed-in user's
+    profile, or None when they don't have that role.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.craftsman = SimpleLazyObject(_profile_for(request, 'craftsman'))
+        request.customer = SimpleLazyObject(_profile_for(request, 'customer'))
+        return self.get_response(request)
+
+
+def role_required(role, message):
+    """Let signed-in users with `role` through; send everyone else home with `message`."""
+    def decorator(view_func):
+        @login_required
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(request, role):
+                messages.error(request, message)
+                return redirect('home')
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+craftsman_required = role_required('craftsman', "You need to be a registered craftsman")
+customer_required = role_required('customer', "Customer profile not found.")
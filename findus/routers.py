@@ -0,0 +1,96 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+REPLICA = 'replica'
+# How long after a write a visitor keeps reading from the primary, so they
+# see their own changes even though the replica lags behind.
+PIN_COOKIE = 'findus_primary'
+PIN_SECONDS = 30
+
+_reads = ContextVar('findus_reads', default=None)
+
+
+def _is_cache_table(model):
+    # DatabaseCache routes its table through the routers as a model of the
+    # 'django_cache' app.
+    return model._meta.app_label == 'django_cache'
+
+
+def replica_reads(view_func):
+    """
+    Mark a read-only view: its queries may go to the replica, unless the
+    visitor wrote something in the last PIN_SECONDS. Apply it outermost or
+    anywhere inside decorators that use functools.wraps.
+    """
+    view_func.replica_reads = True
+    return view_func
+
+
+class _Reads:
+    """Where the current request reads from; switches to the primary on its first write."""
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+class ReplicaRouter:
+    """
+    Send reads of views marked with @replica_reads to the 'replica'
+    database, when one is configured, and everything else to 'default'.
+
+    The database cache table always lives on 'default': the replica's copy
+    is stale, and a cache write isn't a write of the visitor's, so it
+    doesn't pin them to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _is_cache_table(model):
+            return 'default'
+        reads = _reads.get()
+        if reads is not None and reads.replica and not reads.wrote and REPLICA in settings.DATABASES:
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        reads = _reads.get()
+        if reads is not None and not _is_cache_table(model):
+            reads.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the primary: the same rows on both sides.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
+
+
+class ReplicaMiddleware:
+    """
+    Track each request for ReplicaRouter, and pin visitors whose request
+    wrote to the database to the primary for PIN_SECONDS with a cookie.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _reads.set(_Reads(replica=False))
+        try:
+            response = self.get_response(request)
+            wrote = _reads.get().wrote
+        finally:
+            _reads.reset(token)
+        if wrote:
+            response.set_cookie(PIN_COOKIE, '1', max_age=PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'replica_reads', False) and PIN_COOKIE not in request.COOKIES:
+            # The user and their session come from the primary: an account
+            # or login may not have reached the replica yet.
+            request.user.is_authenticated
+            _reads.get().replica = True
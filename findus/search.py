@@ -0,0 +1,161 @@
+import decimal
+import math
+import re
+
+from django.db import connection, models
+
+from .geo import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, filter_services_near, resolve_point
+from .models import CraftsmanProfile, Location, Service, feature_masks
+
+
+# Exact-match filters on Service columns, in the order customer_dashboard
+# applies them. Each one is backed by a (column, -created_at) index.
+EQUALITY_FILTERS = ['category', 'price_type', 'availability', 'job_size']
+
+
+def listing_queryset():
+    return Service.objects.filter(craftsman__is_active=True).select_related(
+        'craftsman',
+        'craftsman__user_profile', 
+        'craftsman__user_profile__user'
+    )
+
+
+def filter_services(services, params):
+    """Apply the customer_dashboard filters in `params` (a QueryDict) to `services`."""
+    services = search_services(services, params.get('q', ''))
+
+    for field in EQUALITY_FILTERS:
+        value = params.get(field, '')
+        if value:
+            services = services.filter(**{field: value})
+
+    # Location filter: an indexed IN over the resolved state/city, falling
+    # back to matching the free text for places we have no Location for.
+    location_filter = params.get('location', '')
+    if location_filter:
+        location = Location.objects.resolve_search(location_filter)
+        if location is not None:
+            services = services.filter(
+                craftsman_id__in=CraftsmanProfile.objects.filter(
+                    location__in=location.with_children()
+                ).values('id')
+            )
+        else:
+            services = services.filter(
+                models.Q(craftsman__city__icontains=location_filter) |
+                models.Q(craftsman__state__icontains=location_filter)
+            )
+
+    # Radius filter around `near`, annotating distance_km
+    near = params.get('near', '')
+    if near:
+        point = resolve_point(near)
+        if point is None:
+            services = services.none()
+        else:
+            services = filter_services_near(services, *point, radius_for(params))
+
+    # Price range filter, on the stored price columns (see Service.set_prices)
+    price_field = price_field_for(params)
+    min_price = price_bound(params.get('min_price'), price_field)
+    max_price = price_bound(params.get('max_price'), price_field)
+    if min_price is not None:
+        services = services.filter(**{f'{price_field}__gte': min_price})
+    if max_price is not None:
+        services = services.filter(**{f'{price_field}__lte': max_price})
+
+    # Features filter: any of the selected features, or all of them
+    features_filter = params.getlist('features')
+    if features_filter:
+        services = services.filter(feature_mask__in=feature_masks(
+            features_filter, match_all=params.get('features_match') == 'all'
+        ))
+
+    # Materials included filter
+    if params.get('materials_included'):
+        services = services.filter(materials_included=True)
+
+    return services
+
+
+def search_services(services, query):
+    """
+    Keyword search over service title/description and the craftsman's business
+    name and services offered. On SQLite this joins the FTS5 index and
+    annotates `search_rank` (BM25, lower is better); other backends fall back
+    to icontains matching.
+    """
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return services
+
+    if connection.vendor != 'sqlite':
+        for term in terms:
+            services = services.filter(
+                models.Q(title__icontains=term) |
+                models.Q(description__icontains=term) |
+                models.Q(craftsman__business_name__icontains=term) |
+                models.Q(craftsman__services_offered__icontains=term)
+            )
+        return services.annotate(search_rank=models.Value(0.0))
+
+    # Quote every term so user input can't inject FTS5 query syntax; the last
+    # term is a prefix match so partially typed words still find results.
+    fts_query = ' '.join(f'"{term}"' for term in terms) + '*'
+    return services.filter(search_index__match=fts_query).annotate(
+        search_rank=models.F('search_index__rank')
+    )
+
+
+def sort_services(services, sort_by, price_field='effective_price'):
+    annotations = services.query.annotations
+    if not sort_by and 'search_rank' in annotations:
+        return services.order_by('search_rank', '-created_at')
+    if sort_by == 'distance' or (not sort_by and 'distance_km' in annotations):
+        if 'distance_km' in annotations:
+            return services.order_by('distance_km', '-created_at')
+    if sort_by == 'price_low_high':
+        return services.order_by(price_field)
+    if sort_by == 'price_high_low':
+        return services.order_by(f'-{price_field}')
+    if sort_by == 'rating':
+        return services.order_by('-rank_score')  # Stored on Service by findus.ratings
+    return services.order_by('-created_at')
+
+
+def price_field_for(params):
+    """Price filters and sorts use the all-in price when travel fees are included."""
+    if params.get('include_travel_fee'):
+        return 'all_in_price'
+    return 'effective_price'
+
+
+def price_bound(value, price_field):
+    """
+    A min_price/max_price parameter as a Decimal for filtering on
+    `price_field`, or None when it's blank, not a number, NaN or infinite.
+    """
+    try:
+        price = decimal.Decimal(value or '')
+    except decimal.InvalidOperation:
+        return None
+    if not price.is_finite():
+        return None
+    # Rounded and clamped to what the column can hold, or the database
+    # adapter rejects it.
+    field = Service._meta.get_field(price_field)
+    step = decimal.Decimal(1).scaleb(-field.decimal_places)
+    limit = decimal.Decimal(10) ** (field.max_digits - field.decimal_places) - step
+    return min(max(price, -limit), limit).quantize(step)
+
+
+def radius_for(params):
+    """The `distance` parameter in km, clamped to a sane range."""
+    try:
+        radius = float(params.get('distance') or DEFAULT_RADIUS_KM)
+    except ValueError:
+        radius = DEFAULT_RADIUS_KM
+    if not math.isfinite(radius):
+        radius = DEFAULT_RADIUS_KM
+    return min(max(radius, 0.1), MAX_RADIUS_KM)
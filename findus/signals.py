@@ -0,0 +1,107 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .boosts import placements
+from .images import variants_out_of_date
+from .listing_cache import invalidate_listings
+from .models import Boost, CraftsmanProfile, Review, SavedService, Service
+from .ratings import apply_review_delta, refresh_rank_scores, refresh_rating_aggregates
+from .tasks import refresh_image_variants
+
+
+@receiver(post_save, sender=Review)
+def update_ratings_on_review_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    current = (instance.service_id, instance.rating)
+    previous = getattr(instance, '_rating_snapshot', None)
+
+    if created:
+        apply_review_delta(instance.service_id, {instance.rating: 1})
+    elif previous is None or None in previous:
+        # Saved without having been loaded from the database, so we don't
+        # know what it replaced; recount the affected service instead.
+        refresh_rating_aggregates([instance.service_id])
+    elif previous != current:
+        old_service_id, old_rating = previous
+        if old_service_id == instance.service_id:
+            apply_review_delta(instance.service_id, {old_rating: -1, instance.rating: 1})
+        else:
+            apply_review_delta(old_service_id, {old_rating: -1})
+            apply_review_delta(instance.service_id, {instance.rating: 1})
+    else:
+        return
+
+    instance._rating_snapshot = current
+    service_ids = {instance.service_id, previous[0] if previous else None} - {None}
+    invalidate_listings(
+        Service.objects.filter(pk__in=service_ids).values_list('category', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Review)
+def update_ratings_on_review_delete(sender, instance, **kwargs):
+    previous = getattr(instance, '_rating_snapshot', None)
+    if previous is None or None in previous:
+        previous = (instance.service_id, instance.rating)
+    service_id, rating = previous
+    apply_review_delta(service_id, {rating: -1})
+    invalidate_listings(Service.objects.filter(pk=service_id).values_list('category', flat=True))
+
+
+# Saves count towards rank_score. The listing caches aren't dropped for them:
+# a save nudges the "best rated" order a little, and cached pages expire
+# within RESULT_CACHE_TIMEOUT.
+
+@receiver(post_save, sender=SavedService)
+def rescore_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    refresh_rank_scores([instance.service_id])
+
+
+@receiver(post_delete, sender=SavedService)
+def rescore_on_unsave(sender, instance, **kwargs):
+    refresh_rank_scores([instance.service_id])
+
+
+# Dashboard result cache: drop the cached pages of every category slice a
+# write can change.
+
+@receiver(post_save, sender=Service)
+def invalidate_listings_on_service_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_category_snapshot', None)
+    invalidate_listings({instance.category, previous} - {None})
+    instance._category_snapshot = instance.category
+
+
+@receiver(post_delete, sender=Service)
+def invalidate_listings_on_service_delete(sender, instance, **kwargs):
+    invalidate_listings([instance.category])
+
+
+@receiver(post_save, sender=CraftsmanProfile)
+def invalidate_listings_on_craftsman_save(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    invalidate_listings(instance.service_set.values_list('category', flat=True).distinct())
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=CraftsmanProfile)
+def queue_image_variants(sender, instance, raw=False, **kwargs):
+    if raw or not variants_out_of_date(instance):
+        return
+    # Resizing can take seconds per upload; leave it to the worker.
+    refresh_image_variants.delay(instance._meta.label, instance.pk)
+
+
+# Other processes pick boost changes up with their next snapshot.
+
+@receiver(post_save, sender=Boost)
+@receiver(post_delete, sender=Boost)
+def reload_boosts(sender, **kwargs):
+    placements.expire()
@@ -0,0 +1,30 @@
+from django.apps import apps
+
+from .images import refresh_variants
+from .jobs import job
+from .models import CraftsmanProfile, Service
+
+
+DELETE_BATCH_SIZE = 50
+
+
+@job
+def refresh_image_variants(model_label, pk, force=False):
+    instance = apps.get_model(model_label).objects.filter(pk=pk).first()
+    if instance is not None:
+        refresh_variants(instance, force=force)
+
+
+@job
+def delete_craftsman_profile(craftsman_id):
+    """
+    Delete a craftsman profile with its services, and through them their
+    reviews and saves, a batch of services at a time.
+    """
+    services = Service.objects.filter(craftsman_id=craftsman_id)
+    while True:
+        batch = list(services.values_list('pk', flat=True)[:DELETE_BATCH_SIZE])
+        if not batch:
+            break
+        Service.objects.filter(pk__in=batch).delete()
+    CraftsmanProfile.objects.filter(pk=craftsman_id).delete()
@@ -0,0 +1,37 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file, variants, variant, sizes='100vw', **attrs):
+    """
+    Render an ImageField through its stored variants (see findus.images):
+    a <picture> with WebP and JPEG srcsets over every variant and `variant`
+    as the default src. Falls back to a plain <img> of the original.
+
+        {% responsive_image service.image service.image_variants 'card' sizes="33vw" class="img-fluid" %}
+    """
+    if not field_file:
+        return ''
+    variants = variants or {}
+    if variant not in variants:
+        return format_html('<img src="{}"{}>', field_file.url, flatatt(attrs))
+
+    storage = field_file.storage
+    widths = sorted(
+        (value for name, value in variants.items() if name != 'source'),
+        key=lambda value: value['width'],
+    )
+
+    def srcset(format_name):
+        return ', '.join(f"{storage.url(value[format_name])} {value['width']}w" for value in widths)
+
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        srcset('webp'), sizes,
+        storage.url(variants[variant]['jpeg']), srcset('jpeg'), sizes, flatatt(attrs),
+    )
@@ -0,0 +1,73 @@
+import hashlib
+
+from django import template
+from django.core.cache import caches
+from django.template.defaultfilters import floatformat
+from django.template.loader import get_template
+from django.utils.connection import ConnectionProxy
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+# The same cache as the dashboard results: off unless it's Redis.
+cache = ConnectionProxy(caches, 'results')
+
+# Card layouts and the partial each one renders. Anything that differs per
+# user or per request (saved state, CSRF tokens, timesince) stays in the
+# page template around the card.
+CARD_TEMPLATES = {
+    'listing': 'cards/service_listing.html',
+    'profile': 'cards/service_profile.html',
+    'saved': 'cards/service_saved.html',
+}
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def load_card_template(layout):
+    """The compiled partial and a digest of its source, so editing a card retires its cached copies."""
+    card_template = get_template(CARD_TEMPLATES[layout])
+    return card_template, hashlib.md5(card_template.template.source.encode()).hexdigest()[:8]
+
+
+def card_version(service):
+    """
+    Everything a card shows that can change without a new updated_at.
+    Ratings and image variants are written with queryset updates, and the
+    craftsman block changes with the craftsman, not the service.
+    """
+    craftsman = service.craftsman
+    parts = (
+        service.updated_at.isoformat() if service.updated_at else '',
+        service.avg_rating, service.review_count,
+        service.image_variants.get('source'), sorted(service.image_variants),
+        craftsman.updated_at.isoformat() if craftsman.updated_at else '',
+        craftsman.avg_rating, craftsman.review_count,
+        craftsman.photo_variants.get('source'), sorted(craftsman.photo_variants),
+    )
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def card_cache_key(service, layout, distance=''):
+    _, template_digest = load_card_template(layout)
+    return f'findus:card:{layout}:{template_digest}:{service.pk}:{card_version(service)}:{distance}'
+
+
+@register.simple_tag
+def service_card(service, layout):
+    """
+    Render a service card from cards/<layout>.html, cached across requests
+    (and processes, with a shared CACHES backend) until the service changes:
+
+        {% service_card service 'listing' %}
+    """
+    # Set by "near" searches. Keyed on the distance as displayed, so nearby
+    # searches still share cards.
+    distance_km = getattr(service, 'distance_km', None)
+    distance = floatformat(distance_km, 1) if distance_km is not None else ''
+    key = card_cache_key(service, layout, distance)
+    html = cache.get(key)
+    if html is None:
+        card_template, _ = load_card_template(layout)
+        html = card_template.render({'service': service, 'distance_km': distance_km})
+        cache.set(key, html, CARD_CACHE_TIMEOUT)
+    return mark_safe(html)
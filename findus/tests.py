@@ -1,3 +1,1358 @@
-from django.test import TestCase
+import io
+from contextlib import contextmanager
+import itertools
+import json
+import shutil
+import tempfile
+import warnings
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, router
+from django.http import HttpResponse, QueryDict
+from django.utils.http import urlencode
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from PIL import Image
+
+from .models import *
+from .geo import craftsmen_within, geocode, grid_cell, haversine_km
+from .boosts import BoostPlacer, placements
+from .checks import check_session_cache
+from .jobs import claim, job, requeue_stale, run_pending
+from .locations import backfill_craftsman_locations, seed_states
+from .listing_cache import cache_stats, dashboard_page
+from .pagination import KeysetPaginator
+from .preferences import LOCATION_COOKIE
+from .querycount import QueryRecorder
+from .ratings import RECENCY_WEIGHT, rank_score, refresh_rank_scores, refresh_rating_aggregates
+from .related import build_related_services
+from .routers import PIN_COOKIE, ReplicaMiddleware, replica_reads
+from .search import listing_queryset, filter_services, sort_services, price_field_for
+
+
+# As configured, before FindusTestCase swaps in a per-process cache.
+CONFIGURED_CACHES = settings.CACHES
+
+# The DATABASES overrides below only change what ReplicaRouter sees; the
+# connections themselves are left alone, which is what Django warns about.
+warnings.filterwarnings('ignore', 'Overriding setting DATABASES', UserWarning)
+
+
+@override_settings(
+    STORAGES={
+        **settings.STORAGES,
+        # Pages render without a collectstatic run (and its manifest) first.
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    # Query budgets count the database, not the cache in front of it.
+    # One LocMem store behind both aliases, so cache.clear() empties both.
+    CACHES={alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+            for alias in ('default', 'results')},
+    # Sessions as deployed without Redis, read from django_session.
+    SESSION_ENGINE='django.contrib.sessions.backends.db',
+    # Reads stay on the test database whether or not DJANGO_READ_REPLICA is
+    # set; ReplicaRouterTests configure a replica where they need one.
+    DATABASES={'default': settings.DATABASES['default']},
+)
+class FindusTestCase(TestCase):
+    """Base of every test case here: the settings they all run under."""
+
+
+def make_craftsman(username='craftsman', **kwargs):
+    user = User.objects.create_user(username=username)
+    user_profile = UserProfile.objects.create(user=user, user_type='craftsman')
+    fields = dict(
+        business_name=f'{username} works',
+        service_category='plumbing',
+        services_offered='Pipes',
+        service_area='Ikeja',
+        years_of_experience='1-3',
+        description='Reliable',
+        address='1 Main Street',
+        city='Ikeja',
+        state='Lagos',
+        country='Nigeria',
+        postal_code='100001',
+        phone='08000000000',
+    )
+    fields.update(kwargs)
+    return CraftsmanProfile.objects.create(user_profile=user_profile, **fields)
+
+
+def make_customer(username='customer'):
+    user = User.objects.create_user(username=username)
+    user_profile = UserProfile.objects.create(user=user, user_type='customer')
+    return CustomerProfile.objects.create(user_profile=user_profile)
+
+
+def make_service(craftsman, **kwargs):
+    fields = dict(
+        title='Fix leaking pipe',
+        category='plumbing',
+        description='Any leak, fixed fast',
+        price_type='fixed',
+        fixed_price='100.00',
+        estimated_duration='2 hours',
+        service_status='Active',
+    )
+    fields.update(kwargs)
+    return Service.objects.create(craftsman=craftsman, **fields)
+
+
+def make_review(service, customer, rating):
+    return Review.objects.create(
+        service=service, customer=customer, rating=rating, title='Review', comment='Comment'
+    )
+
+
+class RatingAggregateTests(FindusTestCase):
+
+    def setUp(self):
+        self.craftsman = make_craftsman()
+        self.service = make_service(self.craftsman)
+        self.other_service = make_service(self.craftsman, title='Unblock drain')
+        self.customers = [make_customer(f'customer{i}') for i in range(3)]
+
+    def assertSummary(self, obj, avg_rating, review_count, histogram):
+        obj.refresh_from_db()
+        self.assertAlmostEqual(obj.avg_rating, avg_rating)
+        self.assertEqual(obj.review_count, review_count)
+        self.assertEqual(
+            [getattr(obj, f'rating_{r}_count') for r in range(1, 6)], histogram
+        )
+
+    def test_create_updates_service_and_craftsman(self):
+        make_review(self.service, self.customers[0], 5)
+        make_review(self.service, self.customers[1], 2)
+        make_review(self.other_service, self.customers[0], 4)
+
+        self.assertSummary(self.service, 3.5, 2, [0, 1, 0, 0, 1])
+        self.assertSummary(self.other_service, 4.0, 1, [0, 0, 0, 1, 0])
+        self.assertSummary(self.craftsman, 11 / 3, 3, [0, 1, 0, 1, 1])
+
+    def test_edit_and_delete_apply_deltas(self):
+        make_review(self.service, self.customers[0], 5)
+        review = Review.objects.get(customer=self.customers[0])
+
+        review.rating = 3
+        review.save()
+        self.assertSummary(self.service, 3.0, 1, [0, 0, 1, 0, 0])
+
+        review.save()
+        self.assertSummary(self.service, 3.0, 1, [0, 0, 1, 0, 0])
+
+        review.service = self.other_service
+        review.save()
+        self.assertSummary(self.service, 0.0, 0, [0, 0, 0, 0, 0])
+        self.assertSummary(self.other_service, 3.0, 1, [0, 0, 1, 0, 0])
+        self.assertSummary(self.craftsman, 3.0, 1, [0, 0, 1, 0, 0])
+
+        review.delete()
+        self.assertSummary(self.other_service, 0.0, 0, [0, 0, 0, 0, 0])
+        self.assertSummary(self.craftsman, 0.0, 0, [0, 0, 0, 0, 0])
+
+    def test_histogram_reads_stored_counts(self):
+        for customer, rating in zip(self.customers, [5, 5, 2]):
+            make_review(self.service, customer, rating)
+        service = Service.objects.get(pk=self.service.pk)
+        with self.assertNumQueries(0):
+            histogram = service.rating_histogram()
+        self.assertEqual([bucket['count'] for bucket in histogram], [2, 0, 0, 1, 0])
+        self.assertAlmostEqual(histogram[0]['percent'], 200 / 3)
+        self.assertEqual(self.other_service.rating_histogram()[0]['percent'], 0)
+
+    def test_refresh_repairs_drifted_summaries(self):
+        make_review(self.service, self.customers[0], 4)
+        make_review(self.service, self.customers[1], 1)
+        Service.objects.update(review_count=42, avg_rating=0.0, rating_4_count=0)
+        CraftsmanProfile.objects.update(review_count=0)
+
+        refresh_rating_aggregates()
+
+        self.assertSummary(self.service, 2.5, 2, [1, 0, 0, 1, 0])
+        self.assertSummary(self.other_service, 0.0, 0, [0, 0, 0, 0, 0])
+        self.assertSummary(self.craftsman, 2.5, 2, [1, 0, 0, 1, 0])
+
+
+class RankScoreTests(FindusTestCase):
+
+    def setUp(self):
+        craftsman = make_craftsman()
+        self.customers = [make_customer(f'customer{i}') for i in range(4)]
+        self.proven = make_service(craftsman, title='Proven')
+        for customer, rating in zip(self.customers, [5, 5, 4, 5]):
+            make_review(self.proven, customer, rating)
+        self.lucky = make_service(craftsman, title='Lucky')
+        make_review(self.lucky, self.customers[0], 5)
+
+    def best_rated(self, querystring='category=plumbing'):
+        return sort_services(filter_services(Service.objects.all(), QueryDict(querystring)), 'rating')
+
+    def scores(self):
+        return dict(Service.objects.values_list('pk', 'rank_score'))
+
+    def test_review_count_beats_a_single_perfect_review(self):
+        self.lucky.refresh_from_db()
+        self.assertGreater(self.lucky.avg_rating, Service.objects.get(pk=self.proven.pk).avg_rating)
+        self.assertEqual(list(self.best_rated()), [self.proven, self.lucky])
+
+    def test_reviews_and_saves_keep_the_score_current(self):
+        before = self.scores()
+        saved = SavedService.objects.create(customer=self.customers[1], service=self.lucky)
+        self.assertGreater(self.scores()[self.lucky.pk], before[self.lucky.pk])
+        saved.delete()
+        self.assertAlmostEqual(self.scores()[self.lucky.pk], before[self.lucky.pk])
+
+        Review.objects.filter(service=self.proven).first().delete()
+        current = self.scores()
+        Service.objects.update(rank_score=0)
+        refresh_rank_scores()
+        for pk, score in self.scores().items():
+            self.assertAlmostEqual(current[pk], score)
+
+    def test_a_bad_review_never_raises_the_score(self):
+        a_year_ago = timezone.now() - timedelta(days=365)
+        Review.objects.update(created_at=a_year_ago)
+        for service, customer in [(self.proven, make_customer('critic')), (self.lucky, self.customers[1])]:
+            refresh_rank_scores([service.pk])
+            before = self.scores()[service.pk]
+            make_review(service, customer, 1)
+            self.assertLess(self.scores()[service.pk], before)
+
+    def test_recency_is_a_bounded_bonus(self):
+        now = timezone.now()
+        fresh = rank_score(4.0, 20, 0, now, now)
+        self.assertAlmostEqual(fresh - rank_score(4.0, 20, 0, None, now), RECENCY_WEIGHT)
+        self.assertAlmostEqual(rank_score(4.0, 20, 0, now - timedelta(days=3650), now),
+                               rank_score(4.0, 20, 0, None, now))
+        # A new listing without reviews stays below an established one.
+        self.assertLess(rank_score(0.0, 0, 0, None, now),
+                        rank_score(4.0, 20, 0, now - timedelta(days=450), now))
+
+    @skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+    def test_sort_walks_the_category_index(self):
+        sql, params = self.best_rated().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('service_cat_rank_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class EffectivePriceTests(FindusTestCase):
+
+    def setUp(self):
+        self.craftsman = make_craftsman()
+
+    def assertPrices(self, service, effective_price, all_in_price):
+        service.refresh_from_db()
+        self.assertEqual(service.effective_price, Decimal(effective_price))
+        self.assertEqual(service.all_in_price, Decimal(all_in_price))
+
+    def test_save_sets_prices(self):
+        service = make_service(self.craftsman, price_type='hourly', hourly_rate='40.00', travel_fee='5.50')
+        self.assertPrices(service, '40.00', '45.50')
+
+        service.price_type = 'fixed'
+        service.save(update_fields=['price_type'])
+        self.assertPrices(service, '100.00', '105.50')
+
+    def test_queryset_update_uses_new_values(self):
+        service = make_service(self.craftsman)
+        Service.objects.filter(pk=service.pk).update(
+            price_type='hourly', hourly_rate=Decimal('25.00'), travel_fee=Decimal('10.00')
+        )
+        self.assertPrices(service, '25.00', '35.00')
+
+        Service.objects.filter(pk=service.pk).update(travel_fee=None)
+        self.assertPrices(service, '25.00', '25.00')
+
+    def test_bulk_writes_set_prices(self):
+        first, second = Service.objects.bulk_create([
+            Service(craftsman=self.craftsman, title='A', category='plumbing', description='A',
+                    price_type='fixed', fixed_price=Decimal('80.00'), estimated_duration='1 hour'),
+            Service(craftsman=self.craftsman, title='B', category='plumbing', description='B',
+                    price_type='hourly', hourly_rate=Decimal('30.00'), estimated_duration='1 hour'),
+        ])
+        self.assertPrices(first, '80.00', '80.00')
+
+        second.hourly_rate = Decimal('35.00')
+        second.travel_fee = Decimal('2.00')
+        Service.objects.bulk_update([second], ['hourly_rate', 'travel_fee'])
+        self.assertPrices(second, '35.00', '37.00')
+
+    def test_unusable_price_bounds_are_ignored(self):
+        cheap = make_service(self.craftsman, fixed_price='20.00')
+        dear = make_service(self.craftsman, fixed_price='200.00')
+
+        def filtered(querystring):
+            return set(filter_services(listing_queryset(), QueryDict(querystring)))
+
+        for bound in ['abc', 'NaN', 'Infinity', '-inf', '']:
+            with self.subTest(bound):
+                self.assertEqual(filtered(f'min_price={bound}&max_price={bound}'), {cheap, dear})
+        self.assertEqual(filtered('min_price=50'), {dear})
+        self.assertEqual(filtered('max_price=1e30'), {cheap, dear})
+        self.assertEqual(filtered('min_price=1e30&include_travel_fee=on'), set())
+        self.client.force_login(make_customer().user_profile.user)
+        response = self.client.get(reverse('customer_dashboard'), {'min_price': 'abc'})
+        self.assertEqual(response.status_code, 200)
+
+
+class FeatureFilterTests(FindusTestCase):
+
+    def setUp(self):
+        craftsman = make_craftsman()
+        self.plain = make_service(craftsman)
+        self.licensed = make_service(craftsman, features=['licensed'])
+        self.insured = make_service(craftsman, features=['licensed', 'insured', 'unknown'])
+
+    def filtered(self, querystring):
+        return filter_services(Service.objects.all(), QueryDict(querystring))
+
+    def test_mask_follows_writes(self):
+        self.assertEqual(self.insured.feature_mask, feature_mask(['licensed', 'insured']))
+
+        Service.objects.filter(pk=self.plain.pk).update(features=['warranty'])
+        self.plain.refresh_from_db()
+        self.assertEqual(self.plain.feature_mask, feature_mask(['warranty']))
+
+        self.plain.features = []
+        Service.objects.bulk_update([self.plain], ['features'])
+        self.plain.refresh_from_db()
+        self.assertEqual(self.plain.feature_mask, 0)
+
+    def test_any_and_all_of_filters(self):
+        self.assertCountEqual(
+            self.filtered('features=licensed&features=insured'), [self.licensed, self.insured]
+        )
+        self.assertCountEqual(
+            self.filtered('features=licensed&features=insured&features_match=all'), [self.insured]
+        )
+        self.assertCountEqual(self.filtered('features=warranty'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+    def test_filter_is_one_indexed_predicate(self):
+        query = self.filtered('features=licensed&features_match=all').order_by('-created_at')
+        sql, params = query.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('service_features_idx', plan)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ImageVariantTests(FindusTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def upload(self, size=(2000, 1000), name='photo.jpg'):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees
+        exif[0x010F] = 'Camera maker'
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_variants_are_resized_rotated_and_stripped(self):
+        service = make_service(make_craftsman(), image=self.upload())
+        self.assertEqual(service.image_variants, {})
+        self.assertEqual(run_pending(), 1)
+        service.refresh_from_db()
+        self.assertEqual(service.image_variants['source'], service.image.name)
+        self.assertEqual(
+            {name: variant['width'] for name, variant in service.image_variants.items() if name != 'source'},
+            # Rotated to 1000px wide, so the detail variant isn't upscaled.
+            {'card': 640, 'detail': 1000},
+        )
+        for format_name in ('webp', 'jpeg'):
+            with default_storage.open(service.image_variants['card'][format_name]) as f, Image.open(f) as image:
+                self.assertEqual(image.size, (640, 1280))
+                self.assertEqual(len(image.getexif()), 0)
+
+        variants = service.image_variants
+        service.image = None
+        service.save()
+        run_pending()
+        self.assertEqual(Service.objects.get(pk=service.pk).image_variants, {})
+        self.assertFalse(default_storage.exists(variants['card']['webp']))
+
+    def test_template_tag_emits_srcset(self):
+        craftsman = make_craftsman(profile_photo=self.upload(size=(400, 400), name='me.png'))
+        run_pending()
+        craftsman.refresh_from_db()
+        html = Template(
+            "{% load responsive_images %}"
+            "{% responsive_image c.profile_photo c.photo_variants 'avatar' sizes='50px' alt=c.business_name %}"
+        ).render(Context({'c': craftsman}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('-avatar.webp 160w', html)
+        self.assertIn('-card.jpeg 400w', html)
+        self.assertIn('alt="craftsman works"', html)
+
+        craftsman.photo_variants = {}
+        html = Template(
+            "{% load responsive_images %}{% responsive_image c.profile_photo c.photo_variants 'avatar' %}"
+        ).render(Context({'c': craftsman}))
+        self.assertEqual(html, f'<img src="{craftsman.profile_photo.url}">')
+
+
+@job(max_attempts=2)
+def flaky_job(service_id):
+    service = Service.objects.get(pk=service_id)
+    service.title = 'Ran'
+    service.save()
+    if Job.objects.get(name=flaky_job.job_name).attempts < 2:
+        raise RuntimeError('first attempt fails')
+
+
+class JobQueueTests(FindusTestCase):
+
+    def setUp(self):
+        self.craftsman = make_craftsman()
+        self.service = make_service(self.craftsman)
+
+    def test_retries_with_backoff_then_succeeds(self):
+        flaky_job.delay(self.service.pk)
+        with self.assertLogs('findus.jobs', 'ERROR'):
+            self.assertEqual(run_pending(), 0)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('first attempt fails', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(run_pending(), 1)
+        self.assertFalse(Job.objects.exists())
+
+    def test_gives_up_after_max_attempts(self):
+        flaky_job.delay(0)
+        for _ in range(2):
+            Job.objects.update(run_at=timezone.now())
+            with self.assertLogs('findus.jobs', 'ERROR'):
+                run_pending()
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_a_job_is_claimed_once(self):
+        flaky_job.delay(self.service.pk)
+        self.assertEqual(len(claim(5, 'worker-a')), 1)
+        self.assertEqual(claim(5, 'worker-b'), [])
+
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(len(claim(5, 'worker-b')), 1)
+
+    def test_a_job_that_keeps_killing_its_worker_fails(self):
+        flaky_job.delay(self.service.pk)
+        for attempt in range(1, flaky_job.max_attempts + 1):
+            self.assertEqual(len(claim(5)), 1)
+            Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+            if attempt < flaky_job.max_attempts:
+                self.assertEqual(requeue_stale(), 1)
+        with self.assertLogs('findus.jobs', 'ERROR'):
+            self.assertEqual(requeue_stale(), 0)
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+        self.assertEqual(claim(5), [])
+
+    def test_profile_deletion_runs_in_the_worker(self):
+        make_review(self.service, make_customer(), 4)
+        self.client.force_login(self.craftsman.user_profile.user)
+        response = self.client.get('/craftsman-profile/?delete=true')
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.assertTrue(CraftsmanProfile.objects.filter(pk=self.craftsman.pk).exists())
+
+        # Gone from the site before the worker gets to it.
+        self.assertFalse(dashboard_page(QueryDict(''), 9).paginator.count)
+        self.assertEqual(self.client.get(f'/craftsman/{self.craftsman.pk}/').status_code, 404)
+        self.assertRedirects(self.client.get('/craftsman-dashboard/'), '/', fetch_redirect_response=False)
+
+        self.assertEqual(run_pending(), 1)
+        self.assertFalse(CraftsmanProfile.objects.filter(pk=self.craftsman.pk).exists())
+        self.assertFalse(Service.objects.exists())
+        self.assertFalse(Review.objects.exists())
+
+
+class StaticBundleTests(FindusTestCase):
+
+    def test_templates_have_no_extractable_inline_blocks(self):
+        out = io.StringIO()
+        call_command('extract_inline_assets', dry_run=True, stdout=out)
+        self.assertIn('0 bundle(s)', out.getvalue())
+
+    def test_pages_link_their_bundles(self):
+        response = self.client.get('/signin/')
+        self.assertContains(response, '<link rel="stylesheet" href="/static/findus/css/signin.css">')
+        self.assertNotContains(response, '<style')
+
+    def test_a_second_bundle_is_named_after_what_it_styles(self):
+        response = self.client.get('/')
+        self.assertContains(response, '/static/findus/css/home.css')
+        self.assertContains(response, '/static/findus/css/home-testimonial-author.css')
+
+
+class LocationTests(FindusTestCase):
+
+    def setUp(self):
+        seed_states()
+        self.ikeja = make_service(make_craftsman('ikeja', city='Ikeja', state='Lagos State'))
+        self.lekki = make_service(make_craftsman('lekki', city='Lekki', state='lagos'))
+        self.ibadan = make_service(make_craftsman('ibadan', city='Ibadan', state='Oyo'))
+
+    def filtered(self, location):
+        services = filter_services(listing_queryset(), QueryDict(urlencode({'location': location})))
+        return list(services.order_by('id'))
+
+    def test_profiles_link_to_canonical_city(self):
+        craftsman = self.ikeja.craftsman
+        self.assertEqual(craftsman.location.name, 'Ikeja')
+        self.assertEqual(craftsman.location.parent, Location.objects.resolve('LA'))
+
+        craftsman.city = 'Yaba'
+        craftsman.save()
+        craftsman.refresh_from_db()
+        self.assertEqual(str(craftsman.location), 'Yaba, Lagos')
+
+    def test_state_aliases_include_all_cities(self):
+        for text in ['Lagos', 'lagos state', 'LA', ' Eko ']:
+            with self.subTest(text=text):
+                self.assertEqual(self.filtered(text), [self.ikeja, self.lekki])
+
+    def test_city_and_unknown_locations(self):
+        self.assertEqual(self.filtered('ikeja'), [self.ikeja])
+        self.assertEqual(self.filtered('Ibad'), [self.ibadan])
+        self.assertEqual(self.filtered('Kano'), [])
+
+    def test_state_codes_only_in_capitals(self):
+        self.assertEqual(Location.objects.resolve_search('GO').name, 'Gombe')
+        self.assertIsNone(Location.objects.resolve_search('go'))
+        # Free text, not Gombe: "go" as in Lagos.
+        self.assertEqual(self.filtered('go'), [self.ikeja, self.lekki])
+        self.assertEqual(self.filtered('GO'), [])
+
+    def test_backfill_links_existing_profiles(self):
+        CraftsmanProfile.objects.update(location=None)
+        self.assertEqual(backfill_craftsman_locations(), 3)
+        self.assertEqual(self.filtered('Oyo State'), [self.ibadan])
+
+
+class RadiusSearchTests(FindusTestCase):
+
+    def setUp(self):
+        seed_states()
+        self.ikeja = make_service(make_craftsman('ikeja', city='Ikeja', state='Lagos'))
+        self.yaba = make_service(make_craftsman('yaba', city='Yaba', state='Lagos State'))
+        self.lekki = make_service(make_craftsman('lekki', city='Lekki', state='LA'))
+        self.abuja = make_service(make_craftsman('abuja', city='Garki', state='Abuja'))
+
+    def nearby(self, querystring):
+        params = QueryDict(querystring)
+        services = filter_services(listing_queryset(), params)
+        return list(sort_services(services, params.get('sort', '')))
+
+    def test_profiles_are_geocoded_offline(self):
+        craftsman = self.abuja.craftsman
+        self.assertEqual((craftsman.latitude, craftsman.longitude), geocode('Garki', 'Federal Capital Territory'))
+        self.assertEqual(craftsman.geo_cell, grid_cell(craftsman.latitude, craftsman.longitude))
+        self.assertEqual(geocode('Nowhere', 'Atlantis', '900211'), geocode(state='Federal Capital Territory'))
+        self.assertIsNone(geocode('Nowhere', 'Atlantis'))
+
+    def test_radius_filter_orders_by_distance(self):
+        services = self.nearby('near=Yaba&distance=25')
+        self.assertEqual(services, [self.yaba, self.ikeja, self.lekki])
+        self.assertEqual(services[0].distance_km, 0)
+        self.assertAlmostEqual(
+            services[1].distance_km,
+            haversine_km(*geocode('Yaba', 'Lagos'), *geocode('Ikeja', 'Lagos')),
+            places=3,
+        )
+        self.assertEqual(self.nearby('near=Yaba&distance=15'), [self.yaba, self.ikeja])
+        self.assertEqual(self.nearby('near=yaba&sort=price_low_high'), [self.yaba])
+        self.assertEqual(self.nearby('near=9.03,7.49&distance=5'), [self.abuja])
+        self.assertEqual(self.nearby('near=Atlantis'), [])
+
+    def test_grid_pruning_matches_exact_distance(self):
+        center = geocode('Yaba', 'Lagos')
+        for radius in [1, 10, 50, 800]:
+            expected = {
+                craftsman.pk for craftsman in CraftsmanProfile.objects.all()
+                if haversine_km(*center, craftsman.latitude, craftsman.longitude) <= radius
+            }
+            candidates = set(craftsmen_within(*center, radius).values_list('pk', flat=True))
+            with self.subTest(radius=radius):
+                self.assertLessEqual(expected, candidates)
+
+
+class KeysetPaginationTests(FindusTestCase):
+
+    def setUp(self):
+        cache.clear()
+        craftsman = make_craftsman()
+        self.services = [
+            make_service(craftsman, title=f'Service {i}', fixed_price=str(10 * (i % 3)))
+            for i in range(8)
+        ]
+        # Ties on the sort key have to be broken by id.
+        Service.objects.filter(pk__in=[s.pk for s in self.services[2:5]]).update(
+            created_at=self.services[2].created_at
+        )
+
+    def walk(self, queryset, per_page=3):
+        paginator = KeysetPaginator(queryset, per_page)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_token))
+        backwards = [pages[-1]]
+        while backwards[-1].has_previous():
+            backwards.append(paginator.get_page(backwards[-1].previous_token))
+        return pages, backwards[::-1]
+
+    def test_forward_and_backward_walks_cover_ordering(self):
+        for ordering in [['-created_at'], ['effective_price'], ['-effective_price'], ['-avg_rating']]:
+            queryset = Service.objects.order_by(*ordering)
+            expected = list(queryset.order_by(*ordering, 'id'))
+            with self.subTest(ordering=ordering):
+                forward, backward = self.walk(queryset)
+                self.assertEqual([s for page in forward for s in page], expected)
+                self.assertEqual(
+                    [list(page) for page in backward], [list(page) for page in forward]
+                )
+                self.assertEqual([page.start_index() for page in forward], [1, 4, 7])
+                self.assertEqual(forward[-1].end_index(), 8)
+
+    def test_invalid_token_returns_first_page(self):
+        paginator = KeysetPaginator(Service.objects.order_by('-created_at'), 3)
+        page = paginator.get_page('not-a-token')
+        self.assertEqual(list(page), list(Service.objects.order_by('-created_at', 'id')[:3]))
+        self.assertFalse(page.has_previous())
+
+    def test_count_is_cached(self):
+        queryset = Service.objects.order_by('-created_at')
+        self.assertEqual(KeysetPaginator(queryset, 3).count, 8)
+        with self.assertNumQueries(0):
+            self.assertEqual(KeysetPaginator(queryset, 3).count, 8)
+            self.assertEqual(KeysetPaginator(queryset, 3, cache_count=False, count=5).count, 5)
+
+    def test_own_lists_count_the_latest_writes(self):
+        customer = make_customer()
+        self.client.force_login(customer.user_profile.user)
+        SavedService.objects.create(customer=customer, service=self.services[0])
+        self.assertEqual(self.client.get(reverse('saved_services')).context['page_obj'].paginator.count, 1)
+        SavedService.objects.create(customer=customer, service=self.services[1])
+        self.assertEqual(self.client.get(reverse('saved_services')).context['page_obj'].paginator.count, 2)
+
+        self.client.force_login(self.services[0].craftsman.user_profile.user)
+        count = self.client.get(reverse('craftsman_dashboard')).context['services'].paginator.count
+        make_service(self.services[0].craftsman, title='Another')
+        self.assertEqual(
+            self.client.get(reverse('craftsman_dashboard')).context['services'].paginator.count, count + 1
+        )
+
+
+@mock.patch('findus.listing_cache.STATS_SAMPLE', 1)
+class ListingCacheTests(FindusTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.craftsman = make_craftsman()
+        self.plumbing = [make_service(self.craftsman, title=f'Pipe {i}') for i in range(3)]
+        self.electrical = make_service(self.craftsman, category='electrical')
+
+    def page(self, querystring):
+        return dashboard_page(QueryDict(querystring), 2)
+
+    def test_repeat_requests_hit_the_cache(self):
+        first = self.page('category=plumbing&materials_included=&q=Pipe')
+        with self.assertNumQueries(1):
+            second = self.page('q=+pipe &category=plumbing&ref=x')
+        self.assertEqual(list(second), list(first))
+        self.assertEqual(second.paginator.count, first.paginator.count)
+        self.assertEqual(second.next_token, first.next_token)
+        self.assertEqual(cache_stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_pages_share_one_count(self):
+        first = self.page('category=plumbing')
+        with QueryRecorder() as recorder:
+            second = self.page(f'category=plumbing&cursor={first.next_token}')
+        self.assertEqual(second.paginator.count, 3)
+        self.assertFalse([query.sql for query in recorder.queries if 'COUNT(' in query.sql])
+
+    def test_state_codes_keep_their_case_in_the_key(self):
+        seed_states()
+        lagos = make_service(make_craftsman('lagos', city='Ikeja', state='Lagos'), category='painting')
+        lafia = make_service(make_craftsman('lafia', city='Lafia', state='Nasarawa'), category='painting')
+        self.assertEqual(set(self.page('category=painting&location=la')), {lagos, lafia})
+        self.assertEqual(list(self.page('category=painting&location=LA')), [lagos])
+
+    def test_writes_invalidate_only_their_category(self):
+        self.page('category=plumbing')
+        self.page('')
+
+        self.electrical.title = 'Rewiring'
+        self.electrical.save()
+        self.page('category=plumbing')
+        self.assertEqual(cache_stats()['hits'], 1)
+        self.page('')
+        self.assertEqual(cache_stats()['misses'], 3)
+
+        new = make_service(self.craftsman, title='New pipe')
+        self.assertEqual(list(self.page('category=plumbing')), [new, self.plumbing[2]])
+
+        make_review(self.plumbing[0], make_customer(), 5)
+        self.page('category=plumbing&sort=rating')
+        self.assertEqual(self.page('category=plumbing&sort=rating')[0], self.plumbing[0])
+
+    def test_moving_a_service_invalidates_both_categories(self):
+        self.assertEqual(self.page('category=electrical').paginator.count, 1)
+        service = Service.objects.get(pk=self.plumbing[0].pk)
+        service.category = 'electrical'
+        service.save()
+        self.assertEqual(self.page('category=electrical').paginator.count, 2)
+        self.assertEqual(self.page('category=plumbing').paginator.count, 2)
+
+    def test_craftsman_changes_invalidate_their_services(self):
+        self.assertEqual(self.page('location=Ikeja').paginator.count, 4)
+        self.craftsman.city = 'Abuja'
+        self.craftsman.state = 'FCT'
+        self.craftsman.save()
+        self.assertEqual(self.page('location=Ikeja').paginator.count, 0)
+
+
+@skipUnless(connection.vendor == 'sqlite', "FTS5 index is SQLite specific")
+class ServiceCardTests(FindusTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.craftsman = make_craftsman()
+        self.service = make_service(self.craftsman, title='Fix leaking pipe')
+
+    def render(self, layout='listing'):
+        service = listing_queryset().get(pk=self.service.pk)
+        return Template(
+            "{% load service_cards %}{% service_card service layout %}"
+        ).render(Context({'service': service, 'layout': layout}))
+
+    def test_cards_are_served_from_the_cache(self):
+        first = self.render()
+        self.assertIn('Fix leaking pipe', first)
+        # A write that bypasses save() and every version field isn't seen.
+        Service.objects.filter(pk=self.service.pk).update(title='Changed')
+        self.assertEqual(self.render(), first)
+        self.assertNotEqual(self.render('profile'), first)
+
+    def test_saves_and_reviews_retire_cached_cards(self):
+        self.render()
+        self.service.title = 'Unblock drain'
+        self.service.save()
+        self.assertIn('Unblock drain', self.render())
+
+        make_review(self.service, make_customer(), 4)
+        self.assertIn('4.0 (1)', self.render())
+
+        self.craftsman.business_name = 'Drain Masters'
+        self.craftsman.save()
+        self.assertIn('Drain Masters', self.render())
+
+    def test_distance_is_part_of_the_card(self):
+        service = listing_queryset().get(pk=self.service.pk)
+        template = Template("{% load service_cards %}{% service_card service 'listing' %}")
+        service.distance_km = 3.14
+        self.assertIn('3.1 km away', template.render(Context({'service': service})))
+        service.distance_km = 12.0
+        self.assertIn('12.0 km away', template.render(Context({'service': service})))
+
+
+class ConditionalGetTests(FindusTestCase):
+
+    def setUp(self):
+        self.craftsman = make_craftsman()
+        self.service = make_service(self.craftsman)
+        self.customer = make_customer()
+        self.client.force_login(self.customer.user_profile.user)
+
+    def test_unchanged_pages_get_304(self):
+        for url in [f'/service/{self.service.pk}/', f'/craftsman/{self.craftsman.pk}/']:
+            first = self.client.get(url)
+            self.assertIn('no-cache', first['Cache-Control'])
+            etag = first['ETag']
+            # The session, the user, then the validator row.
+            with self.assertNumQueries(3):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        url = f'/service/{self.service.pk}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_and_other_users_get_the_page(self):
+        url = f'/service/{self.service.pk}/'
+        etag = self.client.get(url)['ETag']
+        make_review(self.service, self.customer, 5)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(make_customer('other').user_profile.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        profile_url = f'/craftsman/{self.craftsman.pk}/'
+        etag = self.client.get(profile_url)['ETag']
+        make_service(self.craftsman, title='Install boiler')
+        self.assertEqual(self.client.get(profile_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_rotated_csrf_token_gets_the_page(self):
+        url = f'/service/{self.service.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # As after logging out and back in: the forms need the new token.
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class LocationPreferenceTests(FindusTestCase):
+
+    def setUp(self):
+        seed_states()
+        self.client.force_login(make_customer().user_profile.user)
+
+    def session_writes(self, request):
+        with QueryRecorder() as recorder:
+            response = request()
+        return response, [
+            query.sql for query in recorder.queries
+            if 'django_session' in query.sql and not query.sql.startswith('SELECT')
+        ]
+
+    def test_location_lives_in_a_signed_cookie(self):
+        save = lambda state: self.client.post(reverse('save_location'), {'state': state, 'city': 'Ikeja'})
+        response, writes = self.session_writes(lambda: save('Lagos State'))
+        self.assertEqual(writes, [])
+        self.assertIn(LOCATION_COOKIE, response.cookies)
+        dashboard = self.client.get(reverse('customer_dashboard'), {'q': 'plumber'})
+        self.assertEqual(dashboard.context['user_state'], 'Lagos')
+
+        # Saving the same value again sends nothing.
+        response, writes = self.session_writes(lambda: save('Lagos'))
+        self.assertEqual((writes, dict(response.cookies)), ([], {}))
+
+        # A tampered cookie is ignored.
+        self.client.cookies[LOCATION_COOKIE] = '["Kano", ""]'
+        dashboard = self.client.get(reverse('customer_dashboard'), {'q': 'plumber'})
+        self.assertEqual(dashboard.context['user_state'], '')
+
+    def test_dashboard_only_writes_changes(self):
+        url = reverse('customer_dashboard')
+        auto = {'location': 'Lagos State', 'auto_detect': 'true'}
+        response, writes = self.session_writes(lambda: self.client.get(url, auto))
+        self.assertEqual((writes, response.context['user_state']), ([], 'Lagos'))
+        self.assertIn(LOCATION_COOKIE, response.cookies)
+        self.assertNotIn(LOCATION_COOKIE, self.client.get(url, auto).cookies)
+
+        # Clear Filters forgets it, once.
+        cleared = self.client.get(url)
+        self.assertEqual(cleared.cookies[LOCATION_COOKIE].value, '')
+        self.assertNotIn(LOCATION_COOKIE, self.client.get(url).cookies)
+
+    def test_session_location_is_moved_to_the_cookie(self):
+        session = self.client.session
+        session['user_state'] = 'Oyo'
+        session.save()
+        url = reverse('customer_dashboard')
+        self.assertEqual(self.client.get(url, {'q': 'x'}).context['user_state'], 'Oyo')
+        self.client.get(url, {'q': 'x', 'location': 'Kano', 'auto_detect': 'true'})
+        self.assertNotIn('user_state', self.client.session)
+        self.assertEqual(self.client.get(url, {'q': 'x'}).context['user_state'], 'Kano')
+
+
+class RoleTests(FindusTestCase):
+
+    def setUp(self):
+        self.craftsman = make_craftsman()
+        self.customer = make_customer()
+
+    def test_profile_comes_with_the_user(self):
+        self.client.force_login(self.customer.user_profile.user)
+        # The session, then the user with both profiles.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('customer_profile'))
+        self.assertEqual(response.context['customer'], self.customer)
+
+    def test_roles_are_enforced(self):
+        self.client.force_login(self.customer.user_profile.user)
+        self.assertRedirects(self.client.get(reverse('craftsman_dashboard')), reverse('home'))
+        self.client.force_login(self.craftsman.user_profile.user)
+        self.assertRedirects(self.client.get(reverse('saved_services')), reverse('home'))
+        self.assertEqual(self.client.get(reverse('craftsman_profile')).status_code, 200)
+        self.client.logout()
+        response = self.client.get(reverse('craftsman_profile'))
+        self.assertTrue(response['Location'].startswith(settings.LOGIN_URL))
+
+    def test_signin_redirects_by_role(self):
+        for profile, dashboard in [(self.craftsman, 'craftsman_dashboard'), (self.customer, 'customer_dashboard')]:
+            user = profile.user_profile.user
+            user.set_password('secret-pass')
+            user.save()
+            response = self.client.post(reverse('signin'), {'username': user.username, 'password': 'secret-pass'})
+            self.assertRedirects(response, reverse(dashboard), fetch_redirect_response=False)
+
+        self.client.logout()
+        orphan = User.objects.create_user('orphan', password='secret-pass')
+        response = self.client.post(reverse('signin'), {'username': orphan.username, 'password': 'secret-pass'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+class RelatedServiceTests(FindusTestCase):
+
+    def setUp(self):
+        craftsman = make_craftsman(is_verified=True)
+        listings = [
+            ('plumbing', 'Fix leaking kitchen pipe', 'Leaking pipe under the sink'),
+            ('plumbing', 'Kitchen pipe repair', 'Burst pipe or leaking tap'),
+            ('plumbing', 'Drain unblocking', 'Blocked drains cleared'),
+            ('electrical', 'Install ceiling fan', 'Ceiling fan wiring'),
+            ('electrical', 'Rewire ceiling lights', 'Old wiring replaced'),
+            ('painting', 'Paint living room', 'Walls and doors'),
+            ('tiling', 'Tile bathroom floor', 'Porcelain tiles'),
+            ('carpentry', 'Build wardrobe', 'Made to measure'),
+        ]
+        self.services = [
+            make_service(craftsman, category=category, title=title, description=description)
+            for category, title, description in listings
+        ]
+
+    def neighbours(self, service):
+        return list(service.neighbours.values_list('related__title', flat=True))
+
+    def test_text_category_and_cosaves(self):
+        pipe, kitchen, drain, fan, rewire, paint = self.services[:6]
+        customer = make_customer()
+        SavedService.objects.create(customer=customer, service=pipe)
+        SavedService.objects.create(customer=customer, service=paint)
+        self.assertEqual(build_related_services(), 8)
+
+        self.assertEqual(self.neighbours(pipe), [kitchen.title, paint.title])
+        self.assertEqual(self.neighbours(fan), [rewire.title])
+        self.assertEqual(self.neighbours(drain), [])
+
+    def test_incremental_rebuild(self):
+        pipe, kitchen, drain = self.services[:3]
+        build_related_services()
+        self.assertEqual(build_related_services(), 0)
+
+        drain.title = 'Unblock sink drain'
+        drain.save()
+        self.assertEqual(build_related_services(), 2)
+        self.assertEqual(self.neighbours(pipe), [kitchen.title, drain.title])
+
+    def test_detail_page_reads_the_list(self):
+        pipe, kitchen = self.services[:2]
+        build_related_services()
+        kitchen.service_status = 'Inactive'
+        kitchen.save()
+        self.client.force_login(make_customer().user_profile.user)
+        with QueryRecorder() as recorder:
+            response = self.client.get(reverse('service_detail', args=[self.services[3].pk]))
+        self.assertEqual([s.title for s in response.context['related_services']], ['Rewire ceiling lights'])
+        self.assertEqual(sum('findus_relatedservice' in query.sql for query in recorder.queries), 2)
+
+        # Nothing left in the list: the newest services in the category.
+        response = self.client.get(reverse('service_detail', args=[pipe.pk]))
+        self.assertEqual(
+            [s.title for s in response.context['related_services']], ['Drain unblocking'],
+        )
+
+
+class BoostPlacementTests(FindusTestCase):
+
+    def setUp(self):
+        craftsman = make_craftsman()
+        self.services = [make_service(craftsman, title=f'Pipe {i}') for i in range(10)]
+        self.lagos = Location.objects.for_address('', 'Lagos')
+        Location.objects.for_address('Ikeja', 'Lagos')
+        self.start = timezone.now() - timedelta(days=1)
+        self.boost = self.make_boost(self.services[0], category='plumbing', location=self.lagos)
+        placements.expire()
+        self.addCleanup(placements.expire)
+
+    def make_boost(self, service, **kwargs):
+        fields = dict(
+            impression_budget=100, starts_at=self.start, ends_at=self.start + timedelta(days=10),
+        )
+        fields.update(kwargs)
+        return Boost.objects.create(service=service, **fields)
+
+    def test_targeting(self):
+        placer = BoostPlacer()
+        self.assertEqual(placer.place('plumbing', 'Ikeja'), [self.services[0]])
+        self.assertEqual(placer.place('plumbing', 'lagos state'), [self.services[0]])
+        self.assertEqual(placer.place('electrical', 'Ikeja'), [])
+        self.assertEqual(placer.place('plumbing', 'Abuja'), [])
+        self.assertEqual(placer.place('plumbing', 'Ikeja', exclude=[self.services[0].pk]), [])
+
+    def test_pacing_counts_in_memory_and_flushes_in_batches(self):
+        placer = BoostPlacer()
+        placer.place()
+        now = self.start + timedelta(days=1)
+        with self.assertNumQueries(0):
+            served = [placer.place('plumbing', 'Ikeja', now=now) for _ in range(20)]
+        # A tenth of the run gone: 10% of the budget, plus the 2% slack.
+        self.assertEqual(sum(map(len, served)), 12)
+        self.boost.refresh_from_db()
+        self.assertEqual(self.boost.impressions, 0)
+
+        placer.flush()
+        self.boost.refresh_from_db()
+        self.assertEqual(self.boost.impressions, 12)
+        placer.expire()
+        self.assertEqual(placer.place('plumbing', 'Ikeja', now=now), [])
+
+    def test_dashboard_shows_boost_above_results(self):
+        self.client.force_login(make_customer().user_profile.user)
+        response = self.client.get(reverse('customer_dashboard'), {'category': 'plumbing', 'location': 'Ikeja'})
+        self.assertEqual(response.context['boosted_services'], [self.services[0]])
+        self.assertNotIn(self.services[0], list(response.context['page_obj']))
+        self.assertContains(response, 'Sponsored')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        placements.flush()
+
+
+class ServiceSearchTests(FindusTestCase):
+
+    def setUp(self):
+        self.craftsman = make_craftsman(business_name='Aqua Masters', services_offered='Boreholes')
+        self.pipe = make_service(self.craftsman, title='Leaking pipe repair', description='Pipes and taps')
+        self.drain = make_service(self.craftsman, title='Drain unblocking', description='Blocked pipe or sink')
+        self.roof = make_service(
+            make_craftsman('roofer', business_name='Top Roofs', services_offered='Gutters'),
+            title='Roof leak patching', category='roofing', description='Stop roof leaks',
+        )
+
+    def search(self, querystring):
+        params = QueryDict(querystring)
+        services = sort_services(filter_services(listing_queryset(), params), params.get('sort', ''))
+        return list(services)
+
+    def test_ranks_title_matches_first(self):
+        self.assertEqual(self.search('q=pipe'), [self.pipe, self.drain])
+
+    def test_prefix_stemming_and_craftsman_fields(self):
+        self.assertEqual(self.search('q=leak'), [self.roof, self.pipe])
+        self.assertCountEqual(self.search('q=aqua mast'), [self.drain, self.pipe])
+        self.assertEqual(self.search('q=gutter'), [self.roof])
+
+    def test_combines_with_filters_and_ignores_query_syntax(self):
+        self.assertEqual(self.search('q=leak&category=roofing'), [self.roof])
+        self.assertEqual(self.search('q=pipe&sort=newest'), [self.drain, self.pipe])
+        self.assertEqual(self.search('q=" OR NEAR( *'), [])
+
+    def test_index_follows_service_and_craftsman_writes(self):
+        self.pipe.title = 'Tap replacement'
+        self.pipe.save()
+        self.assertEqual(self.search('q=tap'), [self.pipe])
+
+        self.craftsman.business_name = 'Flow Experts'
+        self.craftsman.save()
+        self.assertCountEqual(self.search('q=flow'), [self.drain, self.pipe])
+        self.assertEqual(self.search('q=aqua'), [])
+
+        self.drain.delete()
+        self.assertEqual(self.search('q=flow'), [self.pipe])
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+class ServiceListingIndexTests(FindusTestCase):
+    """
+    Every customer_dashboard filter combination must be answered from an
+    index on findus_service rather than a full table scan.
+    """
+
+    FILTER_VALUES = {
+        'category': 'plumbing',
+        'price_type': 'hourly',
+        'availability': 'immediate',
+        'job_size': 'small',
+        'materials_included': 'on',
+    }
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesServiceIndex(self, queryset, label):
+        plan = self.query_plan(queryset)
+        service_steps = [step for step in plan if 'findus_service' in step]
+        self.assertTrue(service_steps, f"{label}: findus_service missing from plan {plan}")
+        for step in service_steps:
+            self.assertIn('INDEX', step, f"{label}: full scan in plan {plan}")
+        self.assertFalse(
+            any('TEMP B-TREE' in step for step in plan),
+            f"{label}: ordering not served by an index in plan {plan}",
+        )
+
+    def test_dashboard_filter_combinations_use_indexes(self):
+        names = list(self.FILTER_VALUES)
+        for size in range(len(names) + 1):
+            for combination in itertools.combinations(names, size):
+                params = QueryDict(mutable=True)
+                for name in combination:
+                    params[name] = self.FILTER_VALUES[name]
+                services = sort_services(filter_services(listing_queryset(), params), '')
+                with self.subTest(filters=combination):
+                    self.assertUsesServiceIndex(services[:9], combination or 'no filters')
+
+    def test_price_filters_and_sorts_use_price_indexes(self):
+        cases = [
+            ('category=plumbing&min_price=10&max_price=90&sort=price_low_high', 'service_cat_price_idx'),
+            ('category=plumbing&sort=price_high_low', 'service_cat_price_idx'),
+            ('sort=price_low_high', 'service_price_idx'),
+            ('min_price=10&include_travel_fee=on&sort=price_low_high', 'service_allin_idx'),
+            ('category=plumbing&max_price=50&include_travel_fee=on&sort=price_low_high', 'service_cat_allin_idx'),
+        ]
+        for querystring, index in cases:
+            params = QueryDict(querystring)
+            services = sort_services(
+                filter_services(listing_queryset(), params), params.get('sort'), price_field_for(params)
+            )
+            with self.subTest(querystring=querystring):
+                self.assertUsesServiceIndex(services[:9], querystring)
+                self.assertIn(index, ' '.join(self.query_plan(services[:9])))
+
+    def test_active_service_queries_use_partial_indexes(self):
+        craftsman = make_craftsman()
+        related = Service.objects.filter(
+            category='plumbing', service_status='Active', craftsman__is_verified=True
+        ).exclude(id=1).order_by('-created_at')[:4]
+        self.assertIn('service_active_cat_idx', ' '.join(self.query_plan(related)))
+
+        public = Service.objects.filter(
+            craftsman=craftsman, service_status='Active'
+        ).order_by('-created_at')
+        self.assertIn('service_active_craftsman_idx', ' '.join(self.query_plan(public)))
+
+
+class QueryBudgetTests(FindusTestCase):
+    """
+    A query budget for every view in findus/urls.py, with enough rows that
+    a per-row query blows it. Caches start cold, so these are worst cases.
+    """
+
+    # url name: (method, user, url kwargs, budget)
+    BUDGETS = {
+        'home': ('get', None, {}, 0),
+        'signin': ('get', None, {}, 0),
+        'register_craftsman': ('get', None, {}, 0),
+        'change_password': ('get', 'customer', {}, 2),
+        'customer_dashboard': ('get', 'customer', {}, 5),
+        'listing_cache_stats': ('get', 'staff', {}, 2),
+        'service_detail': ('get', 'customer', {'service_id': 'service'}, 6),
+        'customer_profile': ('get', 'customer', {}, 2),
+        'save_location': ('post', 'customer', {}, 1),
+        'craftsman_dashboard': ('get', 'craftsman', {}, 3),
+        'craftsman_profile': ('get', 'craftsman', {}, 2),
+        'craftsman_public_profile': ('get', 'customer', {'craftsman_id': 'craftsman'}, 5),
+        'craftsman_ad_boost': ('get', 'craftsman', {}, 3),
+        'saved_services': ('get', 'customer', {}, 4),
+        'save_service': ('post', 'customer', {'service_id': 'service'}, 6),
+        'unsave_service': ('post', 'customer', {'service_id': 'service'}, 8),
+        'logout': ('get', 'customer', {}, 4),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.craftsmen = [make_craftsman(f'craftsman{i}', is_verified=True) for i in range(3)]
+        customers = [make_customer(f'customer{i}') for i in range(3)]
+        services = [
+            make_service(craftsman, title=f'Service {i}', features=['licensed', 'insured'])
+            for craftsman in cls.craftsmen for i in range(4)
+        ]
+        for customer in customers:
+            for service in services[::2]:
+                make_review(service, customer, 4)
+                SavedService.objects.create(customer=customer, service=service)
+        cls.users = {
+            'customer': customers[0].user_profile.user,
+            'craftsman': cls.craftsmen[0].user_profile.user,
+            'staff': User.objects.create_user('staff', is_staff=True),
+        }
+        build_related_services()
+        cls.objects = {'service': services[0], 'craftsman': cls.craftsmen[0]}
+
+    @contextmanager
+    def assertQueryBudget(self, budget, label):
+        with QueryRecorder(capture_stacks=True) as recorder:
+            yield recorder
+        if recorder.count > budget:
+            self.fail(f"{label} ran over its budget of {budget}: {recorder.report()}")
+
+    def test_every_view_has_a_budget(self):
+        names = {pattern.name for pattern in get_resolver('findus.urls').url_patterns}
+        self.assertEqual(names, set(self.BUDGETS))
+
+    def test_views_stay_within_budget(self):
+        for name, (method, user, kwargs, budget) in self.BUDGETS.items():
+            with self.subTest(name):
+                cache.clear()
+                placements.expire()
+                self.client.logout()
+                if user:
+                    self.client.force_login(self.users[user])
+                url = reverse(name, kwargs={key: self.objects[value].pk for key, value in kwargs.items()})
+                with self.assertQueryBudget(budget, name) as recorder:
+                    response = getattr(self.client, method)(url)
+                self.assertLess(response.status_code, 400)
+
+    @override_settings(CACHES=CONFIGURED_CACHES)
+    def test_cached_dashboard_under_the_configured_cache(self):
+        cache.clear()
+        self.client.force_login(self.users['customer'])
+        url = reverse('customer_dashboard')
+        with QueryRecorder() as cold:
+            self.client.get(url)
+        budget = min(cold.count, self.BUDGETS['customer_dashboard'][3])
+        with self.assertQueryBudget(budget, 'a cached customer_dashboard'):
+            response = self.client.get(url)
+        # Cache writes don't pin the visitor to the primary.
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_report_points_at_the_template(self):
+        template = Template(
+            "{% for service in services %}{{ service.craftsman.business_name }}{% endfor %}"
+        )
+        with QueryRecorder(capture_stacks=True) as recorder:
+            template.render(Context({'services': Service.objects.all()}))
+        self.assertEqual(list(recorder.repeated().values()), [12])
+        self.assertIn('{{ service.craftsman.business_name }}', recorder.report())
+
+    def test_middleware_logs_queries_per_url_name(self):
+        self.client.force_login(self.users['staff'])
+        with self.assertLogs('findus.querycount', 'DEBUG') as logs:
+            self.client.get(reverse('listing_cache_stats'))
+        self.assertEqual(
+            [record.getMessage().split(',')[0] for record in logs.records],
+            ['GET listing_cache_stats: 2 queries (0 duplicate)'],
+        )
+
+
+@skipUnless(connection.vendor == 'sqlite', "Tests the tuned SQLite backend")
+class SQLiteBackendTests(FindusTestCase):
+
+    def test_connections_are_tuned(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)     # NORMAL
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_unknown_transaction_mode(self):
+        options = connection.settings_dict['OPTIONS']
+        original, options['transaction_mode'] = options['transaction_mode'], 'LAZY'
+        try:
+            with self.assertRaises(ImproperlyConfigured):
+                connection.transaction_mode
+        finally:
+            options['transaction_mode'] = original
+
+
+class SessionCacheCheckTests(FindusTestCase):
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_cached_sessions_need_a_shared_cache(self):
+        self.assertEqual([warning.id for warning in check_session_cache(None)], ['findus.W001'])
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db'):
+            self.assertEqual(check_session_cache(None), [])
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'findus_cache',
+        }}):
+            self.assertEqual(check_session_cache(None), [])
+
+
+class ReplicaRouterTests(FindusTestCase):
+
+    def view(self, write=False, browsing=True):
+        """A view reporting where its reads went, before and after an optional write."""
+        def view(request):
+            response = HttpResponse()
+            response.reads = [router.db_for_read(Service)]
+            if write:
+                router.db_for_write(Service)
+                response.reads.append(router.db_for_read(Service))
+            return response
+        return replica_reads(view) if browsing else view
+
+    def serve(self, view, cookies=None):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.COOKIES.update(cookies or {})
+        middleware = ReplicaMiddleware(lambda request: (
+            middleware.process_view(request, view, (), {}) or view(request)
+        ))
+        return middleware(request)
+
+    @override_settings(DATABASES={'default': settings.DATABASES['default'], 'replica': {}})
+    def test_marked_views_read_from_the_replica(self):
+        response = self.serve(self.view())
+        self.assertEqual(response.reads, ['replica'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(self.serve(self.view(browsing=False)).reads, ['default'])
+        # Outside a request: the primary.
+        self.assertEqual(router.db_for_read(Service), 'default')
+
+    @override_settings(DATABASES={'default': settings.DATABASES['default'], 'replica': {}})
+    def test_writers_are_pinned_to_the_primary(self):
+        response = self.serve(self.view(write=True))
+        self.assertEqual(response.reads, ['replica', 'default'])
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 30)
+        self.assertEqual(self.serve(self.view(), {PIN_COOKIE: '1'}).reads, ['default'])
+
+    @override_settings(DATABASES={'default': settings.DATABASES['default'], 'replica': {}})
+    def test_the_cache_table_stays_on_the_primary(self):
+        cache_entry = DatabaseCache('findus_cache', {}).cache_model_class
+
+        def view(request):
+            response = HttpResponse()
+            response.reads = [router.db_for_read(cache_entry)]
+            router.db_for_write(cache_entry)
+            response.reads.append(router.db_for_read(Service))
+            return response
+        response = self.serve(replica_reads(view))
+        self.assertEqual(response.reads, ['default', 'replica'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_no_replica_configured(self):
+        self.assertEqual(self.serve(self.view()).reads, ['default'])
+
+
+class SeedAndBenchTests(FindusTestCase):
+
+    def test_seed_then_bench(self):
+        call_command('seed_findus', users=20, services=40, reviews=60, saved=20, stdout=io.StringIO())
+        self.assertEqual(CraftsmanProfile.objects.count(), 4)
+        self.assertEqual(Service.objects.count(), 40)
+        service = Service.objects.order_by('-review_count').first()
+        self.assertEqual(service.review_count, service.reviews.count())
+        self.assertEqual(CraftsmanProfile.objects.filter(latitude__isnull=True).count(), 0)
+
+        out = io.StringIO()
+        call_command('bench_views', repeat=1, json='-', stdout=out, stderr=io.StringIO())
+        results = json.loads(out.getvalue())['results']
+        self.assertTrue(all(result['status'] < 400 for result in results))
+        self.assertIn('service_detail revalidated (ETag)', {result['view'] for result in results})
@@ -9,6 +9,7 @@ urlpatterns = [
     path('register/', views.register_craftsman, name='register_craftsman'),
     path('change-password/', views.change_password, name='change_password'),
     path('customer-dashboard/', views.customer_dashboard, name='customer_dashboard'),
+    path('customer-dashboard/cache-stats/', views.listing_cache_stats, name='listing_cache_stats'),
     path('service/<int:service_id>/', views.service_detail, name='service_detail'),
     path('customer-profile/', views.customer_profile, name='customer_profile'), 
     path('save-location/', views.save_user_location, name='save_location'),
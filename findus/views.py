@@ -4,17 +4,21 @@ from django.contrib.auth.models import User
 from django.contrib import messages
 from .models import *
 from .forms import *
-from django.http import HttpResponseRedirect
-from django.urls import reverse
+from .boosts import placements
+from .conditional import conditional_page, craftsman_validators, service_validators
+from .listing_cache import cache_stats, dashboard_page
+from .pagination import KeysetPaginator
+from .preferences import get_location, set_location
+from .roles import craftsman_required, customer_required, resolve_role, role_required
+from .routers import replica_reads
+from .tasks import delete_craftsman_profile
 import logging
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Case, When, F, Value, DecimalField, Avg, Count
-import decimal
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.cache import cache_control
+from django.db.models import Count, Exists, OuterRef, Q
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
-from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from django.http import JsonResponse
 
@@ -65,23 +69,12 @@ def signin(request):
         password = request.POST.get('password') 
         user = authenticate(request, username=username, password=password)
         
-        if user:    
-            
-            try:
-                user.userprofile.craftsmanprofile
-                login(request, user)
-                return redirect('craftsman_dashboard')
-            except CraftsmanProfile.DoesNotExist:
-                pass
-                
-            
-            try:
-                user.userprofile.customerprofile
+        if user:
+            role, profile = resolve_role(user)
+            if profile is not None:
                 login(request, user)
-                return redirect('customer_dashboard')
-            except CustomerProfile.DoesNotExist:
-                pass
-                
+                return redirect(f'{role}_dashboard')
+
             messages.error(request, 'Account type not recognized')
         else:
             messages.error(request, 'Wrong username or password')
@@ -110,156 +103,93 @@ def change_password(request):
 
 
 
+@replica_reads
 @login_required
 def customer_dashboard(request):
 
-    if not request.GET and 'user_state' in request.session:
-        request.session.pop('user_state', None)
-        request.session.pop('user_city', None)
-        print("🗑️ Location cleared via Clear Filters")
-
     auto_detect = request.GET.get('auto_detect')
     location_param = request.GET.get('location')
-    
-    # Get services with calculated ratings and review counts
-    services = Service.objects.select_related(
-        'craftsman',
-        'craftsman__user_profile', 
-        'craftsman__user_profile__user'
-    ).annotate(
-        avg_rating=Coalesce(
-            Avg('reviews__rating'),
-            Value(0.0),
-            output_field=models.FloatField()
-        ),
-        review_count=Count('reviews', distinct=True)
-    ).all()
 
+    # A bare GET is "Clear Filters", which also forgets the location.
+    user_state, user_city = get_location(request)
+    if not request.GET:
+        user_state, user_city = '', ''
+    elif auto_detect and location_param:
+        user_state, user_city = canonical_location_name(location_param), 'Auto-detected'
 
-    if auto_detect and location_param:
-        print(f"🔍 AUTO_DETECT: Saving location from GET parameter: {location_param}")
-        request.session['user_state'] = location_param
-        request.session['user_city'] = 'Auto-detected'
-    
-    # === FILTERS ===
-    
-    # Category filter
+    search_query = request.GET.get('q', '')
     category_filter = request.GET.get('category', '')
-    if category_filter:
-        services = services.filter(category=category_filter)
-    
-    # Price type filter
     price_type_filter = request.GET.get('price_type', '')
-    if price_type_filter:
-        services = services.filter(price_type=price_type_filter)
-    
-    # Location filter
     location_filter = request.GET.get('location', '')
-    if location_filter:
-        services = services.filter(
-            models.Q(craftsman__city__icontains=location_filter) |
-            models.Q(craftsman__state__icontains=location_filter)
-        )
-    
-    # Availability filter
+    near_filter = request.GET.get('near', '')
+    distance_filter = request.GET.get('distance', '')
     availability_filter = request.GET.get('availability', '')
-    if availability_filter:
-        services = services.filter(availability=availability_filter)
-    
-    # Job size filter
     job_size_filter = request.GET.get('job_size', '')
-    if job_size_filter:
-        services = services.filter(job_size=job_size_filter)
-    
-    # Price range filter
     min_price = request.GET.get('min_price', '')
     max_price = request.GET.get('max_price', '')
-    if min_price or max_price:
-        services = services.annotate(
-            effective_price=Case(
-                When(price_type='hourly', then=F('hourly_rate')),
-                When(price_type='fixed', then=F('fixed_price')),
-                default=Value(0),
-                output_field=DecimalField(),
-            )
-        )
-        if min_price:
-            services = services.filter(effective_price__gte=decimal.Decimal(min_price))
-        if max_price:
-            services = services.filter(effective_price__lte=decimal.Decimal(max_price))
-    
-    # Features filter
     features_filter = request.GET.getlist('features')
-    if features_filter:
-        services = services.filter(features__overlap=features_filter)
-    
-    # Materials included filter
+    features_match = request.GET.get('features_match', '')
     materials_included = request.GET.get('materials_included')
-    if materials_included:
-        services = services.filter(materials_included=True)
     
-    # === SORTING ===
     sort_by = request.GET.get('sort', '')
-    if sort_by == 'price_low_high':
-        if not (min_price or max_price):  # Only annotate if not already done
-            services = services.annotate(
-                effective_price=Case(
-                    When(price_type='hourly', then=F('hourly_rate')),
-                    When(price_type='fixed', then=F('fixed_price')),
-                    default=Value(0),
-                    output_field=DecimalField(),
-                )
-            )
-        services = services.order_by('effective_price')
-    elif sort_by == 'price_high_low':
-        if not (min_price or max_price):
-            services = services.annotate(
-                effective_price=Case(
-                    When(price_type='hourly', then=F('hourly_rate')),
-                    When(price_type='fixed', then=F('fixed_price')),
-                    default=Value(0),
-                    output_field=DecimalField(),
-                )
-            )
-        services = services.order_by('-effective_price')
-    elif sort_by == 'rating':
-        services = services.order_by('-avg_rating')  # Use the annotated avg_rating
-    else:
-        services = services.order_by('-created_at')
-    
-    # Pagination
-    paginator = Paginator(services, 9)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    include_travel_fee = request.GET.get('include_travel_fee')
+
+    # Filtered, sorted and paginated through the result cache
+    page_obj = dashboard_page(request.GET, 9)
+
+    # Paid boosts matching the search, picked in memory (see findus.boosts)
+    boosted_services = placements.place(
+        category_filter, location_filter or user_state, exclude=[service.pk for service in page_obj]
+    )
     
     # Build preserved querystring
     preserved_params = request.GET.copy()
-    if 'page' in preserved_params:
-        preserved_params.pop('page')
+    for param in ('page', 'cursor'):
+        preserved_params.pop(param, None)
     querystring = preserved_params.urlencode()
     
     context = {
         'page_obj': page_obj,
         'services': page_obj,
+        'boosted_services': boosted_services,
         'available_categories': Service.CATEGORY_CHOICES,
         'availability_choices': Service.AVAILABILITY_CHOICES,
         'job_size_choices': Service.SERVICE_SCOPE_CHOICES,
-        'features_choices': ServiceForm.SERVICE_FEATURES,
+        'features_choices': Service.FEATURE_CHOICES,
+        'search_query': search_query,
         'selected_category': category_filter,
         'selected_price_type': price_type_filter,
         'selected_location': location_filter,
+        'selected_near': near_filter,
+        'selected_distance': distance_filter,
+        'distance_choices': [5, 10, 25, 50, 100],
         'selected_availability': availability_filter,
         'selected_job_size': job_size_filter,
         'selected_min_price': min_price,
         'selected_max_price': max_price,
+        'selected_include_travel_fee': include_travel_fee,
         'selected_features': features_filter,
+        'selected_features_match': features_match,
         'selected_materials_included': materials_included,
         'selected_sort': sort_by,
         'querystring': querystring,
-        'user_state': request.session.get('user_state', ''),
+        'user_state': user_state,
     }
     
-    return render(request, 'customer_dashboard.html', context)
+    response = render(request, 'customer_dashboard.html', context)
+    return set_location(request, response, user_state, user_city)
+
+
+@staff_member_required
+def listing_cache_stats(request):
+    """Hit/miss counters of the customer_dashboard result cache."""
+    return JsonResponse(cache_stats())
+
+
+def canonical_location_name(text):
+    """Resolve free text like "Lagos State" through the Location aliases."""
+    location = Location.objects.resolve(text)
+    return location.name if location else text
 
 
 def save_user_location(request):
@@ -267,24 +197,20 @@ def save_user_location(request):
         state = request.POST.get('state')
         city = request.POST.get('city')
         
-        print(f"🔍 SAVE_LOCATION: Received state='{state}', city='{city}'")
-        
+        # Clear location if state is empty
         if state:
-            request.session['user_state'] = state
-            request.session['user_city'] = city
-            print(f"💾 SAVE_LOCATION: Saved to session - user_state='{state}'")
-            return JsonResponse({'success': True})
-        else:
-            # Clear location if state is empty
-            request.session.pop('user_state', None)
-            request.session.pop('user_city', None)
-            print("🗑️ SAVE_LOCATION: Cleared location from session")
-            return JsonResponse({'success': True})
+            state = canonical_location_name(state)
+        return set_location(request, JsonResponse({'success': True}), state, city)
     
     return JsonResponse({'success': False})
 
 
+# private, no-cache: browsers keep the page but revalidate it on every visit,
+# which conditional_page answers with a 304 while nothing has changed.
+@replica_reads
 @login_required
+@cache_control(private=True, no_cache=True)
+@conditional_page('service_detail.html', service_validators)
 def service_detail(request, service_id):
     try:
         service = Service.objects.select_related(
@@ -292,61 +218,49 @@ def service_detail(request, service_id):
             'craftsman__user_profile', 
             'craftsman__user_profile__user'
         ).annotate(
-            avg_rating=Coalesce(
-                Avg('reviews__rating'),
-                Value(0.0),
-                output_field=models.FloatField()
-            ),
-            review_count=Count('reviews', distinct=True)
-        ).get(id=service_id)
+            user_has_reviewed=Exists(Review.objects.filter(
+                service=OuterRef('pk'), customer__user_profile__user=request.user,
+            )),
+        ).get(id=service_id, craftsman__is_active=True)
         
-        # Get related services with ratings
-        related_services = Service.objects.filter(
-            category=service.category,
-            craftsman__is_verified=True
-        ).exclude(id=service_id).annotate(
-            avg_rating=Coalesce(
-                Avg('reviews__rating'),
-                Value(0.0),
-                output_field=models.FloatField()
-            ),
-            review_count=Count('reviews', distinct=True)
-        ).order_by('-created_at')[:4]
+        # Precomputed neighbours (build_related_services), best first
+        related_services = list(Service.objects.filter(
+            neighbour_of__service=service,
+            service_status='Active',
+            craftsman__is_verified=True,
+            craftsman__is_active=True,
+        ).select_related('craftsman').order_by('neighbour_of__rank')[:4])
+        if not related_services:
+            # Not built for this service yet: the newest in its category
+            related_services = Service.objects.filter(
+                category=service.category,
+                service_status='Active',
+                craftsman__is_verified=True,
+                craftsman__is_active=True,
+            ).exclude(id=service_id).select_related('craftsman').order_by('-created_at')[:4]
         
     except Service.DoesNotExist:
         messages.error(request, "Service not found.")
         return redirect('customer_dashboard')
     
+    # Only the newest reviews; the breakdown comes from the stored counts.
+    reviews = service.reviews.select_related('customer__user_profile__user')[:5]
+
     context = {
         'service': service,
         'related_services': related_services,
+        'avg_rating': service.avg_rating,
+        'review_count': service.review_count,
+        'rating_histogram': service.rating_histogram(),
+        'reviews': reviews,
+        'user_has_reviewed': service.user_has_reviewed,
     }
     
     return render(request, 'service_detail.html', context)
 
-def get_rating_distribution(reviews):
-    """Calculate rating distribution for the chart"""
-    distribution = {5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
-    total = reviews.count()
-    
-    for review in reviews:
-        distribution[review.rating] += 1
-    
-    # Convert to percentages
-    if total > 0:
-        for rating in distribution:
-            distribution[rating] = (distribution[rating] / total) * 100
-    
-    return distribution
-
-
-@login_required
+@craftsman_required
 def craftsman_dashboard(request):
-    try:
-        craftsman = request.user.userprofile.craftsmanprofile
-    except Exception as e:
-        messages.error(request, "You need to be a registered craftsman")
-        return redirect('home')
+    craftsman = request.craftsman
 
     service_id = request.GET.get('edit')  
     delete_id = request.GET.get('delete')
@@ -405,25 +319,12 @@ def craftsman_dashboard(request):
         else:
             form = ServiceForm()
 
-    # Get services with calculated ratings and review counts
-    services_list = Service.objects.filter(craftsman=craftsman).annotate(
-        avg_rating=Coalesce(
-            Avg('reviews__rating'),
-            Value(0.0),
-            output_field=models.FloatField()
-        ),
-        review_count=Count('reviews', distinct=True)
-    ).order_by('-created_at')
+    # Get services with their stored ratings and review counts
+    services_list = Service.objects.filter(craftsman=craftsman).order_by('-created_at')
     
-    paginator = Paginator(services_list, 6) 
-    
-    page = request.GET.get('page')
-    try:
-        services = paginator.page(page)
-    except PageNotAnInteger:
-        services = paginator.page(1)
-    except EmptyPage:
-        services = paginator.page(paginator.num_pages)
+    # The craftsman's own list: the count has to follow their edits at once.
+    paginator = KeysetPaginator(services_list, 6, cache_count=False)
+    services = paginator.get_page(request.GET.get('cursor'))
     
     return render(request, 'craftsman_dasboard.html', { 
         'form': form,
@@ -432,14 +333,9 @@ def craftsman_dashboard(request):
         'editing_service': editing_service
     })
 
-@login_required
+@role_required('craftsman', "Profile not found. Please contact support.")
 def craftsman_profile(request):
-    try:
-        craftsman = request.user.userprofile.craftsmanprofile
-    except:
-        logger.error(f"CraftsmanProfile not found for user {request.user}")
-        messages.error(request, "Profile not found. Please contact support.")
-        return redirect('home')
+    craftsman = request.craftsman
     
     profile_complete = craftsman.has_complete_profile()
     
@@ -449,8 +345,12 @@ def craftsman_profile(request):
         try:
             
             business_name = craftsman.business_name
-            craftsman.delete()
-            messages.success(request, f"Profile '{business_name}' has been deleted successfully!")
+            # Off the site and out of the craftsman role now; the cascade
+            # through every service, review and save runs in the worker.
+            craftsman.is_active = False
+            craftsman.save(update_fields=['is_active'])
+            delete_craftsman_profile.delay(craftsman.pk)
+            messages.success(request, f"Profile '{business_name}' is being deleted.")
             return redirect('home')
         except Exception as e:
             logger.error(f"Error deleting profile: {str(e)}")
@@ -484,14 +384,20 @@ def craftsman_profile(request):
     
     return render(request, 'craftsman_profile.html', context)
 
+@replica_reads
+@cache_control(private=True, no_cache=True)
+@conditional_page('craftsman_public_profile.html', craftsman_validators)
 def craftsman_public_profile(request, craftsman_id):
 
     craftsman = get_object_or_404(
         CraftsmanProfile.objects.select_related(
             'user_profile', 
             'user_profile__user'
+        ).annotate(
+            active_services=Count('service', filter=Q(service__service_status='Active')),
         ),
-        id=craftsman_id
+        id=craftsman_id,
+        is_active=True,
         # Removed: is_verified=True
     )
     
@@ -499,25 +405,18 @@ def craftsman_public_profile(request, craftsman_id):
     services = Service.objects.filter(
         craftsman=craftsman,
         service_status='Active'
-    ).annotate(
-        avg_rating=Avg('reviews__rating'),
-        review_count=Count('reviews')
-    ).order_by('-created_at')
+    ).select_related('craftsman').order_by('-created_at')
     
-    # Paginate services
-    paginator = Paginator(services, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginate services; the total came with the profile
+    paginator = KeysetPaginator(services, 6, count=craftsman.active_services)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
-    # Calculate overall craftsman stats
-    total_reviews = Review.objects.filter(service__craftsman=craftsman).count()
-    avg_rating = Review.objects.filter(
-        service__craftsman=craftsman
-    ).aggregate(avg_rating=Avg('rating'))['avg_rating'] or 0
+    # Overall craftsman stats are maintained on the profile itself
+    avg_rating = craftsman.avg_rating
     
     craftsman_stats = {
-        'total_services': services.count(),
-        'total_reviews': total_reviews,
+        'total_services': paginator.count,
+        'total_reviews': craftsman.review_count,
         'avg_rating': round(avg_rating, 1) if avg_rating else 0,
         'member_since': craftsman.created_at
     }
@@ -526,23 +425,20 @@ def craftsman_public_profile(request, craftsman_id):
         'craftsman': craftsman,
         'services': page_obj,
         'craftsman_stats': craftsman_stats,
+        'rating_histogram': craftsman.rating_histogram(),
     }
     
     return render(request, 'craftsman_public_profile.html', context)
 
-@login_required
+@customer_required
 def customer_profile(request):
-    try:
-        customer = request.user.userprofile.customerprofile
-        profile_complete = bool(
-            customer.address and 
-            customer.city and 
-            customer.state and 
-            customer.phone
-        )
-    except CustomerProfile.DoesNotExist:
-        messages.error(request, "Customer profile not found.")
-        return redirect('home')
+    customer = request.customer
+    profile_complete = bool(
+        customer.address and 
+        customer.city and 
+        customer.state and 
+        customer.phone
+    )
 
     if request.method == 'POST':
         form = CustomerProfileForm(request.POST, instance=customer)
@@ -569,26 +465,19 @@ def customer_profile(request):
     
     return render(request, 'customer_profile.html', context)
 
-@login_required
+@customer_required
 def saved_services(request):
-    try:
-        customer = request.user.userprofile.customerprofile
-        saved_services_list = SavedService.objects.filter(
-            customer=customer
-        ).select_related(
-            'service',
-            'service__craftsman',
-            'service__craftsman__user_profile'
-        ).order_by('-created_at')
-        
-        # Pagination
-        paginator = Paginator(saved_services_list, 9)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
-        
-    except CustomerProfile.DoesNotExist:
-        messages.error(request, "Customer profile not found.")
-        return redirect('home')
+    saved_services_list = SavedService.objects.filter(
+        customer=request.customer
+    ).select_related(
+        'service',
+        'service__craftsman',
+        'service__craftsman__user_profile'
+    ).order_by('-created_at')
+    
+    # Pagination; uncached count, so it follows saves and unsaves at once
+    paginator = KeysetPaginator(saved_services_list, 9, cache_count=False)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
@@ -597,11 +486,11 @@ def saved_services(request):
     
     return render(request, 'saved_services.html', context)
 
-@login_required
+@customer_required
 def save_service(request, service_id):
     if request.method == 'POST':
         try:
-            customer = request.user.userprofile.customerprofile
+            customer = request.customer
             service = Service.objects.get(id=service_id)
             
             
@@ -611,8 +500,6 @@ def save_service(request, service_id):
                 SavedService.objects.create(customer=customer, service=service)
                 messages.success(request, "Service saved successfully!")
                 
-        except CustomerProfile.DoesNotExist:
-            messages.error(request, "Customer profile not found.")
         except Service.DoesNotExist:
             messages.error(request, "Service not found.")
         except Exception as e:
@@ -620,11 +507,11 @@ def save_service(request, service_id):
     
     return redirect(request.META.get('HTTP_REFERER', 'customer_dashboard'))
 
-@login_required
+@customer_required
 def unsave_service(request, service_id):
     if request.method == 'POST':
         try:
-            customer = request.user.userprofile.customerprofile
+            customer = request.customer
             service = Service.objects.get(id=service_id)
             
             saved_service = SavedService.objects.filter(customer=customer, service=service)
@@ -634,8 +521,6 @@ def unsave_service(request, service_id):
             else:
                 messages.info(request, "Service was not in your saved list.")
                 
-        except CustomerProfile.DoesNotExist:
-            messages.error(request, "Customer profile not found.")
         except Service.DoesNotExist:
             messages.error(request, "Service not found.")
         except Exception as e:
@@ -643,9 +528,10 @@ def unsave_service(request, service_id):
     
     return redirect(request.META.get('HTTP_REFERER', 'saved_services'))
 
-@login_required
+@craftsman_required
 def craftsman_ad_boost(request):
-    return render(request, 'craftsman_ad_boost.html')
+    boosts = Boost.objects.filter(service__craftsman=request.craftsman).select_related('service', 'location__parent')
+    return render(request, 'craftsman_ad_boost.html', {'boosts': boosts})
 
 def user_logout(request):
     auth_logout(request)
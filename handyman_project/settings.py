@@ -48,13 +48,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    'findus.querycount.QueryCountMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'findus.roles.RoleMiddleware',
+    'findus.routers.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    "whitenoise.middleware.WhiteNoiseMiddleware",
 ]
 
 ROOT_URLCONF = 'handyman_project.urls'
@@ -81,13 +84,44 @@ WSGI_APPLICATION = 'handyman_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# handyman_project.sqlite3 is Django's SQLite backend plus per-connection
+# pragmas (WAL, busy timeout ...) and a configurable BEGIN mode; see its
+# docstring. Connections are kept for DJANGO_CONN_MAX_AGE seconds (0 closes
+# them after every request, as Django does by default) and checked before
+# reuse.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'handyman_project.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Browsing views (marked @replica_reads) read from a replica when
+# DJANGO_READ_REPLICA names one: a copy of db.sqlite3 kept fresh by
+# `manage.py refresh_replica --every N`. See findus/routers.py.
+if os.environ.get('DJANGO_READ_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DJANGO_READ_REPLICA'],
+    }
+
+DATABASE_ROUTERS = ['findus.routers.ReplicaRouter']
+
+
+# The signed-in user is loaded with their craftsman or customer profile,
+# which findus.roles.RoleMiddleware exposes as request.craftsman / request.customer.
+# ModelBackend only keeps sessions from before ProfileBackend signed in;
+# drop it once they've expired (SESSION_COOKIE_AGE, two weeks).
+AUTHENTICATION_BACKENDS = [
+    'findus.roles.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -133,9 +167,64 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+# collectstatic writes content-hashed, gzip/brotli-compressed copies, which
+# WhiteNoise serves with far-future immutable cache headers.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# One cache shared by every gunicorn worker: counts, version counters and
+# cached sessions must agree across processes. Set REDIS_URL in production;
+# without it the cache lives in the database (run `manage.py
+# createcachetable`), which is shared but costs a query per lookup.
+#
+# 'results' holds the customer_dashboard result cache and the rendered
+# service cards (findus/listing_cache.py, findus/templatetags/service_cards.py).
+# A lookup there only pays off in Redis: from the database table a hit costs
+# more queries than the page it saves, so without REDIS_URL it is off.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+        'results': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': 'results',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'findus_cache',
+        },
+        'results': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+    }
+
+# With Redis, sessions are read from the cache and written through to the
+# database, so a request only touches django_session when the session
+# changes or isn't cached yet. The database cache would only double every
+# session write, so without Redis they stay in django_session alone.
+# `manage.py check --deploy` warns if the session cache is ever
+# per-process (findus/checks.py). Per-visitor preferences live in signed
+# cookies instead (findus/preferences.py) and don't touch sessions at all.
+if os.environ.get('REDIS_URL'):
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
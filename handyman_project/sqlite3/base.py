@@ -0,0 +1,71 @@
+"""
+Django's SQLite backend, tuned for several gunicorn workers sharing one
+database file.
+
+Two OPTIONS are taken out of the sqlite3.connect() arguments:
+
+``pragmas``
+    Run on every new connection, over PRAGMAS below. busy_timeout makes a
+    connection wait for the write lock instead of failing with "database
+    is locked".
+
+``transaction_mode``
+    How atomic() blocks begin: DEFERRED (SQLite's default), IMMEDIATE or
+    EXCLUSIVE. A deferred transaction that reads and then writes has to
+    upgrade its lock, and if another connection is writing SQLite fails
+    the upgrade at once, without waiting out the busy timeout. IMMEDIATE
+    takes the write lock up front, where the busy timeout applies.
+
+Both mirror the ``init_command`` and ``transaction_mode`` options of
+Django 5.1's own backend.
+
+The journal mode isn't set here: WAL, which lets readers carry on while a
+writer commits, is stored in the database file, so migration
+0027_sqlite_wal switches it once. Setting it on connect would convert any
+database a management command merely opened.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+PRAGMAS = {
+    'busy_timeout': 5000,           # ms
+    # Durable across application crashes; only a power loss can undo the
+    # last commits. Safe with WAL and much cheaper than FULL.
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,           # KiB, i.e. about 20 MB per connection
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+TRANSACTION_MODES = {'DEFERRED', 'IMMEDIATE', 'EXCLUSIVE'}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    @property
+    def pragmas(self):
+        return {**PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})}
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode') or 'DEFERRED'
+        if mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode must be one of {', '.join(sorted(TRANSACTION_MODES))}, not {mode!r}."
+            )
+        return mode.upper()
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,41 @@
+// Simple Carousel Functionality
+document.querySelectorAll('.scroll-btn').forEach(btn => {
+    btn.addEventListener('click', () => {
+        const carousel = document.querySelector('.praise-carousel');
+        const scrollAmount = btn.classList.contains('left') ? -300 : 300;
+        carousel.scrollBy({ left: scrollAmount, behavior: 'smooth' });
+    });
+});
+
+function confirmDelete(serviceId, serviceTitle) {
+    const modal = document.getElementById('deleteModal');
+    const serviceName = document.getElementById('serviceName');
+    const confirmDeleteBtn = document.getElementById('confirmDeleteBtn');
+
+    serviceName.textContent = serviceTitle;
+    confirmDeleteBtn.href = `?delete=${serviceId}`;
+
+    modal.style.display = 'flex';
+}
+
+function closeModal() {
+    const modal = document.getElementById('deleteModal');
+    modal.style.display = 'none';
+}
+
+// Close modal when clicking outside
+document.getElementById('deleteModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeModal();
+    }
+});
+
+// Close modal with escape key
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'Escape') {
+        closeModal();
+    }
+});
+
+// Close modal when clicking the X button
+document.querySelector('.close-modal').addEventListener('click', closeModal);
@@ -0,0 +1,22 @@
+(function() {
+  const fileInput = document.getElementById('profile-photo');
+  const previewWrapper = document.getElementById('profile-photo-preview-wrapper');
+  const previewImg = document.getElementById('profile-photo-preview');
+  if (!fileInput || !previewWrapper || !previewImg) return;
+  fileInput.addEventListener('change', function(e) {
+    const file = e.target.files && e.target.files[0];
+    if (!file) {
+      previewWrapper.style.display = 'none';
+      previewImg.removeAttribute('src');
+      previewImg.removeAttribute('alt');
+      return;
+    }
+    const reader = new FileReader();
+    reader.onload = function(evt) {
+      previewImg.src = evt.target.result;
+      previewImg.alt = file.name;
+      previewWrapper.style.display = 'block';
+    };
+    reader.readAsDataURL(file);
+  });
+})();
@@ -0,0 +1,78 @@
+function confirmDelete(serviceId, serviceTitle) {
+    const modal = document.getElementById('deleteModal');
+    const serviceName = document.getElementById('serviceName');
+    const confirmDeleteBtn = document.getElementById('confirmDeleteBtn');
+
+    serviceName.textContent = serviceTitle;
+    confirmDeleteBtn.href = `?delete=${serviceId}`;
+
+    modal.style.display = 'flex';
+    document.body.style.overflow = 'hidden'; // Prevent background scrolling
+}
+
+function confirmDeleteProfile(profileName) {
+    const modal = document.getElementById('deleteProfileModal');
+    const profileNameElement = document.getElementById('profileName');
+    const confirmDeleteBtn = document.getElementById('confirmDeleteProfileBtn');
+
+    profileNameElement.textContent = profileName;
+    modal.style.display = 'flex';
+    document.body.style.overflow = 'hidden'; // Prevent background scrolling
+}
+
+function closeModal(modalId) {
+    const modal = document.getElementById(modalId);
+    modal.classList.add('exiting');
+    modal.querySelector('.modal-content').classList.add('exiting');
+
+    setTimeout(() => {
+        modal.style.display = 'none';
+        modal.classList.remove('exiting');
+        modal.querySelector('.modal-content').classList.remove('exiting');
+        document.body.style.overflow = ''; // Restore scrolling
+    }, 200);
+}
+
+function closeDeleteModal() {
+    closeModal('deleteModal');
+}
+
+function closeProfileModal() {
+    closeModal('deleteProfileModal');
+}
+
+// Close modal when clicking outside
+document.addEventListener('click', function(e) {
+    if (e.target.classList.contains('modal')) {
+        closeModal(e.target.id);
+    }
+});
+
+// Close modal with escape key
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'Escape') {
+        const openModals = document.querySelectorAll('.modal[style*="display: flex"]');
+        openModals.forEach(modal => {
+            closeModal(modal.id);
+        });
+    }
+});
+
+// Close modal when clicking the X button
+document.querySelectorAll('.close-modal').forEach(button => {
+    button.addEventListener('click', function() {
+        const modal = this.closest('.modal');
+        closeModal(modal.id);
+    });
+});
+
+// Focus management for accessibility
+document.addEventListener('DOMContentLoaded', function() {
+    const modals = document.querySelectorAll('.modal');
+    modals.forEach(modal => {
+        modal.addEventListener('shown', function() {
+            const focusElement = this.querySelector('.delete-confirm-btn') || this.querySelector('.cancel-btn');
+            if (focusElement) focusElement.focus();
+        });
+    });
+});
@@ -0,0 +1,7 @@
+function showMessageModal(craftsmanId) {
+    alert('Message functionality for craftsman ' + craftsmanId + ' will be implemented soon!');
+}
+
+function addToFavorites(serviceId) {
+    alert('Favorite functionality for service ' + serviceId + ' will be implemented soon!');
+}
@@ -0,0 +1,62 @@
+function requestLocation(event) {
+    event.preventDefault();
+    console.log("📍 Location button clicked!");
+
+    if (navigator.geolocation) {
+        // Show loading
+        const button = event.target;
+        const originalText = button.innerHTML;
+        button.innerHTML = '<i class="bi bi-hourglass-split me-1"></i> Detecting...';
+        button.disabled = true;
+
+        navigator.geolocation.getCurrentPosition(
+            // Success
+            async function(position) {
+                console.log("🎯 Got location:", position.coords);
+
+                try {
+                    const lat = position.coords.latitude;
+                    const lon = position.coords.longitude;
+
+                    // Get state from coordinates
+                    console.log("🌍 Calling geocoding API...");
+                    const response = await fetch(
+                        `https://api.bigdatacloud.net/data/reverse-geocode-client?latitude=${lat}&longitude=${lon}&localityLanguage=en`
+                    );
+                    const data = await response.json();
+                    console.log("📍 Full API response:", data);
+
+                    // Extract state and city
+                    const state = data.principalSubdivision || data.region || 'Lagos';
+                    const city = data.city || data.locality || 'Lagos';
+
+                    console.log("📝 Extracted - State:", state, "City:", city);
+
+                    if (state) {
+                        // SIMPLE VERSION: Just save to session via GET parameter
+                        console.log("💾 Redirecting with location parameter...");
+                        window.location.href = `?location=${encodeURIComponent(state)}&auto_detect=true`;
+                    } else {
+                        alert('Could not determine your location. Please try again.');
+                        button.innerHTML = originalText;
+                        button.disabled = false;
+                    }
+                } catch (error) {
+                    console.error('Error:', error);
+                    alert('Error processing location: ' + error.message);
+                    button.innerHTML = originalText;
+                    button.disabled = false;
+                }
+            },
+            // Error
+            function(error) {
+                console.error("❌ Location error:", error);
+                alert('Location access denied. Please allow location access to see local services.');
+                button.innerHTML = originalText;
+                button.disabled = false;
+            }
+        );
+    } else {
+        alert('Geolocation is not supported by your browser.');
+    }
+}
@@ -0,0 +1,45 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Form validation
+    const form = document.querySelector('.needs-validation');
+    if (form) {
+        form.addEventListener('submit', function(event) {
+            if (!form.checkValidity()) {
+                event.preventDefault();
+                event.stopPropagation();
+            }
+            form.classList.add('was-validated');
+        }, false);
+    }
+
+    // Auto-hide alerts after 5 seconds
+    const alerts = document.querySelectorAll('.alert');
+    alerts.forEach(alert => {
+        setTimeout(() => {
+            const bsAlert = new bootstrap.Alert(alert);
+            bsAlert.close();
+        }, 5000);
+    });
+
+    // Add character counters for text areas
+    const textAreas = form.querySelectorAll('textarea');
+    textAreas.forEach(textarea => {
+        const maxLength = textarea.getAttribute('maxlength');
+        if (maxLength) {
+            const counter = document.createElement('small');
+            counter.className = 'form-text text-muted text-end d-block';
+            counter.textContent = `0/${maxLength} characters`;
+
+            textarea.parentNode.appendChild(counter);
+
+            textarea.addEventListener('input', function() {
+                counter.textContent = `${this.value.length}/${maxLength} characters`;
+
+                if (this.value.length > maxLength * 0.8) {
+                    counter.classList.add('text-warning');
+                } else {
+                    counter.classList.remove('text-warning');
+                }
+            });
+        }
+    });
+});
@@ -0,0 +1,21 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Add animation to save/unsave buttons
+    const saveButtons = document.querySelectorAll('.btn-danger');
+    saveButtons.forEach(button => {
+        button.addEventListener('click', function() {
+            this.classList.add('heart-animation');
+            setTimeout(() => {
+                this.classList.remove('heart-animation');
+            }, 300);
+        });
+    });
+
+    // Auto-hide alerts after 5 seconds
+    const alerts = document.querySelectorAll('.alert');
+    alerts.forEach(alert => {
+        setTimeout(() => {
+            const bsAlert = new bootstrap.Alert(alert);
+            bsAlert.close();
+        }, 5000);
+    });
+});
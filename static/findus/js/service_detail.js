@@ -0,0 +1,237 @@
+function changeMainImage(thumb) {
+        const mainImage = document.getElementById('mainImage');
+        mainImage.src = thumb.src;
+    }
+
+    function showMessageModal() {
+        // Implement message modal functionality
+        alert('Message functionality will be implemented soon!');
+    }
+
+    function toggleFavorite() {
+        // Implement favorite functionality
+        alert('Favorite functionality will be implemented soon!');
+    }
+
+    function showBookingModal() {
+        // Implement booking modal functionality
+        alert('Booking functionality will be implemented soon!');
+    }
+
+    // Add hover effects for service cards
+    document.addEventListener('DOMContentLoaded', function() {
+        const serviceCards = document.querySelectorAll('.service-card');
+        serviceCards.forEach(card => {
+            card.addEventListener('mouseenter', function() {
+                this.style.transform = 'translateY(-5px)';
+                this.style.transition = 'transform 0.3s ease';
+            });
+
+            card.addEventListener('mouseleave', function() {
+                this.style.transform = 'translateY(0)';
+            });
+        });
+    });
+    // Share functionality
+let currentShareUrl = '';
+let currentShareTitle = '';
+
+function showShareModal(event, serviceId, serviceTitle) {
+    if (event) event.preventDefault();
+
+    currentShareUrl = `${window.location.origin}${serviceUrlTemplate}`.replace('/0/', `/${serviceId}/`);
+    currentShareTitle = serviceTitle || 'Check out this amazing service';
+
+    // Update share link input
+    document.getElementById('shareLink').value = currentShareUrl;
+
+    // Show modal
+    const modal = document.getElementById('shareModal');
+    modal.style.display = 'flex';
+    document.body.style.overflow = 'hidden';
+}
+
+function closeShareModal() {
+    const modal = document.getElementById('shareModal');
+    modal.style.display = 'none';
+    document.body.style.overflow = '';
+}
+
+// Facebook Share
+function shareOnFacebook() {
+    const shareUrl = `https://www.facebook.com/sharer/sharer.php?u=${encodeURIComponent(currentShareUrl)}`;
+    openShareWindow(shareUrl, 'facebook-share');
+}
+
+// Twitter Share
+function shareOnTwitter() {
+    const text = `Check out "${currentShareTitle}" on our platform!`;
+    const shareUrl = `https://twitter.com/intent/tweet?text=${encodeURIComponent(text)}&url=${encodeURIComponent(currentShareUrl)}`;
+    openShareWindow(shareUrl, 'twitter-share');
+}
+
+// Instagram (Note: Instagram doesn't have direct sharing API for web)
+function shareOnInstagram() {
+    // Since Instagram doesn't support direct web sharing, we'll copy the link and show instructions
+    copyToClipboard(currentShareUrl);
+
+    // Show instructions
+    alert('Link copied! Open Instagram and paste this link in your story or post to share this service.\n\nYou can also share as a post by uploading a screenshot and including this link in your caption.');
+}
+
+// Copy Link
+function copyShareLink() {
+    copyToClipboard(currentShareUrl);
+
+    // Show feedback
+    const copyBtn = document.querySelector('.share-option:nth-child(4)');
+    const originalText = copyBtn.querySelector('span').textContent;
+    copyBtn.querySelector('span').textContent = 'Copied!';
+
+    setTimeout(() => {
+        copyBtn.querySelector('span').textContent = originalText;
+    }, 2000);
+}
+
+// Utility function to open share windows
+function openShareWindow(url, name) {
+    const width = 600;
+    const height = 400;
+    const left = (window.innerWidth - width) / 2;
+    const top = (window.innerHeight - height) / 2;
+
+    window.open(url, name, `width=${width},height=${height},left=${left},top=${top},scrollbars=yes,resizable=yes`);
+}
+
+// Utility function to copy to clipboard
+function copyToClipboard(text) {
+    // Try using the Clipboard API first
+    if (navigator.clipboard && window.isSecureContext) {
+        navigator.clipboard.writeText(text).then(() => {
+            showToast('Link copied to clipboard!');
+        }).catch(err => {
+            fallbackCopyToClipboard(text);
+        });
+    } else {
+        // Fallback for older browsers
+        fallbackCopyToClipboard(text);
+    }
+}
+
+function fallbackCopyToClipboard(text) {
+    const textArea = document.createElement('textarea');
+    textArea.value = text;
+    textArea.style.position = 'fixed';
+    textArea.style.opacity = '0';
+    document.body.appendChild(textArea);
+    textArea.focus();
+    textArea.select();
+
+    try {
+        const successful = document.execCommand('copy');
+        if (successful) {
+            showToast('Link copied to clipboard!');
+        }
+    } catch (err) {
+        console.error('Fallback: Oops, unable to copy', err);
+        alert('Unable to copy link. Please copy it manually: ' + text);
+    }
+
+    document.body.removeChild(textArea);
+}
+
+// Toast notification
+function showToast(message) {
+    // Remove existing toast
+    const existingToast = document.getElementById('shareToast');
+    if (existingToast) {
+        existingToast.remove();
+    }
+
+    // Create new toast
+    const toast = document.createElement('div');
+    toast.id = 'shareToast';
+    toast.innerHTML = `
+        <div class="toast-content">
+            <i class="bi bi-check-circle"></i>
+            <span>${message}</span>
+        </div>
+    `;
+
+    // Add toast styles
+    toast.style.cssText = `
+        position: fixed;
+        bottom: 20px;
+        right: 20px;
+        background: #077f46;
+        color: white;
+        padding: 12px 20px;
+        border-radius: 8px;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        z-index: 10000;
+        animation: slideInRight 0.3s ease;
+    `;
+
+    document.body.appendChild(toast);
+
+    // Remove toast after 3 seconds
+    setTimeout(() => {
+        toast.style.animation = 'slideOutRight 0.3s ease';
+        setTimeout(() => {
+            if (toast.parentNode) {
+                toast.parentNode.removeChild(toast);
+            }
+        }, 300);
+    }, 3000);
+}
+
+// Add these animations to your CSS
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes slideInRight {
+        from {
+            transform: translateX(100%);
+            opacity: 0;
+        }
+        to {
+            transform: translateX(0);
+            opacity: 1;
+        }
+    }
+
+    @keyframes slideOutRight {
+        from {
+            transform: translateX(0);
+            opacity: 1;
+        }
+        to {
+            transform: translateX(100%);
+            opacity: 0;
+        }
+    }
+
+    .toast-content {
+        display: flex;
+        align-items: center;
+        gap: 8px;
+    }
+
+    .toast-content i {
+        font-size: 1.2rem;
+    }
+`;
+document.head.appendChild(style);
+
+// Close modal when clicking outside
+document.getElementById('shareModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeShareModal();
+    }
+});
+
+// Close modal with escape key
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'Escape') {
+        closeShareModal();
+    }
+});